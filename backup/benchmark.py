@@ -0,0 +1,353 @@
+# Copyright 2020 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""Backup and restore throughput benchmark.
+
+The benchmark runs the backup and the restore of a synthetic data set through
+``stream_backup_to_storage`` and ``stream_restore_from_storage`` with the
+local storage drivers, for every combination of the given storage drivers,
+segment sizes, compression codecs and concurrency levels. Each stage runs in
+a separate process, one JSON record is written per stage, e.g.::
+
+    python3 backup/benchmark.py --benchmark-data-size 1073741824 \\
+        --benchmark-codecs none,gzip,zstd --benchmark-concurrency 1,4 \\
+        --benchmark-output results.jsonl
+
+Only the backup pipeline is measured, the synthetic runner reads the data
+set with cat and the restore command discards the data.
+"""
+
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import importutils
+
+topdir = os.path.normpath(
+    os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir))
+sys.path.insert(0, topdir)
+
+from backup import main  # noqa: E402
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+benchmark_opts = [
+    cfg.IntOpt(
+        'benchmark-data-size',
+        default=256 * (1024 ** 2),
+        min=1,
+        help='Size (in bytes) of the synthetic data set.'
+    ),
+    cfg.FloatOpt(
+        'benchmark-compressibility',
+        default=0.5,
+        min=0,
+        max=1,
+        help='Fraction of the synthetic data set which is compressible text, '
+             'the rest is random data.'
+    ),
+    cfg.StrOpt(
+        'benchmark-source',
+        help='Use this file as the data set instead of generating one.'
+    ),
+    cfg.ListOpt(
+        'benchmark-storage-drivers',
+        default=['local'],
+        help='Storage drivers to benchmark, local and/or dedup (with the '
+             'local backend).'
+    ),
+    cfg.ListOpt(
+        'benchmark-segment-sizes',
+        default=[str(256 * (1024 ** 2))],
+        help='Segment sizes (in bytes) to benchmark.'
+    ),
+    cfg.ListOpt(
+        'benchmark-codecs',
+        default=['gzip'],
+        help='Compression codecs to benchmark.'
+    ),
+    cfg.ListOpt(
+        'benchmark-concurrency',
+        default=['1'],
+        help='Concurrency levels to benchmark, used for both the upload and '
+             'the download.'
+    ),
+    cfg.IntOpt(
+        'benchmark-repeat',
+        default=1,
+        min=1,
+        help='Number of times each case is run.'
+    ),
+    cfg.StrOpt(
+        'benchmark-work-dir',
+        help='Directory for the data set and the saved backups, a temporary '
+             'directory is used if not specified. The directory should be on '
+             'the file system to be measured.'
+    ),
+    cfg.StrOpt(
+        'benchmark-output',
+        help='File to append the JSON records to, stdout if not specified.'
+    ),
+]
+
+
+COMPRESSIBLE_TEXT = (
+    b'INSERT INTO `benchmark` VALUES (%d,\'trove\',\'backup\',NULL);\n')
+
+
+def generate_data(path, size, compressibility, block_size=2 ** 20):
+    """Write a data set mixing random and compressible blocks."""
+    compressible = (COMPRESSIBLE_TEXT * (block_size // len(COMPRESSIBLE_TEXT)
+                                         + 1))[:block_size]
+    written = 0
+    with open(path, 'wb') as f:
+        for index in itertools.count():
+            if written >= size:
+                break
+            length = min(block_size, size - written)
+            # Spread the compressible blocks evenly over the data set.
+            threshold = int(index * compressibility)
+            if int((index + 1) * compressibility) > threshold:
+                f.write(compressible[:length])
+            else:
+                f.write(os.urandom(length))
+            written += length
+
+
+def get_runner_cls():
+    """Get the synthetic runner class.
+
+    The runner module reads the config options when imported, so it's
+    imported after the options are registered.
+    """
+    base = importutils.import_module('backup.drivers.base')
+
+    class SyntheticRunner(base.BaseRunner):
+        """Read the data set as the backup, discard the data on restore."""
+
+        cmd = 'cat %(source)s'
+        restore_cmd = 'cat > /dev/null'
+        datadir = '/dev/null'
+
+        def __init__(self, *args, **kwargs):
+            kwargs.setdefault('source', CONF.benchmark_source)
+            super(SyntheticRunner, self).__init__(*args, **kwargs)
+
+        def _check_eof(self, length):
+            if not length:
+                # Wait for the backup processes to exit, so that their CPU
+                # time is accounted before they are killed by __exit__.
+                for process in self.processes:
+                    process.wait()
+
+        def read(self, chunk_size):
+            data = super(SyntheticRunner, self).read(chunk_size)
+            self._check_eof(len(data))
+            return data
+
+        def readinto(self, buffer):
+            length = super(SyntheticRunner, self).readinto(buffer)
+            self._check_eof(length)
+            return length
+
+        def readinto1(self, buffer):
+            length = super(SyntheticRunner, self).readinto1(buffer)
+            self._check_eof(length)
+            return length
+
+        def check_process(self):
+            return self.process.returncode == 0
+
+        def check_restore_process(self):
+            return self.process.wait() == 0
+
+    return SyntheticRunner
+
+
+def get_dir_size(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+    return size
+
+
+def run_stage(stage, runner_cls, result_queue):
+    """Run a backup or restore stage and put its measurements in the queue.
+
+    The stage runs in its own process so that the peak RSS of the stage is
+    not affected by the others.
+    """
+    storage = importutils.import_class(
+        main.storage_mapping[CONF.storage_driver])()
+
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.monotonic()
+    if stage == 'backup':
+        result = main.stream_backup_to_storage(runner_cls, storage)
+    else:
+        result = main.stream_restore_from_storage(runner_cls, storage)
+    wall_time = time.monotonic() - start
+
+    cpu_time = 0
+    for who, before in ((resource.RUSAGE_SELF, self_usage),
+                        (resource.RUSAGE_CHILDREN, children_usage)):
+        after = resource.getrusage(who)
+        cpu_time += ((after.ru_utime - before.ru_utime) +
+                     (after.ru_stime - before.ru_stime))
+
+    result_queue.put({
+        'result': result,
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'peak_child_rss_kb': resource.getrusage(
+            resource.RUSAGE_CHILDREN).ru_maxrss,
+    })
+
+
+def measure(stage, runner_cls):
+    context = multiprocessing.get_context('fork')
+    result_queue = context.Queue()
+    process = context.Process(target=run_stage,
+                              args=(stage, runner_cls, result_queue))
+    process.start()
+    measurements = result_queue.get()
+    process.join()
+
+    if measurements['result'] is None:
+        raise Exception('Benchmark %s stage failed, see the log for '
+                        'details.' % stage)
+    return measurements
+
+
+def get_cases():
+    """Get the combinations of the options to benchmark."""
+    cases = []
+    for driver in CONF.benchmark_storage_drivers:
+        if driver == 'dedup':
+            # The dedup storage driver chunks and compresses the stream by
+            # itself, the segment size and codec don't apply.
+            for concurrency in CONF.benchmark_concurrency:
+                cases.append((driver, None, 'none', int(concurrency)))
+        else:
+            for segment_size, codec, concurrency in itertools.product(
+                    CONF.benchmark_segment_sizes, CONF.benchmark_codecs,
+                    CONF.benchmark_concurrency):
+                cases.append((driver, int(segment_size), codec,
+                              int(concurrency)))
+    return cases
+
+
+def run_case(runner_cls, storage_dir, driver, segment_size, codec,
+             concurrency):
+    shutil.rmtree(storage_dir, ignore_errors=True)
+    os.makedirs(storage_dir)
+
+    CONF.set_override('local_storage_dir', storage_dir)
+    CONF.set_override('compression', codec)
+    if driver == 'dedup':
+        CONF.set_override('storage_driver', 'dedup')
+        CONF.set_override('dedup_backend', 'local')
+        CONF.set_override('dedup_concurrency', concurrency)
+    else:
+        CONF.set_override('storage_driver', driver)
+        CONF.set_override('swift_segment_size', segment_size)
+        CONF.set_override('swift_upload_concurrency', concurrency)
+        CONF.set_override('swift_download_concurrency', concurrency)
+
+    data_size = os.path.getsize(CONF.benchmark_source)
+    case = {
+        'storage_driver': driver,
+        'segment_size': segment_size,
+        'compression': codec,
+        'concurrency': concurrency,
+        'data_size': data_size,
+    }
+
+    backup = measure('backup', runner_cls)
+    checksum, location = backup.pop('result')
+    backup['stored_size'] = get_dir_size(storage_dir)
+
+    CONF.set_override('restore_from', location)
+    CONF.set_override('restore_checksum', checksum)
+    restore = measure('restore', runner_cls)
+    restore['stored_size'] = backup['stored_size']
+    del restore['result']
+
+    records = []
+    for stage, measurements in (('backup', backup), ('restore', restore)):
+        wall_time = measurements['wall_time']
+        records.append(dict(
+            case,
+            stage=stage,
+            throughput_mb_s=round(data_size / wall_time / 1024 ** 2, 2),
+            cpu_ns_per_byte=round(measurements['cpu_time'] * 10 ** 9 /
+                                  data_size, 2),
+            **measurements))
+    return records
+
+
+def main_benchmark():
+    CONF.register_cli_opts(main.cli_opts + benchmark_opts)
+    logging.register_options(CONF)
+    CONF(sys.argv[1:], project='trove-backup')
+    logging.setup(CONF, 'trove-backup')
+
+    CONF.set_override('backup_id', 'benchmark')
+    CONF.set_override('swift_container', 'benchmark')
+    runner_cls = get_runner_cls()
+
+    work_dir = CONF.benchmark_work_dir or tempfile.mkdtemp(
+        prefix='trove-backup-benchmark-')
+    storage_dir = os.path.join(work_dir, 'storage')
+    try:
+        if not CONF.benchmark_source:
+            source = os.path.join(work_dir, 'data')
+            LOG.info('Generating %s bytes of data in %s',
+                     CONF.benchmark_data_size, source)
+            generate_data(source, CONF.benchmark_data_size,
+                          CONF.benchmark_compressibility)
+            CONF.set_override('benchmark_source', source)
+
+        output = (open(CONF.benchmark_output, 'a') if CONF.benchmark_output
+                  else sys.stdout)
+        try:
+            for case in get_cases():
+                for _ in range(CONF.benchmark_repeat):
+                    LOG.info('Running benchmark case: %s', case)
+                    for record in run_case(runner_cls, storage_dir, *case):
+                        output.write(json.dumps(record) + '\n')
+                        output.flush()
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    finally:
+        if CONF.benchmark_work_dir:
+            shutil.rmtree(storage_dir, ignore_errors=True)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main_benchmark())
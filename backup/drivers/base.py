@@ -15,10 +15,16 @@
 import os
 import signal
 import subprocess
+import threading
+import time
 
 from oslo_config import cfg
 from oslo_log import log as logging
 
+from backup.utils import compression
+from backup.utils import encryption
+from backup.utils import stream as stream_utils
+
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
@@ -32,14 +38,33 @@ class BaseRunner(object):
     prepare_cmd = ''
 
     encrypt_key = CONF.backup_encryption_key
+    gcm_key = CONF.gcm_key
 
     def __init__(self, *args, **kwargs):
         self.process = None
         self.pid = None
+        # The compressor runs in a separate process, fed by a relay thread.
+        self.compress_process = None
+        self.encryptor = None
+        self.output = None
+        self._relay_thread = None
+        self._relay_error = None
+        self._start_time = None
+        self.raw_bytes = 0
+        self.bytes_read = 0
+        self.backup_time = None
         self.base_filename = kwargs.get('filename')
         self.storage = kwargs.pop('storage', None)
         self.location = kwargs.pop('location', '')
         self.checksum = kwargs.pop('checksum', '')
+        metadata = kwargs.pop('metadata', None)
+
+        self.compressor = compression.get_codec(
+            CONF.compression, threads=CONF.compression_threads,
+            level=CONF.compression_level)
+        # The decompressor of the backup to restore from.
+        self.decompressor = compression.get_codec_for_backup(self.location,
+                                                             metadata)
 
         if 'restore_location' not in kwargs:
             kwargs['restore_location'] = self.datadir
@@ -52,13 +77,8 @@ class BaseRunner(object):
             raise Exception("Encryption key not provided with an encrypted "
                             "backup.")
 
-        self.restore_command = ''
-        # Only decrypt if the object name ends with .enc
-        if self.location.endswith('.enc'):
-            self.restore_command = self.decrypt_cmd
-        self.restore_command = (self.restore_command +
-                                self.unzip_cmd +
-                                (self.restore_cmd % kwargs))
+        self.restore_command = self.build_restore_command(
+            self.location, self.decompressor, **kwargs)
         self.prepare_command = self.prepare_cmd % kwargs
 
     @property
@@ -73,17 +93,17 @@ class BaseRunner(object):
                            self.zip_manifest,
                            self.encrypt_manifest)
 
-    @property
-    def zip_cmd(self):
-        return ' | gzip'
-
     @property
     def unzip_cmd(self):
-        return 'gzip -d -c | '
+        return self.get_unzip_cmd(self.decompressor)
+
+    def get_unzip_cmd(self, codec):
+        cmd = codec.decompress_cmd
+        return f'{cmd} | ' if cmd else ''
 
     @property
     def zip_manifest(self):
-        return '.gz'
+        return self.compressor.extension
 
     @property
     def encrypt_cmd(self):
@@ -111,15 +131,74 @@ class BaseRunner(object):
 
     @property
     def encrypt_manifest(self):
+        if self.gcm_key:
+            return encryption.EXTENSION
         return '.enc' if self.encrypt_key else ''
 
+    def build_restore_command(self, location, codec, **kwargs):
+        """Build the restore command for the backup in the location."""
+        command = ''
+        # Only decrypt if the object name ends with .enc
+        if location.endswith('.enc'):
+            command = self.decrypt_cmd
+        return (command +
+                self.get_unzip_cmd(codec) +
+                (self.restore_cmd % kwargs))
+
     def _run(self):
         LOG.info("Running backup cmd: %s", self.command)
+        self._start_time = time.monotonic()
         self.process = subprocess.Popen(self.command, shell=True,
                                         stdout=subprocess.PIPE,
                                         stderr=subprocess.PIPE,
                                         preexec_fn=os.setsid)
         self.pid = self.process.pid
+        stream_utils.set_pipe_size(self.process.stdout, CONF.pipe_size)
+        self.output = self.process.stdout
+
+        compress_cmd = self.compressor.compress_cmd
+        if compress_cmd:
+            # Relaying the data to the compressor, instead of piping it in
+            # the shell, tells the size of the backup before compression.
+            LOG.info("Running compress cmd: %s", compress_cmd)
+            self.compress_process = subprocess.Popen(
+                compress_cmd, shell=True, stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                preexec_fn=os.setsid)
+            stream_utils.set_pipe_size(self.compress_process.stdout,
+                                       CONF.pipe_size)
+            self.output = self.compress_process.stdout
+            self._relay_thread = threading.Thread(target=self._relay)
+            self._relay_thread.start()
+
+        if self.gcm_key:
+            LOG.info("Encrypting the backup data with %s.",
+                     encryption.ALGORITHM)
+            self.encryptor = encryption.Encryptor(
+                self.output, self.gcm_key,
+                threads=CONF.encryption_threads)
+            self.output = self.encryptor
+
+    def _relay(self):
+        try:
+            self.raw_bytes = stream_utils.copy_stream(
+                self.process.stdout, self.compress_process.stdin,
+                CONF.stream_chunk_size)
+        except Exception as err:
+            self._relay_error = err
+        finally:
+            # Don't leave the backup process blocked on a full pipe if the
+            # compressor is gone.
+            for stream in (self.compress_process.stdin, self.process.stdout):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+
+    @property
+    def processes(self):
+        return [process for process in (self.process, self.compress_process)
+                if process]
 
     def __enter__(self):
         """Start up the process."""
@@ -130,23 +209,33 @@ class BaseRunner(object):
     def __exit__(self, exc_type, exc_value, traceback):
         """Clean up everything."""
         if getattr(self, 'process', None):
-            try:
-                # Send a sigterm to the session leader, so that all
-                # child processes are killed and cleaned up on terminate
-                os.killpg(self.process.pid, signal.SIGTERM)
-                self.process.terminate()
-            except OSError:
-                pass
+            for process in self.processes:
+                try:
+                    # Send a sigterm to the session leader, so that all
+                    # child processes are killed and cleaned up on terminate
+                    os.killpg(process.pid, signal.SIGTERM)
+                    process.terminate()
+                except OSError:
+                    pass
+
+            if self._relay_thread:
+                self._relay_thread.join()
+            if self.encryptor:
+                self.encryptor.close()
 
             if exc_type is not None:
                 return False
 
-            try:
-                err = self.process.stderr.read()
-                if err:
-                    raise Exception(err)
-            except OSError:
-                pass
+            for process in self.processes:
+                try:
+                    err = process.stderr.read()
+                    if err:
+                        raise Exception(err)
+                except OSError:
+                    pass
+
+            if self._relay_error:
+                raise self._relay_error
 
             if not self.check_process():
                 raise Exception()
@@ -155,8 +244,40 @@ class BaseRunner(object):
 
         return True
 
+    def _count(self, length):
+        self.bytes_read += length
+        if not length and self.backup_time is None:
+            self.backup_time = time.monotonic() - self._start_time
+        return length
+
     def read(self, chunk_size):
-        return self.process.stdout.read(chunk_size)
+        data = self.output.read(chunk_size)
+        self._count(len(data))
+        return data
+
+    def readinto(self, buffer):
+        """Fill the buffer with the backup data, until the end of stream."""
+        return self._count(self.output.readinto(buffer))
+
+    def readinto1(self, buffer):
+        """Read the backup data available into the buffer."""
+        # The green pipes of eventlet have no readinto1.
+        readinto = (getattr(self.output, 'readinto1', None) or
+                    self.output.readinto)
+        return self._count(readinto(buffer))
+
+    def get_stats(self):
+        """Statistics of the backup data read so far."""
+        raw_bytes = (self.raw_bytes if self.compress_process
+                     else self.bytes_read)
+        return {
+            'bytes_read': raw_bytes,
+            'bytes_compressed': self.bytes_read,
+            'compression': self.compressor.name,
+            'compression_ratio': (round(raw_bytes / self.bytes_read, 3)
+                                  if self.bytes_read else None),
+            'backup_time': self.backup_time,
+        }
 
     def get_metadata(self):
         """Hook for subclasses to get metadata from the backup."""
@@ -186,17 +307,33 @@ class BaseRunner(object):
         """Hook that is called after the restore command."""
         pass
 
-    def unpack(self, location, checksum, command):
+    def load_backup(self, location, checksum):
+        """Load the backup data, decrypted if encrypted by the container."""
         stream = self.storage.load(location, checksum)
+        if location.endswith(encryption.EXTENSION):
+            if not self.gcm_key:
+                raise Exception("Encryption key not provided with an "
+                                "encrypted backup.")
+            stream = encryption.decrypt(stream, self.gcm_key,
+                                        threads=CONF.encryption_threads)
+        return stream
+
+    def unpack(self, location, checksum, command):
+        stream = self.load_backup(location, checksum)
 
         LOG.info('Running restore from stream, command: %s', command)
         self.process = subprocess.Popen(command, shell=True,
                                         stdin=subprocess.PIPE,
                                         stderr=subprocess.PIPE)
-        content_length = 0
-        for chunk in stream:
-            self.process.stdin.write(chunk)
-            content_length += len(chunk)
+        stream_utils.set_pipe_size(self.process.stdin, CONF.pipe_size)
+        if hasattr(stream, 'copy_to'):
+            # The storage could copy the data in the kernel.
+            content_length = stream.copy_to(self.process.stdin)
+        else:
+            content_length = 0
+            for chunk in stream:
+                self.process.stdin.write(chunk)
+                content_length += len(chunk)
         self.process.stdin.close()
 
         try:
@@ -11,19 +11,29 @@
 #    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
+import collections
+from concurrent import futures
 import os
 import re
 import shutil
+import time
 
 from oslo_concurrency import processutils
 from oslo_config import cfg
 from oslo_log import log as logging
 
 from backup.drivers import base
+from backup.utils import compression
 
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+# The incremental backups are extracted to a subfolder of the restore volume.
+INCREMENTAL_ROOT = '/var/lib/mysql'
+# The share of the free space of the restore volume used by the prefetched
+# incremental backups, unless restore-prefetch-disk-budget is set.
+PREFETCH_FREE_SPACE_RATIO = 0.5
+
 
 class MySQLBaseRunner(base.BaseRunner):
     def __init__(self, *args, **kwargs):
@@ -75,10 +85,12 @@ class MySQLBaseRunner(base.BaseRunner):
 
         return meta
 
-    def incremental_restore_cmd(self, incremental_dir):
+    def incremental_restore_cmd(self, incremental_dir, codec=None):
         """Return a command for a restore with a incremental location."""
         args = {'restore_location': incremental_dir}
-        return (self.decrypt_cmd + self.unzip_cmd + self.restore_cmd % args)
+        return (self.decrypt_cmd +
+                self.get_unzip_cmd(codec or self.decompressor) +
+                self.restore_cmd % args)
 
     def incremental_prepare_cmd(self, incremental_dir):
         if incremental_dir is not None:
@@ -99,8 +111,84 @@ class MySQLBaseRunner(base.BaseRunner):
         LOG.info("Running restore prepare command: %s.", prepare_cmd)
         processutils.execute(prepare_cmd, shell=True)
 
+    def get_restore_chain(self, location, checksum):
+        """Resolve the backup chain of an incremental backup.
+
+        Each backup only knows its parent, so the metadata of the whole chain
+        is loaded one backup after the other before anything is restored,
+        with one request per backup.
+
+        :returns a list of dict from the full backup to the given backup.
+        """
+        chain = []
+        while location:
+            metadata, size = self.storage.load_metadata_and_size(location,
+                                                                 checksum)
+            chain.insert(0, {
+                'location': location,
+                'checksum': checksum,
+                'metadata': metadata,
+                'size': size,
+            })
+            location = metadata.get('parent_location')
+            checksum = metadata.get('parent_checksum')
+
+        LOG.info("Restoring %s backups: %s", len(chain),
+                 [backup['location'] for backup in chain])
+        return chain
+
+    def _get_dir_size(self, path):
+        size = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    size += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return size
+
+    def _extract_backup(self, backup, full_backup):
+        """Download and extract one backup of the chain."""
+        started = time.time()
+        location = backup['location']
+        checksum = backup['checksum']
+        codec = compression.get_codec_for_backup(location, backup['metadata'])
+
+        if full_backup:
+            # The parent (full backup) use the same command from InnobackupEx
+            # super class and do not set an incremental_dir.
+            LOG.info("Restoring back to full backup.")
+            incremental_dir = None
+            command = self.build_restore_command(
+                location, codec, restore_location=self.restore_location)
+        else:
+            LOG.info("Restoring incremental backup %s.", location)
+            # just use the checksum for the incremental path as it is
+            # sufficiently unique /var/lib/mysql/<checksum>
+            incremental_dir = os.path.join(INCREMENTAL_ROOT, checksum)
+            os.makedirs(incremental_dir)
+            command = self.incremental_restore_cmd(incremental_dir, codec)
+
+        content_length = self.unpack(location, checksum, command)
+        disk_size = (self._get_dir_size(incremental_dir)
+                     if incremental_dir else 0)
+
+        return {
+            'location': location,
+            'incremental_dir': incremental_dir,
+            'content_length': content_length,
+            'disk_size': disk_size,
+            'extract_time': time.time() - started,
+        }
+
+    def get_prefetch_disk_budget(self):
+        if CONF.restore_prefetch_disk_budget:
+            return CONF.restore_prefetch_disk_budget
+        free = shutil.disk_usage(INCREMENTAL_ROOT).free
+        return int(free * PREFETCH_FREE_SPACE_RATIO)
+
     def incremental_restore(self, location, checksum):
-        """Recursively apply backups from all parents.
+        """Restore all the backups in the chain.
 
         If we are the parent then we restore to the restore_location and
         we apply the logs to the restore_location only.
@@ -109,35 +197,87 @@ class MySQLBaseRunner(base.BaseRunner):
         prevent stomping on the full restore data. Then we run apply log
         with the '--incremental-dir' flag
 
+        The prepare must run sequentially from the full backup, but the
+        download and extraction of the next backups (up to restore-prefetch
+        backups within the disk budget) are done in the background while the
+        current one is being prepared. The budget is only computed once the
+        full backup is extracted, which is never prefetched.
+
         :param location: The source backup location.
         :param checksum: Checksum of the source backup for validation.
         """
-        metadata = self.storage.load_metadata(location, checksum)
-        incremental_dir = None
-
-        if 'parent_location' in metadata:
-            LOG.info("Restoring parent: %(parent_location)s, "
-                     "checksum: %(parent_checksum)s.", metadata)
-
-            parent_location = metadata['parent_location']
-            parent_checksum = metadata['parent_checksum']
-            # Restore parents recursively so backup are applied sequentially
-            self.incremental_restore(parent_location, parent_checksum)
-            # for *this* backup set the incremental_dir
-            # just use the checksum for the incremental path as it is
-            # sufficiently unique /var/lib/mysql/<checksum>
-            incremental_dir = os.path.join('/var/lib/mysql', checksum)
-            os.makedirs(incremental_dir)
-            command = self.incremental_restore_cmd(incremental_dir)
-        else:
-            # The parent (full backup) use the same command from InnobackupEx
-            # super class and do not set an incremental_dir.
-            LOG.info("Restoring back to full backup.")
-            command = self.restore_command
+        chain = self.get_restore_chain(location, checksum)
+        prefetch = CONF.restore_prefetch
+        disk_budget = None
+        # The extraction jobs and their backups, in the chain order.
+        extractions = collections.deque()
+        submitted = 0
+        timings = []
+        current = {}
+
+        def _disk_usage():
+            """Disk space used by the incrementals not prepared yet.
+
+            The backups not extracted yet are counted with their stored,
+            compressed size.
+            """
+            usage = current.get('disk_size', 0)
+            for job, backup in extractions:
+                if job.done() and not job.exception():
+                    usage += job.result()['disk_size']
+                else:
+                    usage += backup['size'] or 0
+            return usage
+
+        def _prefetch(limit):
+            nonlocal submitted, disk_budget
+            while submitted < len(chain) and len(extractions) < limit:
+                backup = chain[submitted]
+                # The next backup to prepare is always extracted.
+                if current or extractions:
+                    if disk_budget is None:
+                        disk_budget = self.get_prefetch_disk_budget()
+                        LOG.debug("Prefetch disk budget: %s bytes.",
+                                  disk_budget)
+                    if _disk_usage() + (backup['size'] or 0) > disk_budget:
+                        LOG.debug("Disk budget reached, pause prefetching.")
+                        break
+
+                extractions.append((executor.submit(
+                    self._extract_backup, backup, submitted == 0), backup))
+                submitted += 1
+
+        # Only one backup is extracted at a time, the restore process and
+        # its log are not shared with another extraction.
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            try:
+                _prefetch(1)
+                while extractions:
+                    waited = time.time()
+                    current = extractions.popleft()[0].result()
+                    waited = time.time() - waited
+                    _prefetch(prefetch)
+
+                    started = time.time()
+                    self.restore_content_length += current['content_length']
+                    self.incremental_prepare(current['incremental_dir'])
+                    # Delete after restoring this part of backup
+                    if current['incremental_dir']:
+                        shutil.rmtree(current['incremental_dir'])
 
-        self.restore_content_length += self.unpack(location, checksum, command)
-        self.incremental_prepare(incremental_dir)
+                    current.update({
+                        'wait_time': waited,
+                        'prepare_time': time.time() - started,
+                    })
+                    timings.append(current)
+                    current = {}
+                    _prefetch(prefetch + 1)
+            finally:
+                for job, _ in extractions:
+                    job.cancel()
 
-        # Delete after restoring this part of backup
-        if incremental_dir:
-            shutil.rmtree(incremental_dir)
+        for result in timings:
+            LOG.info("Restored %(location)s, size: %(content_length)s, "
+                     "download and extract: %(extract_time).2fs, waited: "
+                     "%(wait_time).2fs, prepare: %(prepare_time).2fs.",
+                     result)
@@ -11,17 +11,26 @@
 #    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
+from concurrent import futures
 import os
 import re
 
+from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import timeutils
 
-from backup import utils
 from backup.drivers import base
+from backup.drivers import postgres_wal
+from backup.utils import compression
+from backup.utils import inotify
 from backup.utils import postgresql as psql_util
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+# Seconds to wait for the backup history file to be archived.
+BACKUP_FILE_TIMEOUT = 60
+
 
 class PgBasebackup(base.BaseRunner):
     def __init__(self, *args, **kwargs):
@@ -38,22 +47,33 @@ class PgBasebackup(base.BaseRunner):
         self.stop_wal_file = None
         self.checkpoint_location = None
         self.metadata = {}
+        self.watcher = None
+
+        # Point-in-time recovery from the WAL stream.
+        self.wal_stream_id = kwargs.pop('wal_stream_id', None)
+        self.restore_target_time = kwargs.pop('restore_target_time', None)
+        self.restore_target_lsn = kwargs.pop('restore_target_lsn', None)
+        self.restore_start_wal_file = (kwargs.get('metadata') or {}).get(
+            'start_wal_file')
 
         super(PgBasebackup, self).__init__(*args, **kwargs)
 
-        self.restore_command = (f"{self.decrypt_cmd}tar xzf - -C "
-                                f"{self.datadir}")
+        self.base_restore_cmd = f'tar xf - -C {self.datadir}'
+        self.wal_restore_cmd = f'tar -xf - -C {self.wal_archive_dir}'
+        self.restore_command = (f"{self.decrypt_cmd}{self.unzip_cmd}"
+                                f"{self.base_restore_cmd}")
 
     @property
     def cmd(self):
-        cmd = (f"pg_basebackup -U postgres -Ft -z --wal-method=fetch "
+        cmd = (f"pg_basebackup -U postgres -Ft --wal-method=fetch "
                f"--label={self.filename} --pgdata=-")
         return cmd + self.encrypt_cmd
 
     @property
     def manifest(self):
         """Target file name."""
-        return "%s.tar.gz%s" % (self.filename, self.encrypt_manifest)
+        return "%s.tar%s%s" % (self.filename, self.zip_manifest,
+                               self.encrypt_manifest)
 
     def get_wal_files(self, backup_pos=0):
         """Return the WAL files since the provided last backup.
@@ -85,6 +105,11 @@ class PgBasebackup(base.BaseRunner):
 
     def get_backup_metadata(self, metadata_file):
         """Parse the contents of the .backup file"""
+        with open(metadata_file, 'r') as file:
+            return self.parse_backup_metadata(file.read())
+
+    def parse_backup_metadata(self, metadata_contents):
+        """Parse a backup history file or a backup label."""
         metadata = {}
 
         start_re = re.compile(r"START WAL LOCATION: (.*) \(file (.*)\)")
@@ -92,9 +117,6 @@ class PgBasebackup(base.BaseRunner):
         checkpt_re = re.compile("CHECKPOINT LOCATION: (.*)")
         label_re = re.compile("LABEL: (.*)")
 
-        with open(metadata_file, 'r') as file:
-            metadata_contents = file.read()
-
         match = start_re.search(metadata_contents)
         if match:
             self.start_segment = match.group(1)
@@ -121,33 +143,49 @@ class PgBasebackup(base.BaseRunner):
 
         return metadata
 
+    def pre_backup(self):
+        # The archive is watched from before the backup starts, so that the
+        # backup history file is noticed whenever it's archived.
+        self.watcher = inotify.Watcher(self.wal_archive_dir)
+
+    def _is_backup_file(self, name):
+        if not (name and name.endswith('.backup')):
+            return False
+        path = os.path.join(self.wal_archive_dir, name)
+        if not os.path.exists(path):
+            return False
+        self.metadata = self.get_backup_metadata(path)
+        return self.metadata.get('label') == self.filename
+
     def get_metadata(self):
         """Get metadata.
 
         pg_basebackup may complete, and we arrive here before the
-        history file is written to the wal archive. So we need to
-        handle two possibilities:
-        - this is the first backup, and no history file exists yet
-        - this isn't the first backup, and so the history file we retrieve
-        isn't the one we just ran!
-         """
-        def _metadata_found():
-            backup_file = self.get_backup_file()
-            if not backup_file:
-                return False
-
-            self.metadata = self.get_backup_metadata(
-                os.path.join(self.wal_archive_dir, backup_file))
-            LOG.info("Metadata for backup: %s.", self.metadata)
-            return self.metadata['label'] == self.filename
+        history file is written to the wal archive. Wait for the history
+        file of this backup to be archived, the other backup history files
+        are ignored.
+        """
+        if self.metadata.get('label') == self.filename:
+            return self.metadata
 
+        LOG.debug("Waiting for the backup history file to be archived.")
         try:
-            LOG.debug("Polling for backup metadata... ")
-            utils.poll_until(_metadata_found, sleep_time=5, time_out=60)
-        except Exception as e:
+            backup_file = self.watcher.wait_for(self._is_backup_file,
+                                                BACKUP_FILE_TIMEOUT)
+        except inotify.Overflow:
+            backup_file = self.get_backup_file()
+            if not self._is_backup_file(backup_file):
+                backup_file = None
+        finally:
+            self.watcher.close()
+
+        if not backup_file:
             raise RuntimeError(f"Failed to get backup metadata for backup "
-                               f"{self.filename}: {str(e)}")
+                               f"{self.filename}: the backup history file "
+                               f"was not archived in "
+                               f"{BACKUP_FILE_TIMEOUT} seconds")
 
+        LOG.info("Metadata for backup: %s.", self.metadata)
         return self.metadata
 
     def check_process(self):
@@ -165,6 +203,60 @@ class PgBasebackup(base.BaseRunner):
             return False
         return True
 
+    def post_restore(self):
+        if self.restore_target_time or self.restore_target_lsn:
+            self.restore_wal_stream()
+
+    def restore_wal_stream(self):
+        """Fetch the WAL needed to recover to the target from the WAL stream.
+
+        Only the WAL batches from the start of the restored backup to the
+        recovery target are downloaded, several at a time.
+        """
+        if not self.wal_stream_id:
+            raise Exception('The WAL stream ID is required to recover to a '
+                            'point in time.')
+
+        target_time = None
+        if self.restore_target_time:
+            target_time = timeutils.parse_isotime(self.restore_target_time)
+
+        index = postgres_wal.WalIndex(self.storage, CONF.swift_container,
+                                      self.wal_stream_id)
+        index.load()
+        batches = index.select(
+            self.restore_start_wal_file,
+            target_time=target_time.timestamp() if target_time else None,
+            target_lsn=self.restore_target_lsn)
+        index.restore_history(self.wal_archive_dir)
+
+        LOG.info('Fetching %s WAL batches, %s at a time.', len(batches),
+                 CONF.wal_download_concurrency)
+        with futures.ThreadPoolExecutor(
+                max_workers=CONF.wal_download_concurrency) as executor:
+            jobs = [executor.submit(postgres_wal.restore_batch, self.storage,
+                                    batch, self.wal_archive_dir)
+                    for batch in batches]
+            size = sum(job.result() for job in jobs)
+        LOG.info('Fetched %s bytes of WAL batches.', size)
+
+        self.set_recovery_target(target_time)
+
+    def set_recovery_target(self, target_time=None):
+        """Stop the recovery at the target and promote the database."""
+        settings = {'recovery_target_action': 'promote'}
+        if target_time:
+            settings['recovery_target_time'] = target_time.isoformat()
+        else:
+            settings['recovery_target_lsn'] = self.restore_target_lsn
+
+        # postgresql.auto.conf is read after the other config files.
+        with open(os.path.join(self.datadir, 'postgresql.auto.conf'),
+                  'a') as f:
+            for key, value in sorted(settings.items()):
+                f.write(f"{key} = '{value}'\n")
+        LOG.info('Recovery target: %s', settings)
+
 
 class PgBasebackupIncremental(PgBasebackup):
     """Incremental backup/restore for PostgreSQL.
@@ -177,10 +269,13 @@ class PgBasebackupIncremental(PgBasebackup):
     def __init__(self, *args, **kwargs):
         self.parent_location = kwargs.pop('parent_location', '')
         self.parent_checksum = kwargs.pop('parent_checksum', '')
+        # The start WAL file from the parent backup metadata.
+        self.parent_start_wal_file = kwargs.pop('start_wal_file', None)
+        self.wal_segment_size = psql_util.DEFAULT_WAL_SEGMENT_SIZE
 
         super(PgBasebackupIncremental, self).__init__(*args, **kwargs)
 
-        self.incr_restore_cmd = f'tar -xzf - -C {self.wal_archive_dir}'
+        self.incr_restore_cmd = self.wal_restore_cmd
 
     def pre_backup(self):
         with psql_util.PostgresConnection('postgres') as conn:
@@ -189,33 +284,67 @@ class PgBasebackupIncremental(PgBasebackup):
             )[0][0]
             self.start_wal_file = conn.query(
                 f"SELECT pg_walfile_name('{self.start_segment}')")[0][0]
-            self.stop_segment = conn.query(
-                "SELECT * FROM pg_stop_backup(false, true)")[0][0]
+            self.stop_segment, label_file = conn.query(
+                "SELECT lsn, labelfile FROM pg_stop_backup(false, true)")[0]
+            self.stop_wal_file = conn.query(
+                f"SELECT pg_walfile_name('{self.stop_segment}')")[0][0]
+            self.wal_segment_size = int(conn.query(
+                "SELECT setting FROM pg_settings "
+                "WHERE name = 'wal_segment_size'")[0][0])
+
+        # The backup label has the same content as the backup history file
+        # but the stop location, no need to wait for the history file.
+        self.metadata = self.parse_backup_metadata(label_file)
+        self.metadata.update({
+            'stop-segment': self.stop_segment,
+            'stop-wal-file': self.stop_wal_file,
+        })
 
         # We have to hack this because self.command is
         # initialized in the base class before we get here, which is
         # when we will know exactly what WAL files we want to archive
         self.command = self._cmd()
 
+    def get_incremental_wal_files(self):
+        """Return the WAL files from the parent backup to this one.
+
+        The names are computed from the parent start WAL file and the stop
+        WAL file, the archive directory is only listed for the backups
+        which don't have the start WAL file in their metadata, or if the
+        timeline changed since.
+        """
+        first = self.parent_start_wal_file
+        if (first and first[:8] == self.stop_wal_file[:8] and
+                os.path.exists(os.path.join(self.wal_archive_dir, first))):
+            return [name for name in psql_util.get_wal_file_names(
+                first, self.stop_wal_file, self.wal_segment_size)
+                if os.path.exists(os.path.join(self.wal_archive_dir, name))]
+
+        LOG.info('Listing the WAL archive to find the WAL files since the '
+                 'parent backup.')
+        return self.get_wal_files(backup_pos=1)
+
     def _cmd(self):
-        wal_file_list = self.get_wal_files(backup_pos=1)
-        cmd = (f'tar -czf - -C {self.wal_archive_dir} '
+        wal_file_list = self.get_incremental_wal_files()
+        cmd = (f'tar -cf - -C {self.wal_archive_dir} '
                f'{" ".join(wal_file_list)}')
         return cmd + self.encrypt_cmd
 
     def get_metadata(self):
-        _meta = super(PgBasebackupIncremental, self).get_metadata()
+        _meta = dict(self.metadata)
         _meta.update({
             'parent_location': self.parent_location,
             'parent_checksum': self.parent_checksum,
         })
         return _meta
 
-    def incremental_restore_cmd(self, incr=False):
-        cmd = self.restore_command
+    def incremental_restore_cmd(self, incr=False, codec=None):
+        cmd = self.base_restore_cmd
         if incr:
             cmd = self.incr_restore_cmd
-        return self.decrypt_cmd + cmd
+        return (self.decrypt_cmd +
+                self.get_unzip_cmd(codec or self.decompressor) +
+                cmd)
 
     def incremental_restore(self, location, checksum):
         """Perform incremental restore.
@@ -224,6 +353,7 @@ class PgBasebackupIncremental(PgBasebackup):
         For the base backup, restore to datadir.
         """
         metadata = self.storage.load_metadata(location, checksum)
+        codec = compression.get_codec_for_backup(location, metadata)
         if 'parent_location' in metadata:
             LOG.info("Restoring parent: %(parent_location)s, "
                      "checksum: %(parent_checksum)s.", metadata)
@@ -234,11 +364,11 @@ class PgBasebackupIncremental(PgBasebackup):
             # Restore parents recursively so backup are applied sequentially
             self.incremental_restore(parent_location, parent_checksum)
 
-            command = self.incremental_restore_cmd(incr=True)
+            command = self.incremental_restore_cmd(incr=True, codec=codec)
         else:
             # For the parent base backup, revert to the default restore cmd
             LOG.info("Restoring back to full backup.")
-            command = self.incremental_restore_cmd(incr=False)
+            command = self.incremental_restore_cmd(incr=False, codec=codec)
 
         self.restore_content_length += self.unpack(location, checksum, command)
 
@@ -0,0 +1,315 @@
+# Copyright 2020 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""Continuous WAL archiving for PostgreSQL point-in-time recovery.
+
+The archiver watches the WAL archive directory the archive_command copies
+the WAL files to, and uploads the files in compressed batches as soon as a
+batch is full or its oldest file has waited long enough. Each batch is a tar
+of consecutive WAL files. The batches of a WAL stream are listed, in WAL
+order, in an index object saved next to them, so that a restore to a point
+in time fetches only the batches it needs.
+"""
+
+import bisect
+import json
+import os
+import subprocess
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from backup.drivers import base
+from backup.utils import compression
+from backup.utils import encryption
+from backup.utils import inotify
+from backup.utils import postgresql as psql_util
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+
+def is_wal_file(name):
+    return bool(psql_util.WAL_FILE_RE.match(name))
+
+
+def is_history_file(name):
+    return bool(psql_util.TIMELINE_HISTORY_RE.match(name))
+
+
+class WalIndex(object):
+    """The sorted index of the WAL batches of a WAL stream.
+
+    A batch is described by the first and last WAL file names, the number
+    of files, the location and checksum of the batch object, the codec and
+    the time the last file was archived. The timeline history files are
+    small, their content is kept in the index.
+    """
+
+    def __init__(self, storage, container, stream_id):
+        self.storage = storage
+        self.container = container
+        self.name = f'{stream_id}_wal_index.json'
+        self.batches = []
+        self.history = {}
+
+    def load(self):
+        data = self.storage.load_object(self.container, self.name)
+        if data:
+            index = json.loads(data)
+            self.batches = index['batches']
+            self.history = index['history']
+        LOG.info('Loaded the WAL index %s, %s batches.', self.name,
+                 len(self.batches))
+
+    def save(self):
+        data = json.dumps({'batches': self.batches, 'history': self.history})
+        self.storage.save_object(self.container, self.name, data.encode())
+
+    @property
+    def last(self):
+        """The name of the last WAL file shipped."""
+        return self.batches[-1]['last'] if self.batches else ''
+
+    def add(self, batch):
+        # The WAL files are shipped in order, so the batch usually goes to
+        # the end.
+        keys = [item['first'] for item in self.batches]
+        self.batches.insert(bisect.bisect_right(keys, batch['first']), batch)
+
+    def select(self, start_wal_file=None, target_time=None, target_lsn=None,
+               segment_size=psql_util.DEFAULT_WAL_SEGMENT_SIZE):
+        """Select the batches needed to recover to the target.
+
+        :param start_wal_file: The first WAL file needed, i.e. the start WAL
+                               file of the restored backup.
+        :param target_time: The recovery target time, as a timestamp.
+        :param target_lsn: The recovery target LSN.
+        :returns the batches in WAL order.
+        """
+        batches = self.batches
+        start = 0
+        if start_wal_file:
+            start_position = psql_util.get_wal_position(start_wal_file)
+            while (start < len(batches) and
+                   psql_util.get_wal_position(batches[start]['last']) <
+                   start_position):
+                start += 1
+
+        end = len(batches)
+        if target_lsn:
+            target_position = psql_util.get_wal_position(
+                psql_util.get_wal_file_name(
+                    1, psql_util.parse_lsn(target_lsn), segment_size))
+            positions = [psql_util.get_wal_position(batch['first'])
+                         for batch in batches]
+            end = bisect.bisect_right(positions, target_position)
+        elif target_time:
+            # The first batch archived after the target time holds the end
+            # of the WAL to replay, the batches are archived in WAL order.
+            end_times = [batch['end_time'] for batch in batches]
+            end = bisect.bisect_left(end_times, target_time, lo=start)
+            if end == len(batches):
+                LOG.warning('No WAL archived after the recovery target time '
+                            'yet, recovering to the end of the WAL stream.')
+            end = min(end + 1, len(batches))
+
+        return batches[start:end]
+
+    def restore_history(self, wal_archive_dir):
+        for name, content in self.history.items():
+            with open(os.path.join(wal_archive_dir, name), 'w') as f:
+                f.write(content)
+
+
+class PgWalBatch(base.BaseRunner):
+    """Archive a batch of WAL files."""
+
+    def __init__(self, *args, **kwargs):
+        self.wal_archive_dir = kwargs.pop('wal_archive_dir')
+        self.files = kwargs.pop('files')
+        self.datadir = self.wal_archive_dir
+        super(PgWalBatch, self).__init__(*args, **kwargs)
+
+    @property
+    def cmd(self):
+        return (f'tar -cf - -C {self.wal_archive_dir} '
+                f'{" ".join(self.files)}')
+
+    @property
+    def manifest(self):
+        """Target file name."""
+        return "%s.tar%s%s" % (self.filename, self.zip_manifest,
+                               self.encrypt_manifest)
+
+
+class WalArchiver(object):
+    """Ship the WAL files to the storage as they are archived.
+
+    The archive directory is only listed when the archiver starts (to catch
+    up with the files archived while it was not running) and if the kernel
+    event queue overflows, otherwise the archiver is woken up by inotify.
+
+    :param batch_size: Maximum number of WAL files per batch.
+    :param batch_timeout: Seconds a WAL file waits for the batch to fill up
+                          before the batch is uploaded anyway.
+    """
+
+    def __init__(self, storage, container, stream_id, wal_archive_dir,
+                 batch_size, batch_timeout):
+        self.storage = storage
+        self.container = container
+        self.stream_id = stream_id
+        self.wal_archive_dir = wal_archive_dir
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.index = WalIndex(storage, container, stream_id)
+        self.pending = set()
+        self.pending_since = None
+
+    def scan(self):
+        """Find the files archived but not shipped yet."""
+        last = self.index.last
+        return [name for name in os.listdir(self.wal_archive_dir)
+                if (is_wal_file(name) and name > last) or
+                (is_history_file(name) and name not in self.index.history)]
+
+    def add(self, names):
+        for name in names:
+            if is_history_file(name):
+                self.ship_history(name)
+            elif is_wal_file(name) and name > self.index.last:
+                if not self.pending:
+                    self.pending_since = time.monotonic()
+                self.pending.add(name)
+
+    def ship_history(self, name):
+        """Save a timeline history file in the index straight away."""
+        if name in self.index.history:
+            return
+        with open(os.path.join(self.wal_archive_dir, name)) as f:
+            self.index.history[name] = f.read()
+        self.index.save()
+        LOG.info('Saved the timeline history file %s.', name)
+
+    def ship_batch(self, names):
+        first, last = names[0], names[-1]
+        end_time = max(os.stat(os.path.join(self.wal_archive_dir, name))
+                       .st_mtime for name in names)
+
+        start_time = time.monotonic()
+        with PgWalBatch(filename=f'{self.stream_id}_wal_{first}_{last}',
+                        wal_archive_dir=self.wal_archive_dir,
+                        files=names) as runner:
+            checksum, location = self.storage.save(
+                runner, metadata={'compression': runner.compressor.name},
+                container=self.container)
+            stats = runner.get_stats()
+
+        self.index.add({
+            'first': first,
+            'last': last,
+            'files': len(names),
+            'location': location,
+            'checksum': checksum,
+            'compression': runner.compressor.name,
+            'end_time': end_time,
+        })
+        self.index.save()
+        LOG.info('Shipped %s WAL files from %s to %s in %.3fs, %s bytes '
+                 'compressed to %s.', len(names), first, last,
+                 time.monotonic() - start_time, stats['bytes_read'],
+                 stats['bytes_compressed'])
+
+    def ship_pending(self, force=False):
+        while self.pending:
+            if (len(self.pending) < self.batch_size and not force and
+                    time.monotonic() - self.pending_since <
+                    self.batch_timeout):
+                return
+
+            names = sorted(self.pending)[:self.batch_size]
+            try:
+                self.ship_batch(names)
+            except Exception as err:
+                # Keep the files pending, they are retried after the batch
+                # timeout.
+                LOG.exception('Failed to ship the WAL files from %s to %s, '
+                              'error: %s', names[0], names[-1], err)
+                self.pending_since = time.monotonic()
+                return
+            self.pending.difference_update(names)
+            if not self.pending:
+                self.pending_since = None
+
+    def get_timeout(self):
+        if not self.pending:
+            return None
+        return max(self.pending_since + self.batch_timeout -
+                   time.monotonic(), 0)
+
+    def run(self):
+        self.index.load()
+        with inotify.Watcher(self.wal_archive_dir) as watcher:
+            # Start watching before listing the directory, so that no file
+            # is missed in between.
+            self.add(self.scan())
+            self.ship_pending(force=True)
+            LOG.info('Watching %s for the archived WAL files.',
+                     self.wal_archive_dir)
+
+            while True:
+                try:
+                    names = watcher.read(self.get_timeout())
+                except inotify.Overflow:
+                    LOG.warning('Missed some WAL archive events, listing %s.',
+                                self.wal_archive_dir)
+                    names = self.scan()
+                self.add(names)
+                self.ship_pending()
+
+
+def restore_batch(storage, batch, wal_archive_dir):
+    """Download and extract a WAL batch into the WAL archive directory.
+
+    :returns the size of the downloaded batch.
+    """
+    location = batch['location']
+    codec = compression.get_codec_for_backup(location, batch)
+    command = f'tar -xf - -C {wal_archive_dir}'
+    if codec.decompress_cmd:
+        command = f'{codec.decompress_cmd} | {command}'
+
+    stream = storage.load(location, batch['checksum'])
+    if location.endswith(encryption.EXTENSION):
+        stream = encryption.decrypt(stream, CONF.gcm_key,
+                                    threads=CONF.encryption_threads)
+    LOG.debug('Extracting the WAL files from %s to %s.', batch['first'],
+              batch['last'])
+    process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    if hasattr(stream, 'copy_to'):
+        content_length = stream.copy_to(process.stdin)
+    else:
+        content_length = 0
+        for chunk in stream:
+            process.stdin.write(chunk)
+            content_length += len(chunk)
+    process.stdin.close()
+
+    err = process.stderr.read()
+    if process.wait() != 0 or err:
+        raise Exception(f'Failed to extract the WAL batch {location}: '
+                        f'{err}')
+    return content_length
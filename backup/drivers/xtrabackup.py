@@ -50,7 +50,7 @@ class XtraBackup(mysql_base.MySQLBaseRunner):
         cmd = (f'xtrabackup --backup --stream=xbstream --parallel=2 '
                f'--datadir={self.datadir} {self.user_and_pass} '
                f'2>{self.backup_log}')
-        return cmd + self.zip_cmd + self.encrypt_cmd
+        return cmd + self.encrypt_cmd
 
     def check_restore_process(self):
         """Check whether xbstream restore is successful."""
@@ -112,7 +112,7 @@ class XtraBackupIncremental(XtraBackup):
                f'--incremental --incremental-lsn=%(lsn)s '
                f'--datadir={self.datadir} {self.user_and_pass} '
                f'2>{self.backup_log}')
-        return cmd + self.zip_cmd + self.encrypt_cmd
+        return cmd + self.encrypt_cmd
 
     def get_metadata(self):
         _meta = super(XtraBackupIncremental, self).get_metadata()
@@ -12,7 +12,9 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import json
 import os
+import time
 
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -31,7 +33,48 @@ cli_opts = [
     cfg.StrOpt(
         'storage-driver',
         default='swift',
-        choices=['swift']
+        choices=['swift', 'local', 'dedup']
+    ),
+    cfg.StrOpt(
+        'local-storage-dir',
+        default='/var/lib/trove-backups',
+        help='Directory to save the backups when the local storage driver '
+             'or the local dedup backend is used.'
+    ),
+    cfg.StrOpt(
+        'dedup-backend',
+        default='swift',
+        choices=['swift', 'local'],
+        help='Where the dedup storage driver saves the chunks and indexes.'
+    ),
+    cfg.IntOpt(
+        'dedup-chunk-size',
+        default=2 ** 20,
+        min=1024,
+        help='Average size (in bytes) of the chunks of the dedup storage '
+             'driver, the chunks are between a quarter and four times this '
+             'size.'
+    ),
+    cfg.IntOpt(
+        'dedup-concurrency',
+        default=8,
+        min=1,
+        help='Number of chunks uploaded or downloaded by the dedup storage '
+             'driver at the same time.'
+    ),
+    cfg.IntOpt(
+        'dedup-compression-level',
+        default=6,
+        min=0,
+        max=9,
+        help='zlib compression level of the chunks, 0 means the chunks are '
+             'not compressed.'
+    ),
+    cfg.StrOpt(
+        'dedup-cache-dir',
+        help='Directory to remember the chunks known to exist between '
+             'backups, so that they are not checked again. The directory '
+             'should be persistent across the backup containers.'
     ),
     cfg.StrOpt(
         'driver',
@@ -39,12 +82,62 @@ cli_opts = [
         choices=['innobackupex', 'mariabackup', 'pg_basebackup', 'xtrabackup']
     ),
     cfg.BoolOpt('backup'),
+    cfg.StrOpt(
+        'compression',
+        default='gzip',
+        choices=['none', 'gzip', 'pigz', 'zstd', 'lz4'],
+        help='Compression codec of the backup data. The codec of an '
+             'existing backup is detected automatically when restoring.'
+    ),
+    cfg.IntOpt(
+        'compression-threads',
+        default=0,
+        min=0,
+        help='Number of compression threads for the multi-threaded codecs '
+             '(pigz and zstd), 0 means one thread per CPU.'
+    ),
+    cfg.IntOpt(
+        'compression-level',
+        min=1,
+        help='Compression level, the codec default level is used if not '
+             'specified.'
+    ),
+    cfg.IntOpt(
+        'stream-chunk-size',
+        default=4 * (1024 ** 2),
+        min=2 ** 16,
+        help='Maximum size (in bytes) of the chunks the backup data is moved '
+             'in between the processes and the storage, the chunk size grows '
+             'up to this size when the data comes in faster.'
+    ),
+    cfg.IntOpt(
+        'pipe-size',
+        default=2 ** 20,
+        min=0,
+        help='Size (in bytes) of the kernel buffer of the pipes to the '
+             'backup and restore processes, 0 means the system default.'
+    ),
     cfg.StrOpt(
         'backup-encryption-key',
         help='This is only for backward compatibility. The backups '
              'created prior to Victoria may be encrypted. Trove guest '
              'agent is responsible for passing the key.'
     ),
+    cfg.StrOpt(
+        'gcm-key',
+        secret=True,
+        help='Key to encrypt the backup data with AES-256-GCM inside the '
+             'backup container, and to decrypt the backups encrypted this '
+             'way, the Base64 encoding of 32 random bytes. The backups are '
+             'not encrypted if not specified.'
+    ),
+    cfg.IntOpt(
+        'encryption-threads',
+        default=0,
+        min=0,
+        help='Number of threads encrypting or decrypting the backup data, 0 '
+             'means one thread per CPU.'
+    ),
     cfg.StrOpt('db-user'),
     cfg.StrOpt('db-password'),
     cfg.StrOpt('db-host'),
@@ -52,9 +145,73 @@ cli_opts = [
     cfg.StrOpt('os-token'),
     cfg.StrOpt('os-auth-url'),
     cfg.StrOpt('os-tenant-id'),
+    cfg.StrOpt(
+        'os-application-credential-id',
+        help='Authenticate with this Keystone application credential instead '
+             'of --os-token, e.g. for the WAL streaming which outlives the '
+             'user token.'
+    ),
+    cfg.StrOpt('os-application-credential-secret', secret=True),
     cfg.StrOpt('swift-container', default='database_backups'),
     cfg.DictOpt('swift-extra-metadata'),
+    cfg.IntOpt(
+        'swift-segment-size',
+        default=2 * (1024 ** 3),
+        min=1,
+        help='Maximum size (in bytes) of each segment of the backup uploaded '
+             'to Swift.'
+    ),
+    cfg.IntOpt(
+        'swift-upload-concurrency',
+        default=1,
+        min=1,
+        help='Number of backup segments uploaded to Swift at the same time. '
+             'Each concurrent upload holds a whole segment in memory, so the '
+             'memory usage is up to swift-upload-concurrency * '
+             'swift-segment-size.'
+    ),
+    cfg.IntOpt(
+        'swift-download-concurrency',
+        default=1,
+        min=1,
+        help='Number of ranged GET requests sent to Swift at the same time '
+             'when restoring. 1 means downloading the backup in a single '
+             'stream.'
+    ),
+    cfg.IntOpt(
+        'swift-download-part-size',
+        default=64 * (1024 ** 2),
+        min=1,
+        help='Size (in bytes) of each ranged GET request when the backup is '
+             'downloaded concurrently.'
+    ),
+    cfg.IntOpt(
+        'swift-download-window',
+        default=8,
+        min=1,
+        help='Maximum number of downloaded parts buffered ahead of the '
+             'restore process, the memory usage is up to '
+             'swift-download-window * swift-download-part-size.'
+    ),
     cfg.StrOpt('restore-from'),
+    cfg.IntOpt(
+        'restore-prefetch',
+        default=1,
+        min=0,
+        help='Number of incremental backups downloaded and extracted ahead '
+             'of the one being prepared when restoring an incremental '
+             'backup chain, 0 means restoring the backups one by one.'
+    ),
+    cfg.IntOpt(
+        'restore-prefetch-disk-budget',
+        default=0,
+        min=0,
+        help='Stop prefetching the incremental backups when the ones waiting '
+             'to be prepared would use more than this amount of disk space '
+             '(in bytes). The backups being extracted are counted with their '
+             'stored size. 0 means half of the free space left on the '
+             'restore volume once the full backup is extracted.'
+    ),
     cfg.StrOpt('restore-checksum'),
     cfg.BoolOpt('incremental'),
     cfg.StrOpt('parent-location'),
@@ -64,6 +221,49 @@ cli_opts = [
              'checksum or not. '
     ),
     cfg.StrOpt('pg-wal-archive-dir'),
+    cfg.BoolOpt(
+        'wal-stream',
+        default=False,
+        help='Ship the WAL files archived to --pg-wal-archive-dir to the '
+             'storage continuously, instead of running a backup or a '
+             'restore.'
+    ),
+    cfg.StrOpt(
+        'wal-stream-id',
+        help='Name of the WAL stream, e.g. the instance ID. The WAL batches '
+             'and the index of the stream are saved in --swift-container.'
+    ),
+    cfg.IntOpt(
+        'wal-batch-size',
+        default=16,
+        min=1,
+        help='Maximum number of WAL files uploaded in one batch.'
+    ),
+    cfg.IntOpt(
+        'wal-batch-timeout',
+        default=60,
+        min=0,
+        help='Upload the archived WAL files at most this number of seconds '
+             'after the first of them is archived, even if the batch is not '
+             'full.'
+    ),
+    cfg.IntOpt(
+        'wal-download-concurrency',
+        default=4,
+        min=1,
+        help='Number of WAL batches downloaded at the same time when '
+             'recovering to a point in time.'
+    ),
+    cfg.StrOpt(
+        'restore-target-time',
+        help='Recover to this time (ISO 8601) by replaying the WAL stream '
+             'after restoring the backup, requires --wal-stream-id.'
+    ),
+    cfg.StrOpt(
+        'restore-target-lsn',
+        help='Recover to this LSN by replaying the WAL stream after '
+             'restoring the backup, requires --wal-stream-id.'
+    ),
 ]
 
 driver_mapping = {
@@ -78,9 +278,28 @@ driver_mapping = {
 }
 storage_mapping = {
     'swift': 'backup.storage.swift.SwiftStorage',
+    'local': 'backup.storage.local.LocalStorage',
+    'dedup': 'backup.storage.dedup.DedupStorage',
 }
 
 
+def get_backup_stats(runner, storage, start_time):
+    """Get the statistics of the backup reported to the guest agent.
+
+    The sizes are in bytes and the times in seconds.
+    """
+    stats = runner.get_stats()
+    stats.update(storage.get_stats())
+    stats['total_time'] = time.monotonic() - start_time
+    if stats.get('upload_time'):
+        stats['upload_throughput'] = int(stats.get('bytes_uploaded', 0) /
+                                         stats['upload_time'])
+    for key, value in stats.items():
+        if key.endswith('_time') and value is not None:
+            stats[key] = round(value, 3)
+    return stats
+
+
 def stream_backup_to_storage(runner_cls, storage):
     parent_metadata = {}
     extra_params = {}
@@ -106,14 +325,22 @@ def stream_backup_to_storage(runner_cls, storage):
     extra_params.update(parent_metadata)
 
     try:
+        start_time = time.monotonic()
         with runner_cls(filename=CONF.backup_id, **extra_params) as bkup:
+            metadata = dict(CONF.swift_extra_metadata or {})
+            # The restore relies on this to decompress the backup data.
+            metadata['compression'] = bkup.compressor.name
             checksum, location = storage.save(
                 bkup,
-                metadata=CONF.swift_extra_metadata,
+                metadata=metadata,
                 container=CONF.swift_container
             )
+            LOG.info('Backup statistics: %s',
+                     json.dumps(get_backup_stats(bkup, storage, start_time)))
+            # The guest agent looks for this in the last line of the output.
             LOG.info('Backup successfully, checksum: %s, location: %s',
                      checksum, location)
+            return checksum, location
     except Exception as err:
         LOG.exception('Failed to call stream_backup_to_storage, error: %s',
                       err)
@@ -124,6 +351,8 @@ def stream_restore_from_storage(runner_cls, storage):
         'storage': storage,
         'location': CONF.restore_from,
         'checksum': CONF.restore_checksum,
+        'metadata': storage.load_metadata(CONF.restore_from,
+                                          CONF.restore_checksum),
         'wal_archive_dir': CONF.pg_wal_archive_dir,
         'lsn': None
     }
@@ -131,25 +360,60 @@ def stream_restore_from_storage(runner_cls, storage):
     if storage.is_incremental_backup(CONF.restore_from):
         params['lsn'] = storage.get_backup_lsn(CONF.restore_from)
 
+    if CONF.restore_target_time or CONF.restore_target_lsn:
+        params.update({
+            'wal_stream_id': CONF.wal_stream_id,
+            'restore_target_time': CONF.restore_target_time,
+            'restore_target_lsn': CONF.restore_target_lsn,
+        })
+
     try:
         runner = runner_cls(**params)
         restore_size = runner.restore()
         LOG.info('Restore successfully, restore_size: %s', restore_size)
+        return restore_size
     except Exception as err:
         LOG.exception('Failed to call stream_restore_from_storage, error: %s',
                       err)
 
 
+def stream_wal_to_storage(storage):
+    if not CONF.wal_stream_id or not CONF.pg_wal_archive_dir:
+        LOG.error('--wal-stream-id and --pg-wal-archive-dir should be '
+                  'provided for WAL streaming')
+        exit(1)
+
+    postgres_wal = importutils.import_module('backup.drivers.postgres_wal')
+    archiver = postgres_wal.WalArchiver(
+        storage, CONF.swift_container, CONF.wal_stream_id,
+        CONF.pg_wal_archive_dir, CONF.wal_batch_size, CONF.wal_batch_timeout)
+    archiver.run()
+
+
 def main():
     CONF.register_cli_opts(cli_opts)
     logging.register_options(CONF)
     CONF(sys.argv[1:], project='trove-backup')
     logging.setup(CONF, 'trove-backup')
 
+    if CONF.gcm_key:
+        encryption = importutils.import_module('backup.utils.encryption')
+        try:
+            encryption.load_key(CONF.gcm_key)
+        except ValueError as e:
+            LOG.error(e)
+            exit(1)
+
     runner_cls = importutils.import_class(driver_mapping[CONF.driver])
     storage = importutils.import_class(storage_mapping[CONF.storage_driver])()
+    if not storage.compressed_stream:
+        CONF.set_override('compression', 'none')
 
-    if CONF.backup:
+    if CONF.wal_stream:
+        LOG.info('Starting WAL streaming to %s, stream %s',
+                 CONF.storage_driver, CONF.wal_stream_id)
+        stream_wal_to_storage(storage)
+    elif CONF.backup:
         if CONF.incremental:
             runner_cls = importutils.import_class(
                 driver_mapping['%s_inc' % CONF.driver])
@@ -18,6 +18,19 @@ import abc
 class Storage(object):
     """Base class for Storage driver implementation."""
 
+    # Whether the backup stream is compressed before it's handed over to the
+    # storage driver. Drivers compressing the data by themselves could turn
+    # it off.
+    compressed_stream = True
+
+    def get_stats(self):
+        """Statistics of the last saved backup.
+
+        Drivers could report e.g. bytes_uploaded, segments and the time spent
+        uploading and finalizing the backup.
+        """
+        return getattr(self, 'stats', {})
+
     @abc.abstractmethod
     def save(self, stream, metadata=None, **kwargs):
         """Persist information from the stream.
@@ -39,10 +52,33 @@ class Storage(object):
         """
         return {}
 
+    @abc.abstractmethod
+    def save_object(self, container, name, data):
+        """Save a small object in one request, e.g. an index."""
+
+    @abc.abstractmethod
+    def load_object(self, container, name):
+        """Load an object saved by save_object.
+
+        :returns the object content, None if the object doesn't exist.
+        """
+
     def is_incremental_backup(self, location):
         """Check if the location is an incremental backup."""
         return False
 
+    def get_backup_size(self, location):
+        """Get the size of the stored backup data, None if unknown."""
+        return None
+
+    def load_metadata_and_size(self, location, checksum):
+        """Load the metadata and the size of a backup.
+
+        The drivers getting both from the same request override this.
+        """
+        return (self.load_metadata(location, checksum),
+                self.get_backup_size(location))
+
     @abc.abstractmethod
     def get_backup_lsn(self, location):
         """Get the backup LSN."""
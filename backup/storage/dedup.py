@@ -0,0 +1,479 @@
+# Copyright 2020 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""Chunk-level deduplicating storage driver.
+
+The backup stream is split into content-defined chunks, each chunk is stored
+only once in the chunk store keyed by its SHA-256 hash. A backup is a compact
+index listing the hash and size of its chunks in order, the restore stream
+is reassembled from that index.
+
+Chunks are shared between backups, deleting a backup only deletes its index.
+"""
+
+import collections
+from concurrent import futures
+import hashlib
+import json
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+
+from oslo_config import cfg
+from oslo_log import log as logging
+import swiftclient
+
+from backup.storage import base
+from backup.storage import swift
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+INDEX_MAGIC = b'TROVE-DEDUP-INDEX-1\n'
+INDEX_RECORD = struct.Struct('!32sI')
+CHUNK_PREFIX = 'chunks'
+# The first byte of a chunk object tells how the chunk data is stored.
+CHUNK_RAW = b'r'
+CHUNK_ZLIB = b'z'
+
+
+class Chunker(object):
+    """Split a stream into content-defined chunks.
+
+    Every byte value is either a marker or not (half of the values are
+    markers, picked by a fixed seed), and a chunk ends after a run of
+    ``bits`` marker bytes. In random data this happens every ``2 ** bits``
+    bytes on average. A chunk boundary only depends on the bytes around it,
+    so the data inserted or removed between two backups only changes the
+    chunks nearby. The markers are found by bytes.translate and
+    bytearray.find, both implemented in C.
+    """
+
+    SEED = 20210415
+
+    def __init__(self, avg_size):
+        self.min_size = max(avg_size // 4, 1)
+        self.max_size = avg_size * 4
+        bits = max((avg_size - self.min_size).bit_length() - 1, 1)
+
+        markers = set(random.Random(self.SEED).sample(range(256), 128))
+        self.table = bytes(1 if value in markers else 0
+                           for value in range(256))
+        self.marker_run = b'\x01' * bits
+
+    def chunks(self, stream, read_size=2 ** 20):
+        """Read the stream and yield the chunks."""
+        buffer = bytearray()
+        # The buffer translated to 1 for markers and 0 for the other bytes.
+        markers = bytearray()
+        # Where to look for the marker run in the buffer
+        start = self.min_size
+        eof = False
+
+        while buffer or not eof:
+            end = min(len(buffer), self.max_size)
+            found = markers.find(self.marker_run, start, end)
+            if found >= 0:
+                cut = found + len(self.marker_run)
+            elif len(buffer) >= self.max_size or eof:
+                cut = end
+            else:
+                # A marker run may cross the end of the buffer
+                start = max(self.min_size, end - len(self.marker_run) + 1)
+                data = stream.read(read_size)
+                if data:
+                    buffer += data
+                    markers += data.translate(self.table)
+                else:
+                    eof = True
+                continue
+
+            yield bytes(buffer[:cut])
+            del buffer[:cut]
+            del markers[:cut]
+            start = self.min_size
+
+
+class SwiftBackend(object):
+    """Store the dedup objects in Swift."""
+
+    def __init__(self):
+        self.client = swift._get_service_client(
+            CONF.os_auth_url, CONF.os_token, CONF.os_tenant_id)
+        self._local = threading.local()
+
+    @property
+    def thread_client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = swiftclient.Connection(session=self.client.session)
+            self._local.client = client
+        return client
+
+    def get_location(self, container, name):
+        return "%s/%s/%s" % (self.client.url, container, name)
+
+    def ensure_container(self, container):
+        self.client.put_container(container)
+
+    def put_object(self, container, name, data, metadata=None, etag=None):
+        headers = {swift._set_attr(key): value
+                   for key, value in (metadata or {}).items()}
+        # Swift rejects the upload if the MD5 of the data doesn't match etag
+        return self.thread_client.put_object(container, name, data,
+                                             etag=etag, headers=headers)
+
+    def get_object(self, container, name):
+        _, data = self.thread_client.get_object(container, name)
+        return data
+
+    def object_exists(self, container, name):
+        return self.head_object(container, name) is not None
+
+    def head_object(self, container, name):
+        """Get the etag and the metadata, None if the object is missing."""
+        try:
+            headers = self.thread_client.head_object(container, name)
+        except swiftclient.exceptions.ClientException as e:
+            if e.http_status == 404:
+                return None
+            raise
+
+        metadata = {swift._get_attr(key): value
+                    for key, value in headers.items()
+                    if key.startswith('x-object-meta')}
+        return headers.get('etag', '').strip('"'), metadata
+
+
+class LocalBackend(object):
+    """Store the dedup objects in a local directory.
+
+    The containers are sub directories, the metadata of an object is saved
+    in a json file next to it.
+    """
+
+    def __init__(self):
+        self.root = CONF.local_storage_dir
+
+    def _path(self, container, name):
+        return os.path.join(self.root, container, name)
+
+    def get_location(self, container, name):
+        return self._path(container, name)
+
+    def ensure_container(self, container):
+        os.makedirs(os.path.join(self.root, container), exist_ok=True)
+
+    def put_object(self, container, name, data, metadata=None, etag=None):
+        path = self._path(container, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so that a partially written object
+        # is never seen as an existing chunk.
+        tmp_path = '%s.tmp.%s' % (path, threading.get_ident())
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.rename(tmp_path, path)
+
+        if metadata is not None:
+            with open(path + '.metadata.json', 'w') as f:
+                json.dump(metadata, f)
+
+        return hashlib.md5(data).hexdigest()
+
+    def get_object(self, container, name):
+        with open(self._path(container, name), 'rb') as f:
+            return f.read()
+
+    def object_exists(self, container, name):
+        return os.path.exists(self._path(container, name))
+
+    def head_object(self, container, name):
+        path = self._path(container, name)
+        if not os.path.exists(path):
+            return None
+
+        checksum = hashlib.md5()
+        with open(path, 'rb') as f:
+            for data in iter(lambda: f.read(2 ** 20), b''):
+                checksum.update(data)
+
+        metadata = {}
+        if os.path.exists(path + '.metadata.json'):
+            with open(path + '.metadata.json') as f:
+                metadata = json.load(f)
+        return checksum.hexdigest(), metadata
+
+
+backend_mapping = {
+    'swift': SwiftBackend,
+    'local': LocalBackend,
+}
+
+
+class ChunkCache(object):
+    """Hashes of the chunks known to exist in the chunk store.
+
+    The hashes are kept in memory for the current backup, and optionally in
+    a file under dedup-cache-dir so that the next backups don't need to
+    check the existence of the same chunks again. Chunks are never deleted
+    from the chunk store, so the cache does not go stale.
+    """
+
+    def __init__(self, container, cache_dir=None):
+        self.lock = threading.Lock()
+        self.known = set()
+        self.cache_file = None
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.cache_file = os.path.join(cache_dir, '%s.chunks' % container)
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file) as f:
+                    self.known.update(line.strip() for line in f)
+                LOG.info('Loaded %s chunk hashes from %s.', len(self.known),
+                         self.cache_file)
+
+        self.added = []
+
+    def __contains__(self, key):
+        return key in self.known
+
+    def add(self, key):
+        with self.lock:
+            if key not in self.known:
+                self.known.add(key)
+                self.added.append(key)
+
+    def save(self):
+        if self.cache_file and self.added:
+            with open(self.cache_file, 'a') as f:
+                f.writelines('%s\n' % key for key in self.added)
+            self.added = []
+
+
+class DedupStorage(base.Storage):
+    """Deduplicating storage driver."""
+
+    # Compressing the stream before chunking would defeat deduplication,
+    # the chunks are compressed one by one instead.
+    compressed_stream = False
+
+    def __init__(self):
+        self.backend = backend_mapping[CONF.dedup_backend]()
+
+    def _chunk_name(self, key):
+        return '%s/%s/%s' % (CHUNK_PREFIX, key[:2], key)
+
+    def _put_chunk(self, container, key, data, cache):
+        """Upload the chunk unless it's already in the chunk store.
+
+        :returns the number of bytes uploaded.
+        """
+        if key in cache:
+            return 0
+
+        name = self._chunk_name(key)
+        if self.backend.object_exists(container, name):
+            cache.add(key)
+            return 0
+
+        compressed = zlib.compress(data, CONF.dedup_compression_level)
+        if len(compressed) < len(data):
+            body = CHUNK_ZLIB + compressed
+        else:
+            body = CHUNK_RAW + data
+        expected = hashlib.md5(body).hexdigest()
+        checksum = self.backend.put_object(container, name, body,
+                                           etag=expected)
+        if checksum != expected:
+            raise Exception('Failed to upload chunk %s. ETAG: %s, MD5: %s' %
+                            (key, checksum, expected))
+        cache.add(key)
+        return len(body)
+
+    def save(self, stream, metadata=None, container='database_backups'):
+        """Persist the chunks and the index of the backup.
+
+        :returns the index object checksum and location.
+        """
+        filename = stream.manifest
+        location = self.backend.get_location(container, filename)
+        LOG.info('Saving %s in chunks, average chunk size: %s.', location,
+                 CONF.dedup_chunk_size)
+        self.backend.ensure_container(container)
+
+        start_time = time.monotonic()
+        cache = ChunkCache(container, CONF.dedup_cache_dir)
+        chunker = Chunker(CONF.dedup_chunk_size)
+        concurrency = CONF.dedup_concurrency
+        index = [INDEX_MAGIC]
+        uploads = collections.deque()
+        total_size = 0
+        uploaded_size = 0
+
+        with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                for data in chunker.chunks(stream):
+                    digest = hashlib.sha256(data).digest()
+                    index.append(INDEX_RECORD.pack(digest, len(data)))
+                    total_size += len(data)
+
+                    uploads.append(executor.submit(
+                        self._put_chunk, container, digest.hex(), data,
+                        cache))
+                    # Bound the number of chunks held in memory
+                    while len(uploads) >= concurrency * 2:
+                        uploaded_size += uploads.popleft().result()
+
+                while uploads:
+                    uploaded_size += uploads.popleft().result()
+            finally:
+                for job in uploads:
+                    job.cancel()
+
+        cache.save()
+        upload_time = time.monotonic() - start_time
+        num_chunks = len(index) - 1
+        LOG.info('Backup data size: %s, %s chunks, uploaded %s bytes.',
+                 total_size, num_chunks, uploaded_size)
+
+        if metadata is None:
+            metadata = {}
+        metadata.update(stream.get_metadata())
+        metadata.update({
+            'dedup_chunks': str(num_chunks),
+            'dedup_size': str(total_size),
+        })
+
+        index_data = b''.join(index)
+        checksum = self.backend.put_object(container, filename, index_data,
+                                           metadata=metadata)
+
+        # Validate the index by comparing checksums
+        expected = hashlib.md5(index_data).hexdigest()
+        if checksum != expected:
+            msg = ('Failed to upload backup index. ETAG: %(tag)s, MD5: '
+                   '%(checksum)s' % {'tag': checksum, 'checksum': expected})
+            raise Exception(msg)
+
+        self.stats = {
+            'segments': num_chunks,
+            'bytes_uploaded': uploaded_size + len(index_data),
+            'upload_time': upload_time,
+            'finalize_time': time.monotonic() - start_time - upload_time,
+        }
+        return checksum, location
+
+    def _explodeLocation(self, location):
+        container = location.split('/')[-2]
+        filename = location.split('/')[-1]
+        return container, filename
+
+    def _get_chunk(self, container, key, size):
+        body = self.backend.get_object(container, self._chunk_name(key))
+        if body[:1] == CHUNK_ZLIB:
+            data = zlib.decompress(body[1:])
+        else:
+            data = body[1:]
+
+        if len(data) != size or hashlib.sha256(data).hexdigest() != key:
+            raise Exception('Checksum validation failure of chunk %s' % key)
+        return data
+
+    def load(self, location, backup_checksum):
+        """Reassemble the backup stream from the index."""
+        container, filename = self._explodeLocation(location)
+        index_data = self.backend.get_object(container, filename)
+
+        if backup_checksum:
+            actual = hashlib.md5(index_data).hexdigest()
+            if actual != backup_checksum:
+                msg = ('Checksum validation failure, actual: %s, expected: '
+                       '%s' % (actual, backup_checksum))
+                raise Exception(msg)
+
+        if not index_data.startswith(INDEX_MAGIC):
+            raise Exception('Invalid backup index %s' % location)
+
+        records = [(digest.hex(), size) for digest, size in
+                   INDEX_RECORD.iter_unpack(index_data[len(INDEX_MAGIC):])]
+        concurrency = CONF.dedup_concurrency
+        LOG.info('Restoring %s from %s chunks.', location, len(records))
+
+        def _download():
+            pending = collections.deque()
+            remaining = iter(records)
+
+            with futures.ThreadPoolExecutor(
+                    max_workers=concurrency) as executor:
+                try:
+                    for key, size in remaining:
+                        pending.append(executor.submit(
+                            self._get_chunk, container, key, size))
+                        if len(pending) >= concurrency * 2:
+                            break
+
+                    while pending:
+                        data = pending.popleft().result()
+                        next_record = next(remaining, None)
+                        if next_record:
+                            pending.append(executor.submit(
+                                self._get_chunk, container, *next_record))
+                        yield data
+                finally:
+                    for job in pending:
+                        job.cancel()
+
+        return _download()
+
+    def load_metadata(self, parent_location, parent_checksum):
+        if not parent_location:
+            return {}
+
+        container, filename = self._explodeLocation(parent_location)
+        result = self.backend.head_object(container, filename)
+        if result is None:
+            raise Exception('Backup %s not found' % parent_location)
+
+        checksum, metadata = result
+        if parent_checksum and checksum != parent_checksum:
+            msg = ('Checksum validation failure, actual: %s, expected: %s' %
+                   (checksum, parent_checksum))
+            raise Exception(msg)
+        return metadata
+
+    def save_object(self, container, name, data):
+        self.backend.ensure_container(container)
+        self.backend.put_object(container, name, data)
+
+    def load_object(self, container, name):
+        if not self.backend.object_exists(container, name):
+            return None
+        return self.backend.get_object(container, name)
+
+    def is_incremental_backup(self, location):
+        return 'parent_location' in self.load_metadata(location, None)
+
+    def get_backup_lsn(self, location):
+        return self.load_metadata(location, None).get('lsn')
+
+    def get_backup_size(self, location):
+        return self.load_metadata_and_size(location, None)[1]
+
+    def load_metadata_and_size(self, location, checksum):
+        metadata = self.load_metadata(location, checksum)
+        size = metadata.get('dedup_size')
+        return metadata, int(size) if size else None
@@ -0,0 +1,268 @@
+# Copyright 2020 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""Local filesystem storage driver.
+
+The backups are saved in a local directory with the same segment and SLO
+layout as in Swift, the driver reuses the Swift storage driver on top of a
+connection implementing the part of the Swift API it needs. It's mainly for
+testing and for measuring the backup pipeline without a cloud.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from swiftclient import exceptions
+
+from backup.storage import swift
+from backup.utils import stream as stream_utils
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+METADATA_SUFFIX = '.metadata.json'
+
+
+class LocalConnection(object):
+    """Emulate a swiftclient connection on the local filesystem.
+
+    The containers are sub directories of the root directory. The headers of
+    an object (etag, object metadata, SLO flag) are saved in a json file next
+    to it. An SLO manifest is saved as the object content.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.url = root
+
+    def _path(self, container, obj):
+        return os.path.join(self.root, container, obj)
+
+    def _not_found(self, container, obj):
+        raise exceptions.ClientException(
+            'Object %s/%s not found' % (container, obj), http_status=404)
+
+    def _read_headers(self, container, obj):
+        path = self._path(container, obj)
+        if not os.path.exists(path):
+            self._not_found(container, obj)
+
+        with open(path + METADATA_SUFFIX) as f:
+            return json.load(f)
+
+    def _write(self, path, contents, chunk_size=2 ** 20):
+        """Write the contents to the path and return the md5 checksum."""
+        checksum = hashlib.md5()
+        tmp_path = '%s.tmp.%s' % (path, threading.get_ident())
+        with open(tmp_path, 'wb') as f:
+            if hasattr(contents, 'read'):
+                for chunk in iter(lambda: contents.read(chunk_size), b''):
+                    # StreamReader returns '' at the end of a segment
+                    if not chunk:
+                        break
+                    checksum.update(chunk)
+                    f.write(chunk)
+            else:
+                if isinstance(contents, str):
+                    contents = contents.encode()
+                checksum.update(contents)
+                f.write(contents)
+        os.rename(tmp_path, path)
+        return checksum.hexdigest()
+
+    def _get_segments(self, container, obj, headers):
+        """Get the (container, object, size) tuples of the segments."""
+        if not headers.get('x-static-large-object'):
+            return [(container, obj, int(headers['content-length']))]
+
+        with open(self._path(container, obj)) as f:
+            manifest = json.load(f)
+        return [tuple(segment['path'].split('/', 1)) +
+                (segment['size_bytes'],) for segment in manifest]
+
+    def put_container(self, container):
+        os.makedirs(os.path.join(self.root, container), exist_ok=True)
+
+    def put_object(self, container, obj, contents, content_length=None,
+                   etag=None, chunk_size=None, headers=None,
+                   query_string=None):
+        path = self._path(container, obj)
+        object_headers = {key.lower(): str(value)
+                          for key, value in (headers or {}).items()
+                          if key.lower().startswith('x-object-meta-')}
+
+        copy_from = (headers or {}).get('X-Copy-From')
+        if copy_from:
+            source_container, source = copy_from.split('/', 1)
+            source_headers = self._read_headers(source_container, source)
+            source_path = self._path(source_container, source)
+            if os.path.exists(path):
+                os.remove(path)
+            try:
+                os.link(source_path, path)
+            except OSError:
+                shutil.copyfile(source_path, path)
+            object_headers.update({
+                'etag': source_headers['etag'],
+                'content-length': source_headers['content-length'],
+            })
+        elif query_string == 'multipart-manifest=put':
+            manifest = json.loads(contents)
+            swift_checksum = hashlib.md5()
+            for segment in manifest:
+                swift_checksum.update(segment['etag'].encode())
+            self._write(path, contents)
+            object_headers.update({
+                'etag': '"%s"' % swift_checksum.hexdigest(),
+                'content-length': str(sum(segment['size_bytes']
+                                          for segment in manifest)),
+                'x-static-large-object': 'True',
+            })
+        else:
+            checksum = self._write(path, contents, chunk_size or 2 ** 20)
+            if etag and etag != checksum:
+                os.remove(path)
+                raise exceptions.ClientException(
+                    'Checksum mismatch of %s/%s' % (container, obj),
+                    http_status=422)
+            object_headers.update({
+                'etag': checksum,
+                'content-length': str(os.path.getsize(path)),
+            })
+
+        with open(path + METADATA_SUFFIX, 'w') as f:
+            json.dump(object_headers, f)
+
+        return object_headers['etag'].strip('"')
+
+    def head_object(self, container, obj, headers=None, query_string=None):
+        return self._read_headers(container, obj)
+
+    def get_object(self, container, obj, resp_chunk_size=None,
+                   query_string=None, response_dict=None, headers=None):
+        object_headers = self._read_headers(container, obj)
+
+        if query_string == 'multipart-manifest=get':
+            segments = self._get_segments(container, obj, object_headers)
+            manifest = [
+                {'name': '/%s/%s' % (segment_container, segment),
+                 'bytes': size,
+                 'hash': self._read_headers(segment_container,
+                                            segment)['etag']}
+                for segment_container, segment, size in segments]
+            return object_headers, json.dumps(manifest).encode()
+
+        start, end = 0, int(object_headers['content-length'])
+        byte_range = (headers or {}).get('Range')
+        if byte_range:
+            first, last = byte_range[len('bytes='):].split('-')
+            start, end = int(first), min(int(last) + 1, end)
+
+        contents = self._read_range(
+            self._get_segments(container, obj, object_headers), start, end,
+            resp_chunk_size or 2 ** 16)
+        if resp_chunk_size:
+            return object_headers, contents
+        return object_headers, b''.join(contents)
+
+    def _read_range(self, segments, start, end, chunk_size):
+        offset = 0
+        for segment_container, segment, size in segments:
+            if offset + size <= start or offset >= end:
+                offset += size
+                continue
+
+            with open(self._path(segment_container, segment), 'rb') as f:
+                f.seek(max(start - offset, 0))
+                remaining = min(end, offset + size) - max(start, offset)
+                while remaining > 0:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+            offset += size
+
+    def get_segment_paths(self, container, obj):
+        """Get the paths of the files the object is made of."""
+        headers = self._read_headers(container, obj)
+        return [self._path(segment_container, segment)
+                for segment_container, segment, _ in self._get_segments(
+                    container, obj, headers)]
+
+    def delete_object(self, container, obj, query_string=None):
+        path = self._path(container, obj)
+        if not os.path.exists(path):
+            self._not_found(container, obj)
+        os.remove(path)
+        os.remove(path + METADATA_SUFFIX)
+
+
+class LocalStorage(swift.SwiftStorage):
+    """Save the backups in a local directory."""
+
+    def __init__(self):
+        self.client = LocalConnection(CONF.local_storage_dir)
+        os.makedirs(CONF.local_storage_dir, exist_ok=True)
+
+    @property
+    def thread_client(self):
+        # The local connection is safe to share between the threads.
+        return self.client
+
+    def load(self, location, backup_checksum):
+        """Get the object from the location.
+
+        Unless downloading concurrently, the segment files are copied to the
+        restore process inside the kernel if possible, instead of being read
+        in chunks.
+        """
+        if CONF.swift_download_concurrency > 1:
+            # The segments are verified while downloading concurrently.
+            return super(LocalStorage, self).load(location, backup_checksum)
+
+        _, container, filename = self._explodeLocation(location)
+        headers = self.client.head_object(container, filename)
+        if backup_checksum:
+            self._verify_checksum(headers.get('etag', ''), backup_checksum)
+
+        return LocalObjectStream(
+            self.client.get_segment_paths(container, filename))
+
+
+class LocalObjectStream(object):
+    """The content of an object saved by the local storage driver."""
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def __iter__(self):
+        for path in self.paths:
+            with open(path, 'rb') as f:
+                for chunk in iter(
+                        lambda: f.read(CONF.stream_chunk_size), b''):
+                    yield chunk
+
+    def copy_to(self, fileobj):
+        """Copy the content to the file object.
+
+        :returns the number of bytes copied.
+        """
+        fileobj.flush()
+        return sum(stream_utils.copy_file_to_fd(path, fileobj.fileno())
+                   for path in self.paths)
@@ -12,8 +12,13 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import collections
+from concurrent import futures
 import hashlib
 import json
+import queue
+import threading
+import time
 
 from keystoneauth1 import session
 from keystoneauth1.identity import v3
@@ -22,17 +27,27 @@ from oslo_log import log as logging
 import swiftclient
 
 from backup.storage import base
+from backup.utils import stream as stream_utils
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
 
 def _get_user_keystone_session(auth_url, token, tenant_id):
-    auth = v3.Token(
-        auth_url=auth_url, token=token,
-        project_domain_name="Default",
-        project_id=tenant_id
-    )
+    if CONF.os_application_credential_id:
+        # The long running containers outlive the user token.
+        auth = v3.ApplicationCredential(
+            auth_url=auth_url,
+            application_credential_id=CONF.os_application_credential_id,
+            application_credential_secret=(
+                CONF.os_application_credential_secret)
+        )
+    else:
+        auth = v3.Token(
+            auth_url=auth_url, token=token,
+            project_domain_name="Default",
+            project_id=tenant_id
+        )
     return session.Session(auth=auth, verify=False)
 
 
@@ -67,7 +82,8 @@ class StreamReader(object):
         self.file_number = 0
         self.end_of_file = False
         self.end_of_segment = False
-        self.segment_checksum = hashlib.md5()
+        self.segment_checksum = None
+        self.pump = None
 
     @property
     def base_filename(self):
@@ -86,32 +102,242 @@ class StreamReader(object):
     def segment_path(self):
         return '%s/%s' % (self.container, self.segment)
 
-    def read(self, chunk_size=2 ** 16):
-        if self.end_of_segment:
-            self.segment_length = 0
-            self.segment_checksum = hashlib.md5()
-            self.end_of_segment = False
+    def _start_segment(self):
+        if self.segment_checksum is not None:
+            self.segment_checksum.close()
+        self.segment_length = 0
+        # The segment is hashed in a worker thread while the next chunk is
+        # being read.
+        self.segment_checksum = stream_utils.BackgroundHasher()
+        self.end_of_segment = False
 
-        # Upload to a new file if we are starting or too large
-        if self.segment_length > (self.max_file_size - chunk_size):
+    def read(self, chunk_size=2 ** 16):
+        if self.pump is None:
+            # The chunks are memoryviews of the reusable buffers of the pump,
+            # only valid until the next read.
+            self.pump = stream_utils.StreamPump(self.stream,
+                                                CONF.stream_chunk_size)
+            self._start_segment()
+        elif self.end_of_segment:
+            self._start_segment()
+
+        # Upload to a new file if the segment is full
+        if self.segment_length >= self.max_file_size:
             self.file_number += 1
             self.end_of_segment = True
             return ''
 
-        chunk = self.stream.read(chunk_size)
+        chunk = self.pump.read(
+            min(chunk_size, self.max_file_size - self.segment_length),
+            hasher=self.segment_checksum)
         if not chunk:
             self.end_of_file = True
             return ''
 
-        self.segment_checksum.update(chunk)
         self.segment_length += len(chunk)
         return chunk
 
+    def close(self):
+        if self.segment_checksum is not None:
+            self.segment_checksum.close()
+
+
+class SegmentBuffer(object):
+    """A reusable buffer holding one segment of the backup in memory.
+
+    The buffer is allocated once and refilled for every segment it carries,
+    it also provides the file-like interface swiftclient needs to upload
+    (and re-upload on retry) the segment.
+    """
+
+    def __init__(self, size):
+        self.data = bytearray(size)
+        self.view = memoryview(self.data)
+        self.length = 0
+        self.position = 0
+
+    @property
+    def capacity(self):
+        return len(self.data)
+
+    def fill(self, stream, chunk_size=2 ** 16):
+        """Fill the buffer from the stream until it's full or exhausted.
+
+        The data is read straight into the buffer if the stream supports
+        readinto.
+
+        :returns the number of bytes held by the buffer.
+        """
+        self.length = 0
+        self.position = 0
+
+        readinto = getattr(stream, 'readinto', None)
+        while readinto and self.length < self.capacity:
+            length = readinto(self.view[self.length:])
+            if not length:
+                return self.length
+            self.length += length
+
+        while self.length < self.capacity:
+            chunk = stream.read(min(chunk_size, self.capacity - self.length))
+            if not chunk:
+                break
+            end = self.length + len(chunk)
+            self.view[self.length:end] = chunk
+            self.length = end
+
+        return self.length
+
+    def checksum(self):
+        return hashlib.md5(self.view[:self.length]).hexdigest()
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            end = self.length
+        else:
+            end = min(self.position + size, self.length)
+        # The buffer is not refilled before the segment is uploaded, no need
+        # to copy the data.
+        chunk = self.view[self.position:end]
+        self.position = end
+        return chunk
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += self.length
+        self.position = max(0, min(offset, self.length))
+        return self.position
+
+    def tell(self):
+        return self.position
+
 
 class SwiftStorage(base.Storage):
     def __init__(self):
         self.client = _get_service_client(CONF.os_auth_url, CONF.os_token,
                                           CONF.os_tenant_id)
+        self._local = threading.local()
+
+    @property
+    def thread_client(self):
+        """Swift connection owned by the current thread.
+
+        swiftclient.Connection is not thread safe, the upload workers share
+        the keystone session but each of them keeps its own HTTP connection.
+        """
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = swiftclient.Connection(session=self.client.session)
+            self._local.client = client
+        return client
+
+    def _upload_segments(self, stream, container, filename, segment_size):
+        """Upload the segments one after another while streaming."""
+        # Wrap the output of the backup process to segment it for swift
+        stream_reader = StreamReader(stream, container, filename,
+                                     segment_size)
+        segment_results = []
+
+        try:
+            # Read from the stream and write to the container in swift
+            while not stream_reader.end_of_file:
+                LOG.debug('Uploading segment %s.', stream_reader.segment)
+                path = stream_reader.segment_path
+                etag = self.client.put_object(
+                    container, stream_reader.segment, stream_reader,
+                    chunk_size=CONF.stream_chunk_size)
+
+                segment_checksum = stream_reader.segment_checksum.hexdigest()
+                self._verify_segment(etag, segment_checksum)
+
+                segment_results.append({
+                    'path': path,
+                    'etag': etag,
+                    'size_bytes': stream_reader.segment_length
+                })
+        finally:
+            stream_reader.close()
+
+        return segment_results
+
+    def _verify_segment(self, etag, segment_checksum):
+        # Check each segment MD5 hash against swift etag
+        if etag != segment_checksum:
+            msg = ('Failed to upload data segment to swift. ETAG: %(tag)s '
+                   'Segment MD5: %(checksum)s.' %
+                   {'tag': etag, 'checksum': segment_checksum})
+            raise Exception(msg)
+
+    def _put_segment(self, container, segment, buffer):
+        segment_checksum = buffer.checksum()
+        LOG.debug('Uploading segment %s, size: %s.', segment, buffer.length)
+        etag = self.thread_client.put_object(container, segment, buffer,
+                                             content_length=buffer.length,
+                                             etag=segment_checksum)
+        self._verify_segment(etag, segment_checksum)
+        return etag
+
+    def _upload_segments_concurrently(self, stream, container, filename,
+                                      segment_size, concurrency):
+        """Upload several segments at the same time.
+
+        The backup stream is read into a fixed pool of reusable segment
+        buffers. A buffer is handed to an upload worker as soon as it's full
+        and returns to the pool once the segment is stored in swift, so the
+        memory usage is bounded to concurrency * segment_size.
+        """
+        stream_reader = StreamReader(stream, container, filename,
+                                     segment_size)
+        free_buffers = queue.Queue()
+        allocated = 0
+        uploads = []
+
+        def _release(buffer):
+            return lambda future: free_buffers.put(buffer)
+
+        def _check_failures():
+            for _, _, job in uploads:
+                if job.done() and job.exception():
+                    raise job.exception()
+
+        with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                while True:
+                    _check_failures()
+
+                    # Only allocate the buffers that are really needed, small
+                    # backups should not cost concurrency * segment_size.
+                    if free_buffers.empty() and allocated < concurrency:
+                        buffer = SegmentBuffer(segment_size)
+                        allocated += 1
+                    else:
+                        buffer = free_buffers.get()
+
+                    length = buffer.fill(stream)
+                    # The first segment is always uploaded, even if empty.
+                    if not length and uploads:
+                        break
+
+                    segment = stream_reader.segment
+                    job = executor.submit(self._put_segment, container,
+                                          segment, buffer)
+                    job.add_done_callback(_release(buffer))
+                    uploads.append((segment, length, job))
+                    stream_reader.file_number += 1
+
+                    if length < buffer.capacity:
+                        break
+            except Exception:
+                for _, _, job in uploads:
+                    job.cancel()
+                raise
+
+        return [{'path': '%s/%s' % (container, segment),
+                 'etag': job.result(),
+                 'size_bytes': size}
+                for segment, size, job in uploads]
 
     def save(self, stream, metadata=None, container='database_backups'):
         """Persist data from the stream to swift.
@@ -130,46 +356,30 @@ class SwiftStorage(base.Storage):
         LOG.debug('Ensuring container %s', container)
         self.client.put_container(container)
 
-        # Swift Checksum is the checksum of the concatenated segment checksums
-        swift_checksum = hashlib.md5()
-        # Wrap the output of the backup process to segment it for swift
-        stream_reader = StreamReader(stream, container, filename,
-                                     2 * (1024 ** 3))
-
         url = self.client.url
         # Full location where the backup manifest is stored
         location = "%s/%s/%s" % (url, container, filename)
         LOG.info('Uploading to %s', location)
 
-        # Information about each segment upload job
-        segment_results = []
-
-        # Read from the stream and write to the container in swift
-        while not stream_reader.end_of_file:
-            LOG.debug('Uploading segment %s.', stream_reader.segment)
-            path = stream_reader.segment_path
-            etag = self.client.put_object(container,
-                                          stream_reader.segment,
-                                          stream_reader)
-
-            segment_checksum = stream_reader.segment_checksum.hexdigest()
-
-            # Check each segment MD5 hash against swift etag
-            if etag != segment_checksum:
-                msg = ('Failed to upload data segment to swift. ETAG: %(tag)s '
-                       'Segment MD5: %(checksum)s.' %
-                       {'tag': etag, 'checksum': segment_checksum})
-                raise Exception(msg)
-
-            segment_results.append({
-                'path': path,
-                'etag': etag,
-                'size_bytes': stream_reader.segment_length
-            })
+        start_time = time.monotonic()
+        segment_size = CONF.swift_segment_size
+        concurrency = CONF.swift_upload_concurrency
+        if concurrency > 1:
+            LOG.info('Uploading segments of %s bytes, %s at a time.',
+                     segment_size, concurrency)
+            segment_results = self._upload_segments_concurrently(
+                stream, container, filename, segment_size, concurrency)
+        else:
+            segment_results = self._upload_segments(
+                stream, container, filename, segment_size)
 
-            swift_checksum.update(segment_checksum.encode())
+        # Swift Checksum is the checksum of the concatenated segment checksums
+        swift_checksum = hashlib.md5()
+        for segment_result in segment_results:
+            swift_checksum.update(segment_result['etag'].encode())
 
         # All segments uploaded.
+        upload_time = time.monotonic() - start_time
         num_segments = len(segment_results)
         LOG.debug('File uploaded in %s segments.', num_segments)
 
@@ -185,6 +395,8 @@ class SwiftStorage(base.Storage):
         for key, value in metadata.items():
             headers[_set_attr(key)] = value
 
+        first_segment = segment_results[0]['path'].split('/', 1)[1]
+
         LOG.info('Metadata headers: %s', headers)
         if large_object:
             manifest_data = json.dumps(segment_results)
@@ -196,13 +408,14 @@ class SwiftStorage(base.Storage):
             self.client.put_object(container,
                                    filename,
                                    manifest_data,
+                                   headers=headers,
                                    query_string='multipart-manifest=put')
 
             # Validation checksum is the Swift Checksum
             final_swift_checksum = swift_checksum.hexdigest()
         else:
             LOG.info('Moving segment %(segment)s to %(filename)s.',
-                     {'segment': stream_reader.first_segment,
+                     {'segment': first_segment,
                       'filename': filename})
             segment_result = segment_results[0]
             # Just rename it via a special put copy.
@@ -212,11 +425,9 @@ class SwiftStorage(base.Storage):
                                    headers=headers)
 
             # Delete the old segment file that was copied
-            LOG.info('Deleting the old segment file %s.',
-                     stream_reader.first_segment)
+            LOG.info('Deleting the old segment file %s.', first_segment)
             try:
-                self.client.delete_object(container,
-                                          stream_reader.first_segment)
+                self.client.delete_object(container, first_segment)
             except swiftclient.exceptions.ClientException as e:
                 if e.http_status != 404:
                     raise
@@ -236,6 +447,13 @@ class SwiftStorage(base.Storage):
                    {'tag': etag, 'checksum': final_swift_checksum})
             raise Exception(msg)
 
+        self.stats = {
+            'segments': num_segments,
+            'bytes_uploaded': sum(segment_result['size_bytes']
+                                  for segment_result in segment_results),
+            'upload_time': upload_time,
+            'finalize_time': time.monotonic() - start_time - upload_time,
+        }
         return (final_swift_checksum, location)
 
     def _explodeLocation(self, location):
@@ -255,31 +473,171 @@ class SwiftStorage(base.Storage):
         """Get object from the location."""
         storage_url, container, filename = self._explodeLocation(location)
 
-        headers, contents = self.client.get_object(container, filename,
-                                                   resp_chunk_size=2 ** 16)
+        if CONF.swift_download_concurrency > 1:
+            return self._load_concurrently(container, filename,
+                                           backup_checksum)
+
+        # The WAL batches of a stream are loaded from several threads.
+        headers, contents = self.thread_client.get_object(
+            container, filename, resp_chunk_size=CONF.stream_chunk_size)
 
         if backup_checksum:
             self._verify_checksum(headers.get('etag', ''), backup_checksum)
 
         return contents
 
-    def load_metadata(self, parent_location, parent_checksum):
-        """Load metadata from swift."""
-        if not parent_location:
-            return {}
+    def _get_segments(self, container, filename, headers):
+        """Get the segments the object is made of.
+
+        :returns a list of (container, object name, size, md5) tuples.
+        """
+        etag = headers.get('etag', '').strip('"')
+        if 'x-static-large-object' not in headers:
+            return [(container, filename, int(headers['content-length']),
+                     etag)]
+
+        _, manifest = self.thread_client.get_object(
+            container, filename, query_string='multipart-manifest=get')
+        segments = []
+        swift_checksum = hashlib.md5()
+        for segment in json.loads(manifest):
+            segment_container, name = segment['name'].lstrip('/').split(
+                '/', 1)
+            segments.append((segment_container, name, int(segment['bytes']),
+                             segment['hash']))
+            swift_checksum.update(segment['hash'].encode())
+
+        # The SLO etag is the checksum of the concatenated segment checksums
+        self._verify_checksum(etag, swift_checksum.hexdigest())
+        return segments
+
+    def _get_part(self, container, name, start, end):
+        byte_range = 'bytes=%d-%d' % (start, end - 1)
+        _, data = self.thread_client.get_object(
+            container, name, headers={'Range': byte_range})
+        if len(data) != end - start:
+            msg = ('Failed to download %(name)s, expected %(expected)s '
+                   'bytes, got %(actual)s.' %
+                   {'name': name, 'expected': end - start,
+                    'actual': len(data)})
+            raise Exception(msg)
+        return data
+
+    def _load_concurrently(self, container, filename, backup_checksum):
+        """Download the object using concurrent ranged GETs.
+
+        The segments of an SLO, or the object itself, are split into parts
+        of swift-download-part-size bytes. Up to swift-download-window parts
+        are downloaded ahead of the restore process and handed over in
+        order, so the memory usage is bounded to window * part size. Each
+        segment is verified against its checksum once all of its parts
+        arrive.
+        """
+        headers = self.thread_client.head_object(container, filename)
+        if backup_checksum:
+            self._verify_checksum(headers.get('etag', ''), backup_checksum)
 
-        _, container, filename = self._explodeLocation(parent_location)
+        segments = self._get_segments(container, filename, headers)
+        part_size = CONF.swift_download_part_size
+        concurrency = CONF.swift_download_concurrency
+        window = max(CONF.swift_download_window, concurrency)
+
+        parts = []
+        for index, (segment_container, name, size, _) in enumerate(
+                segments):
+            for start in range(0, size, part_size):
+                end = min(start + part_size, size)
+                parts.append((index, segment_container, name, start, end,
+                              end == size))
+
+        LOG.info('Downloading %s in %s parts from %s segments, %s parts at '
+                 'a time.', filename, len(parts), len(segments), concurrency)
+
+        def _download():
+            pending = collections.deque()
+            remaining = iter(parts)
+            segment_checksum = hashlib.md5()
+
+            with futures.ThreadPoolExecutor(
+                    max_workers=concurrency) as executor:
+                try:
+                    for part in remaining:
+                        pending.append((part, executor.submit(
+                            self._get_part, *part[1:5])))
+                        if len(pending) >= window:
+                            break
+
+                    while pending:
+                        part, job = pending.popleft()
+                        data = job.result()
+
+                        # Keep the read-ahead window full
+                        next_part = next(remaining, None)
+                        if next_part:
+                            pending.append((next_part, executor.submit(
+                                self._get_part, *next_part[1:5])))
+
+                        index, _, name, _, _, last_part = part
+                        segment_checksum.update(data)
+                        if last_part:
+                            expected = segments[index][3]
+                            if segment_checksum.hexdigest() != expected:
+                                msg = ('Checksum validation failure of '
+                                       'segment %s, actual: %s, expected: '
+                                       '%s' % (name,
+                                               segment_checksum.hexdigest(),
+                                               expected))
+                                raise Exception(msg)
+                            segment_checksum = hashlib.md5()
+
+                        yield data
+                finally:
+                    for _, job in pending:
+                        job.cancel()
+
+        return _download()
+
+    def _head_backup(self, location, checksum):
+        _, container, filename = self._explodeLocation(location)
         headers = self.client.head_object(container, filename)
 
-        if parent_checksum:
-            self._verify_checksum(headers.get('etag', ''), parent_checksum)
+        if checksum:
+            self._verify_checksum(headers.get('etag', ''), checksum)
 
         _meta = {}
         for key, value in headers.items():
             if key.startswith('x-object-meta'):
                 _meta[_get_attr(key)] = value
 
-        return _meta
+        return _meta, int(headers.get('content-length', 0))
+
+    def load_metadata(self, parent_location, parent_checksum):
+        """Load metadata from swift."""
+        if not parent_location:
+            return {}
+
+        return self._head_backup(parent_location, parent_checksum)[0]
+
+    def load_metadata_and_size(self, location, checksum):
+        return self._head_backup(location, checksum)
+
+    def get_backup_size(self, location):
+        _, container, filename = self._explodeLocation(location)
+        headers = self.client.head_object(container, filename)
+        return int(headers.get('content-length', 0))
+
+    def save_object(self, container, name, data):
+        self.client.put_container(container)
+        self.client.put_object(container, name, data)
+
+    def load_object(self, container, name):
+        try:
+            _, data = self.client.get_object(container, name)
+        except swiftclient.exceptions.ClientException as e:
+            if e.http_status == 404:
+                return None
+            raise
+        return data
 
     def is_incremental_backup(self, location):
         """Check if the location is an incremental backup."""
@@ -0,0 +1,171 @@
+# Copyright 2020 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""Compression codecs applied to the backup stream.
+
+The backup data is piped through the compress command of a codec, the codec
+name is saved in the backup metadata and its extension is appended to the
+backup file name, so that the restore could pick up the right decompress
+command.
+"""
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+# Backups created before the compression codec was configurable are always
+# gzipped and don't have the codec name in their metadata.
+DEFAULT_CODEC = 'gzip'
+
+
+class Codec(object):
+    """Base class for compression codecs."""
+
+    name = None
+    extension = ''
+
+    def __init__(self, threads=0, level=None):
+        """
+        :param threads: Number of compression threads, 0 means one thread
+                        for each CPU. Ignored by single-threaded codecs.
+        :param level: Compression level, the codec default is used if None.
+        """
+        self.threads = threads
+        self.level = level
+
+    @property
+    def compress_cmd(self):
+        """Command the backup stream is piped through."""
+        return ''
+
+    @property
+    def decompress_cmd(self):
+        """Command the restore stream is piped through."""
+        return ''
+
+    @property
+    def level_arg(self):
+        return f' -{self.level}' if self.level else ''
+
+
+class NoCompression(Codec):
+    name = 'none'
+
+
+class Gzip(Codec):
+    name = 'gzip'
+    extension = '.gz'
+
+    @property
+    def compress_cmd(self):
+        return 'gzip' + self.level_arg
+
+    @property
+    def decompress_cmd(self):
+        return 'gzip -d -c'
+
+
+class Pigz(Gzip):
+    """Parallel gzip.
+
+    The output is in the gzip format, so the backups created by pigz could be
+    restored by gzip as well.
+    """
+    name = 'pigz'
+
+    @property
+    def threads_arg(self):
+        # pigz uses all the CPUs by default
+        return f' -p {self.threads}' if self.threads else ''
+
+    @property
+    def compress_cmd(self):
+        return 'pigz' + self.threads_arg + self.level_arg
+
+    @property
+    def decompress_cmd(self):
+        # Decompression is not parallelized by pigz, but reading, writing
+        # and checksum calculation are done in separate threads.
+        return 'pigz -d -c'
+
+
+class Zstd(Codec):
+    name = 'zstd'
+    extension = '.zst'
+
+    @property
+    def level_arg(self):
+        if not self.level:
+            return ''
+        # Levels above 19 use a lot more memory and need to be unlocked.
+        ultra = ' --ultra' if self.level > 19 else ''
+        return f'{ultra} -{self.level}'
+
+    @property
+    def compress_cmd(self):
+        return f'zstd -q -c -T{self.threads}' + self.level_arg
+
+    @property
+    def decompress_cmd(self):
+        return 'zstd -q -d -c'
+
+
+class Lz4(Codec):
+    name = 'lz4'
+    extension = '.lz4'
+
+    @property
+    def compress_cmd(self):
+        return 'lz4 -q -c' + self.level_arg
+
+    @property
+    def decompress_cmd(self):
+        return 'lz4 -q -d -c'
+
+
+codec_mapping = {
+    NoCompression.name: NoCompression,
+    Gzip.name: Gzip,
+    Pigz.name: Pigz,
+    Zstd.name: Zstd,
+    Lz4.name: Lz4,
+}
+
+
+def get_codec(name, threads=0, level=None):
+    """Get the codec instance by name."""
+    if name not in codec_mapping:
+        raise Exception(f'Unsupported compression codec: {name}')
+    return codec_mapping[name](threads=threads, level=level)
+
+
+def get_codec_for_backup(location, metadata=None):
+    """Get the codec used by an existing backup.
+
+    The codec name saved in the backup metadata is preferred, then the codec
+    is guessed from the backup file name.
+    """
+    name = (metadata or {}).get('compression')
+    if not name:
+        filename = location.split('/')[-1]
+        for extension in ('.enc', '.gcm'):
+            if filename.endswith(extension):
+                filename = filename[:-len(extension)]
+        name = DEFAULT_CODEC
+        for codec_cls in (Zstd, Lz4):
+            if filename.endswith(codec_cls.extension):
+                name = codec_cls.name
+                break
+
+    LOG.debug('Compression codec of backup %s: %s', location, name)
+    return get_codec(name)
@@ -0,0 +1,241 @@
+# Copyright 2020 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""Streaming authenticated encryption of the backup data.
+
+The data is split into frames which are encrypted independently with
+AES-256-GCM, so that the frames are encrypted and decrypted by several
+threads at the same time. The encrypted stream is made of::
+
+    header: magic (8 bytes) + salt (16 bytes)
+    frames: length (4 bytes) + flags (1 byte) + ciphertext and tag
+
+The key supplied by the guest agent is made of 32 random bytes, encoded in
+Base64. The key of the backup is derived from it and the random salt with
+HKDF, which is not meant to stretch passphrases. The nonce of a frame is its
+index, the index, the flags and the header are authenticated with the frame,
+so that frames can't be reordered, replaced by frames of another backup, or
+removed from the end of the stream (the last frame is flagged).
+"""
+
+import base64
+import binascii
+import collections
+from concurrent import futures
+import os
+import struct
+
+from cryptography.hazmat.primitives.ciphers import aead
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf import hkdf
+
+# The extension of the backups encrypted by this module, the backups created
+# with openssl prior to Victoria end with .enc.
+EXTENSION = '.gcm'
+ALGORITHM = 'aes-256-gcm'
+
+MAGIC = b'TROVGCM1'
+KEY_SIZE = 32
+SALT_SIZE = 16
+TAG_SIZE = 16
+FRAME_SIZE = 2 ** 20
+LAST_FRAME = 0x01
+
+_FRAME_HEADER = struct.Struct('>IB')
+_FRAME_AAD = struct.Struct('>QB')
+
+
+class DecryptionError(Exception):
+    pass
+
+
+def load_key(key):
+    """Decode the key supplied by the guest agent.
+
+    :raises ValueError: if the key is not the Base64 encoding of KEY_SIZE
+                        bytes.
+    """
+    try:
+        data = base64.b64decode(key, validate=True)
+    except (binascii.Error, ValueError):
+        data = b''
+    if len(data) != KEY_SIZE:
+        raise ValueError(f'The backup encryption key should be the Base64 '
+                         f'encoding of {KEY_SIZE} random bytes, e.g. '
+                         f'generated with "openssl rand -base64 32".')
+    return data
+
+
+def derive_key(key, salt):
+    return hkdf.HKDF(algorithm=hashes.SHA256(), length=32, salt=salt,
+                     info=b'trove-backup').derive(load_key(key))
+
+
+def _nonce(index):
+    return b'\0\0\0\0' + struct.pack('>Q', index)
+
+
+def _get_threads(threads):
+    return threads or os.cpu_count() or 1
+
+
+class Encryptor(object):
+    """Encrypt the data read from the source, as a readable stream.
+
+    The frames are encrypted by a thread pool, up to two frames per thread
+    are read ahead of the consumer.
+
+    :param source: The stream to encrypt, it should provide read.
+    :param key: The key supplied by the guest agent.
+    :param threads: Number of threads, 0 means one per CPU.
+    """
+
+    def __init__(self, source, key, threads=0, frame_size=FRAME_SIZE):
+        self.source = source
+        self.frame_size = frame_size
+        salt = os.urandom(SALT_SIZE)
+        self.header = MAGIC + salt
+        self._aead = aead.AESGCM(derive_key(key, salt))
+
+        threads = _get_threads(threads)
+        self._executor = futures.ThreadPoolExecutor(max_workers=threads)
+        self._window = threads * 2
+        self._pending = collections.deque()
+        self._index = 0
+        self._eof = False
+        self._buffer = memoryview(self.header)
+
+    def _seal(self, index, data, flags):
+        frame_header = _FRAME_HEADER.pack(len(data) + TAG_SIZE, flags)
+        aad = self.header + _FRAME_AAD.pack(index, flags)
+        return frame_header + self._aead.encrypt(_nonce(index), data, aad)
+
+    def _fill(self):
+        while not self._eof and len(self._pending) < self._window:
+            data = self.source.read(self.frame_size)
+            # A frame shorter than the frame size is the last one, it may
+            # be empty.
+            flags = LAST_FRAME if len(data) < self.frame_size else 0
+            self._pending.append(self._executor.submit(
+                self._seal, self._index, data, flags))
+            self._index += 1
+            self._eof = bool(flags & LAST_FRAME)
+
+    def _next_buffer(self):
+        if not self._buffer:
+            self._fill()
+            if self._pending:
+                self._buffer = memoryview(self._pending.popleft().result())
+        return self._buffer
+
+    def read(self, size=-1):
+        buffer = self._next_buffer()
+        if size is None or size < 0:
+            size = len(buffer)
+        data = bytes(buffer[:size])
+        self._buffer = buffer[size:]
+        return data
+
+    def readinto(self, target):
+        buffer = self._next_buffer()
+        length = min(len(buffer), len(target))
+        target[:length] = buffer[:length]
+        self._buffer = buffer[length:]
+        return length
+
+    readinto1 = readinto
+
+    def close(self):
+        for job in self._pending:
+            job.cancel()
+        self._executor.shutdown(wait=False)
+
+
+class _ChunkReader(object):
+    """Read exact amounts of data from an iterable of chunks.
+
+    The data is sliced out of the chunks, it's only copied when it spans
+    several chunks.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = memoryview(b'')
+
+    def read(self, size):
+        parts = []
+        while size:
+            if not self._chunk:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._chunk = memoryview(chunk)
+            part = self._chunk[:size]
+            self._chunk = self._chunk[len(part):]
+            size -= len(part)
+            parts.append(part)
+        if len(parts) == 1:
+            return parts[0]
+        return b''.join(parts)
+
+
+def decrypt(chunks, key, threads=0):
+    """Decrypt the stream made of the chunks.
+
+    :returns a generator of the decrypted frames.
+    :raises DecryptionError: if the data is not authentic or truncated.
+    """
+    reader = _ChunkReader(chunks)
+    header = bytes(reader.read(len(MAGIC) + SALT_SIZE))
+    if len(header) != len(MAGIC) + SALT_SIZE or not header.startswith(MAGIC):
+        raise DecryptionError('Not an encrypted backup stream.')
+    cipher = aead.AESGCM(derive_key(key, header[len(MAGIC):]))
+
+    def _open(index, data, flags):
+        try:
+            return cipher.decrypt(_nonce(index), data,
+                                  header + _FRAME_AAD.pack(index, flags))
+        except Exception:
+            raise DecryptionError(f'Failed to authenticate frame {index} of '
+                                  f'the backup, wrong key or corrupted data.')
+
+    threads = _get_threads(threads)
+    with futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = collections.deque()
+        try:
+            index = 0
+            flags = 0
+            while not flags & LAST_FRAME:
+                frame_header = reader.read(_FRAME_HEADER.size)
+                if len(frame_header) != _FRAME_HEADER.size:
+                    raise DecryptionError('The encrypted backup is '
+                                          'truncated.')
+                length, flags = _FRAME_HEADER.unpack(frame_header)
+                data = reader.read(length)
+                if len(data) != length:
+                    raise DecryptionError('The encrypted backup is '
+                                          'truncated.')
+                pending.append(executor.submit(_open, index, data, flags))
+                index += 1
+
+                while len(pending) >= threads * 2:
+                    yield pending.popleft().result()
+
+            if reader.read(1):
+                raise DecryptionError('Unexpected data after the end of the '
+                                      'encrypted backup.')
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for job in pending:
+                job.cancel()
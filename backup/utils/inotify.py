@@ -0,0 +1,127 @@
+# Copyright 2020 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""Minimal inotify binding to watch the files written to a directory.
+
+The backup image has no inotify package, the calls are made to libc with
+ctypes.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_CLOEXEC = 0o2000000
+
+# struct inotify_event {int wd; uint32_t mask, cookie, len; char name[];}
+_EVENT = struct.Struct('iIII')
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    return _libc
+
+
+def _check(result):
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return result
+
+
+class Overflow(Exception):
+    """Events were lost, the directory has to be rescanned."""
+
+
+class Watcher(object):
+    """Report the names of the files written to a directory.
+
+    :param path: The directory to watch.
+    :param mask: The inotify events to report, by default the files closed
+                 after writing or moved into the directory, i.e. the files
+                 which are complete.
+    """
+
+    def __init__(self, path, mask=IN_CLOSE_WRITE | IN_MOVED_TO):
+        libc = _get_libc()
+        self.path = path
+        self.fd = _check(libc.inotify_init1(IN_CLOEXEC))
+        try:
+            _check(libc.inotify_add_watch(self.fd, os.fsencode(path), mask))
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def fileno(self):
+        return self.fd
+
+    def read(self, timeout=None):
+        """Wait for events.
+
+        :param timeout: Seconds to wait for the events, None means waiting
+                        until there is any.
+        :returns the file names, an empty list if timed out.
+        :raises Overflow: if the kernel queue overflowed.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        data = os.read(self.fd, 2 ** 16)
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            if mask & IN_Q_OVERFLOW:
+                raise Overflow()
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def wait_for(self, condition, timeout):
+        """Wait for a file name matching the condition.
+
+        :returns the file name, or None if timed out.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            for name in self.read(remaining):
+                if condition(name):
+                    return name
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
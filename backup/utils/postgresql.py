@@ -11,8 +11,18 @@
 #    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
+import re
+
 import psycopg2
 
+# WAL segment names are made of the timeline, the log and the segment number
+# in 8 hex digits each, e.g. 000000010000000000000006. The backup history
+# files (.backup) and partial segments (.partial) start with the same name.
+WAL_FILE_RE = re.compile('^[0-9A-F]{24}')
+WAL_SEGMENT_RE = re.compile('^[0-9A-F]{24}$')
+TIMELINE_HISTORY_RE = re.compile(r'^[0-9A-F]{8}\.history$')
+DEFAULT_WAL_SEGMENT_SIZE = 16 * (1024 ** 2)
+
 
 class PostgresConnection(object):
     def __init__(self, user, password='', host='localhost', port=5432):
@@ -51,3 +61,44 @@ class PostgresConnection(object):
         if identifiers:
             return statement.format(*identifiers)
         return statement
+
+
+def parse_lsn(lsn):
+    """Convert a LSN like 16/B374D848 to an integer."""
+    high, low = lsn.split('/')
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def get_wal_file_name(timeline, lsn, segment_size=DEFAULT_WAL_SEGMENT_SIZE):
+    """Get the name of the WAL segment containing the LSN."""
+    segments_per_log = 2 ** 32 // segment_size
+    segment = lsn // segment_size
+    return '%08X%08X%08X' % (timeline, segment // segments_per_log,
+                             segment % segments_per_log)
+
+
+def get_wal_position(name):
+    """Get the position of a WAL file in the WAL, regardless of timeline.
+
+    The positions compare in the same order as the LSN.
+    """
+    return name[8:24]
+
+
+def get_wal_file_names(first, last, segment_size=DEFAULT_WAL_SEGMENT_SIZE):
+    """List the WAL segment names from first to last, both included.
+
+    Both should be on the same timeline.
+    """
+    if first[:8] != last[:8]:
+        raise ValueError('WAL files %s and %s are on different timelines'
+                         % (first, last))
+    segments_per_log = 2 ** 32 // segment_size
+    timeline = int(first[:8], 16)
+
+    def _segment(name):
+        return int(name[8:16], 16) * segments_per_log + int(name[16:24], 16)
+
+    return ['%08X%08X%08X' % (timeline, segment // segments_per_log,
+                              segment % segments_per_log)
+            for segment in range(_segment(first), _segment(last) + 1)]
@@ -0,0 +1,234 @@
+# Copyright 2020 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""Helpers to move the backup data between the processes and the storage.
+
+The data is read into a small ring of preallocated buffers instead of
+allocating a new bytes object for each chunk, the consumers get memoryviews
+of the buffers. A buffer is only refilled after the consumer asked for the
+next chunk and the background hasher (if any) is done with it.
+"""
+
+import errno
+import fcntl
+import hashlib
+import os
+import queue
+import threading
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+MIN_CHUNK_SIZE = 2 ** 16
+# F_SETPIPE_SZ is only exposed by the fcntl module since python 3.10.
+F_SETPIPE_SZ = getattr(fcntl, 'F_SETPIPE_SZ', 1031)
+
+
+def set_pipe_size(fileobj, size):
+    """Enlarge the kernel buffer of a pipe, so fewer reads are needed.
+
+    This is best effort, the size is capped by /proc/sys/fs/pipe-max-size
+    for unprivileged processes.
+    """
+    if not size:
+        return
+    try:
+        fcntl.fcntl(fileobj.fileno(), F_SETPIPE_SZ, size)
+    except OSError as err:
+        LOG.debug('Failed to set the pipe size to %s: %s', size, err)
+
+
+class BackgroundHasher(object):
+    """Update a hash in a worker thread.
+
+    hashlib releases the GIL while hashing large buffers, so the reader
+    could refill the next buffer while the previous one is being hashed.
+    """
+
+    def __init__(self, name='md5'):
+        self._hash = hashlib.new(name)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            data, done = item
+            self._hash.update(data)
+            done.set()
+
+    def update(self, data, done):
+        """Hash the data, the done event is set afterwards."""
+        self._queue.put((data, done))
+
+    def hexdigest(self):
+        """Wait for the pending data to be hashed and return the digest."""
+        done = threading.Event()
+        self.update(b'', done)
+        done.wait()
+        return self._hash.hexdigest()
+
+    def close(self):
+        self._queue.put(None)
+
+
+class StreamPump(object):
+    """Read a stream into reusable buffers.
+
+    The chunk size adapts to the stream: it doubles (up to max_chunk_size)
+    when a read fills the whole chunk, and halves when a read returns less
+    than a quarter of it, so a fast producer is drained with few large
+    reads and a slow one doesn't hold up the consumer.
+
+    :param source: The object to read from, it should provide readinto1 or
+                   readinto, otherwise read is used.
+    :param max_chunk_size: Maximum size of the chunks.
+    :param buffers: Number of buffers in the ring.
+    """
+
+    def __init__(self, source, max_chunk_size, buffers=4):
+        self.source = source
+        self.max_chunk_size = max(max_chunk_size, MIN_CHUNK_SIZE)
+        self.chunk_size = MIN_CHUNK_SIZE
+        self._views = [memoryview(bytearray(self.max_chunk_size))
+                       for _ in range(buffers)]
+        self._released = [threading.Event() for _ in range(buffers)]
+        for event in self._released:
+            event.set()
+        self._next = 0
+        self._readinto = (getattr(source, 'readinto1', None) or
+                          getattr(source, 'readinto', None))
+
+    def _adapt(self, length):
+        if length == self.chunk_size:
+            self.chunk_size = min(self.chunk_size * 2, self.max_chunk_size)
+        elif length < self.chunk_size // 4:
+            self.chunk_size = max(self.chunk_size // 2, MIN_CHUNK_SIZE)
+
+    def read(self, size=None, hasher=None):
+        """Read the next chunk.
+
+        The returned memoryview is only valid until the next call.
+
+        :param size: Read at most this amount of data.
+        :param hasher: A BackgroundHasher to hash the chunk.
+        :returns a memoryview, empty at the end of the stream.
+        """
+        index = self._next
+        self._next = (index + 1) % len(self._views)
+        released = self._released[index]
+        released.wait()
+
+        size = self.chunk_size if size is None else min(size,
+                                                        self.chunk_size)
+        view = self._views[index][:size]
+        if self._readinto:
+            length = self._readinto(view) or 0
+        else:
+            data = self.source.read(size)
+            length = len(data)
+            view[:length] = data
+        self._adapt(length)
+
+        chunk = view[:length]
+        if hasher is not None and length:
+            released.clear()
+            hasher.update(chunk, released)
+        return chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self.read()
+            if not chunk:
+                break
+            yield chunk
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _copy_in_kernel(in_fd, out_fd, count):
+    if hasattr(os, 'splice'):
+        try:
+            return os.splice(in_fd, out_fd, count)
+        except OSError:
+            # Neither end is a pipe, try sendfile.
+            pass
+    return os.sendfile(out_fd, in_fd, None, count)
+
+
+def copy_file_to_fd(path, out_fd, chunk_size=2 ** 24):
+    """Copy a file into a file descriptor inside the kernel.
+
+    os.splice is used when the output is a pipe, otherwise os.sendfile. The
+    data is copied in user space if neither is supported.
+
+    :returns the number of bytes copied.
+    """
+    copied = 0
+    with open(path, 'rb', buffering=0) as f:
+        in_fd = f.fileno()
+        size = os.fstat(in_fd).st_size
+        try:
+            while copied < size:
+                sent = _copy_in_kernel(in_fd, out_fd,
+                                       min(chunk_size, size - copied))
+                if not sent:
+                    break
+                copied += sent
+        except OSError as err:
+            if copied:
+                raise
+            LOG.debug('Copying %s in user space: %s', path, err)
+            for data in iter(lambda: f.read(chunk_size), b''):
+                _write_all(out_fd, data)
+                copied += len(data)
+    return copied
+
+
+def copy_stream(source, destination, chunk_size):
+    """Copy a stream to another until the end of the source.
+
+    The data is copied inside the kernel with os.splice if available, e.g.
+    between two pipes.
+
+    :returns the number of bytes copied.
+    """
+    copied = 0
+    if hasattr(os, 'splice'):
+        in_fd, out_fd = source.fileno(), destination.fileno()
+        try:
+            while True:
+                length = os.splice(in_fd, out_fd, chunk_size)
+                if not length:
+                    return copied
+                copied += length
+        except OSError as err:
+            if copied or err.errno != errno.EINVAL:
+                raise
+            LOG.debug('Copying the stream in user space: %s', err)
+
+    buffer = memoryview(bytearray(chunk_size))
+    while True:
+        length = source.readinto(buffer)
+        if not length:
+            return copied
+        destination.write(buffer[:length])
+        copied += length
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Compare the size and cost of the legacy and compact RPC payloads.
+
+Usage: python tools/rpc_payload_benchmark.py [iterations]
+
+Prints the bytes and the microseconds per message (serialization and
+deserialization) of a heartbeat, a guest log listing and a configuration
+update.
+"""
+
+import sys
+import timeit
+
+from trove.common import cfg
+from trove.common.rpc import secure_serializer as ssz
+
+CONF = cfg.CONF
+
+KEY = 'xuUyAKn5mDANoM5sRxQsb6HGiugWVD'
+
+PAYLOADS = {
+    'heartbeat': {'service_status': 'healthy', 'keepalive': 60},
+    'guest logs': [{'name': 'log%d' % i, 'type': 'USER',
+                    'status': 'Disabled', 'published': 0, 'pending': 0,
+                    'container': None, 'prefix': None, 'metafile': None}
+                   for i in range(20)],
+    'configuration': {'overrides': {'param%d' % i: 'value %d' % i
+                                    for i in range(200)}},
+}
+
+
+def measure(serializer, entity, iterations):
+    data = serializer.serialize_entity(None, entity)
+
+    def run():
+        serializer.deserialize_entity(
+            None, serializer.serialize_entity(None, entity))
+
+    seconds = timeit.timeit(run, number=iterations)
+    return len(data), seconds / iterations * 10 ** 6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    CONF([], project='trove')
+    legacy = ssz.SecureSerializer(None, KEY)
+    compact = ssz.SecureSerializer(None, KEY, compact=True)
+
+    print('%-15s %12s %12s %12s %12s' % ('payload', 'legacy B',
+                                         'compact B', 'legacy us',
+                                         'compact us'))
+    for name, entity in PAYLOADS.items():
+        legacy_size, legacy_time = measure(legacy, entity, iterations)
+        compact_size, compact_time = measure(compact, entity, iterations)
+        print('%-15s %12d %12d %12.1f %12.1f' % (
+            name, legacy_size, compact_size, legacy_time, compact_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -14,9 +14,11 @@
 
 """Model classes that form the core of snapshots functionality."""
 
+import json
+
 from oslo_log import log as logging
 from requests.exceptions import ConnectionError
-from sqlalchemy import desc
+from sqlalchemy import func
 from swiftclient.client import ClientException
 
 from trove.backup.state import BackupState
@@ -29,6 +31,7 @@ from trove.common import utils
 from trove.common.i18n import _
 from trove.datastore import models as datastore_models
 from trove.metadata import models as metadata_models
+from trove.db import get_db_api
 from trove.db.models import DatabaseModelBase
 from trove.quota.quota import run_with_quotas
 from trove.taskmanager import api
@@ -219,22 +222,11 @@ class Backup(object):
     @classmethod
     def _paginate(cls, context, query):
         """Paginate the results of the base query.
-        We use limit/offset as the results need to be ordered by date
-        and not the primary key.
+        The most recently updated backups are listed first.
         """
-        marker = int(context.marker or 0)
         limit = int(context.limit or CONF.backups_page_size)
-        # order by 'updated DESC' to show the most recent backups first
-        query = query.order_by(desc(DBBackup.updated))
-        # Apply limit/offset
-        query = query.limit(limit)
-        query = query.offset(marker)
-        # check if we need to send a marker for the next page
-        if query.count() < limit:
-            marker = None
-        else:
-            marker += limit
-        return query.all(), marker
+        return get_db_api().paginate_by_updated(query, DBBackup, limit,
+                                                context.marker)
 
     @classmethod
     def list(cls, context, datastore=None, instance_id=None, project_id=None,
@@ -259,6 +251,21 @@ class Backup(object):
         query = query.filter(*filters)
         return cls._paginate(context, query)
 
+    @classmethod
+    def get_version(cls, context, project_id=None, all_projects=False):
+        """The number and the last update time of the backups.
+
+        They change whenever a backup is created, updated or deleted, in
+        the project or in all the projects.
+        """
+        query = DBBackup.query()
+        if project_id:
+            query = query.filter(DBBackup.tenant_id == project_id)
+        elif not all_projects:
+            query = query.filter(DBBackup.tenant_id == context.project_id)
+        return tuple(query.with_entities(func.count(DBBackup.id),
+                                         func.max(DBBackup.updated)).one())
+
     @classmethod
     def list_for_instance(cls, context, instance_id):
         """
@@ -417,7 +424,7 @@ class DBBackup(DatabaseModelBase):
                     'size', 'tenant_id', 'state', 'instance_id',
                     'checksum', 'backup_timestamp', 'deleted', 'created',
                     'updated', 'deleted_at', 'parent_id',
-                    'datastore_version_id']
+                    'datastore_version_id', 'stats']
     _table_name = 'backups'
 
     @property
@@ -462,6 +469,15 @@ class DBBackup(DatabaseModelBase):
             return datastore_models.DatastoreVersion.load_by_uuid(
                 self.datastore_version_id)
 
+    @property
+    def statistics(self):
+        """The statistics reported by the backup process, if any."""
+        if getattr(self, 'stats', None):
+            if isinstance(self.stats, str):
+                return json.loads(self.stats)
+            return self.stats
+        return None
+
     @property
     def metadata(self):
         return metadata_models.Metadata.list(
@@ -20,6 +20,7 @@ from trove.backup import views
 from trove.backup.models import Backup
 from trove.backup.models import BackupStrategy
 from trove.common import apischema
+from trove.common import conditional
 from trove.common import exception
 from trove.common import notification
 from trove.common import pagination
@@ -53,17 +54,23 @@ class BackupController(wsgi.Controller):
         else:
             policy.authorize_on_tenant(context, 'backup:index')
 
-        backups, marker = Backup.list(
-            context,
-            datastore=datastore,
-            instance_id=instance_id,
-            project_id=project_id,
-            all_projects=all_projects
-        )
-        view = views.BackupViews(backups)
-        paged = pagination.SimplePaginatedDataView(req.url, 'backups', view,
-                                                   marker)
-        return wsgi.Result(paged.data(), 200)
+        def _load():
+            backups, marker = Backup.list(
+                context,
+                datastore=datastore,
+                instance_id=instance_id,
+                project_id=project_id,
+                all_projects=all_projects
+            )
+            view = views.BackupViews(backups)
+            paged = pagination.SimplePaginatedDataView(req.url, 'backups',
+                                                       view, marker)
+            return paged.data()
+
+        return conditional.conditional_result(
+            req, lambda: Backup.get_version(context, project_id=project_id,
+                                            all_projects=all_projects),
+            _load, cached=True)
 
     def show(self, req, tenant_id, id):
         """Return a single backup."""
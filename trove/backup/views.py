@@ -43,6 +43,8 @@ class BackupView(object):
             }
         if self.backup.metadata:
             result['backup']['metadata'] = self.backup.metadata
+        if self.backup.statistics:
+            result['backup']['stats'] = self.backup.statistics
 
         return result
 
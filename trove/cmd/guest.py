@@ -19,6 +19,7 @@ from oslo_log import log as logging
 from oslo_service import service as openstack_service
 
 from trove.common import cfg
+from trove.common import crypto_utils
 from trove.common import debug_utils
 from trove.common.i18n import _
 from trove.guestagent import api as guest_api
@@ -60,6 +61,13 @@ def main():
                "was not injected into the guest or not read by guestagent"))
         raise RuntimeError(msg)
 
+    if CONF.backup_gcm_key and not crypto_utils.is_random_key(
+            CONF.backup_gcm_key):
+        msg = _("The backup_gcm_key parameter should be the Base64 encoding "
+                "of 32 random bytes, e.g. generated with "
+                "'openssl rand -base64 32'.")
+        raise RuntimeError(msg)
+
     # Create user and group for running docker container.
     LOG.info('Creating user and group for database service')
     uid = cfg.get_configuration_property('database_service_uid')
@@ -18,6 +18,7 @@ import sys
 
 from oslo_log import log as logging
 
+from trove.common import cache
 from trove.common import cfg
 from trove.common import exception
 from trove.common.i18n import _
@@ -77,6 +78,12 @@ class Commands(object):
         except exception.DatastoreNotFound as e:
             print(e)
 
+    def cache_invalidate(self):
+        """Invalidate the reference cache of the Trove services."""
+        self.db_api.configure_db(CONF)
+        cache.invalidate_reference_cache()
+        print("Reference cache invalidated.")
+
     def db_recreate(self, repo_path):
         """Drops the database and recreates it."""
         self.db_api.drop_db(CONF)
@@ -267,6 +274,12 @@ def main():
             help='The version number of the datastore version, e.g. 5.7.30. '
                  'If not specified, use <version_name> as default value.')
 
+        parser = subparser.add_parser(
+            'cache_invalidate', description='Invalidate the datastore, '
+            'datastore version, capability, configuration parameter and '
+            'flavor cache of the Trove services, e.g. after changing them '
+            'directly in the database.')
+
         parser = subparser.add_parser(
             'db_recreate', description='Drop the database and recreate it.')
         parser.add_argument('--repo_path', help=repo_path_help)
@@ -394,7 +394,13 @@ instance = {
                         "required": ["backupRef"],
                         "additionalProperties": True,
                         "properties": {
-                            "backupRef": uuid
+                            "backupRef": uuid,
+                            "restoreTime": non_empty_string,
+                            "restoreLsn": {
+                                "type": "string",
+                                "pattern": "^[0-9A-Fa-f]{1,8}/"
+                                           "[0-9A-Fa-f]{1,8}$"
+                            }
                         }
                     },
                     "replica_of": uuid,
@@ -0,0 +1,195 @@
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""In-process caches of the reference data.
+
+The datastores, datastore versions, capabilities, configuration parameter
+rules and flavors only change when the operator changes them, e.g. with
+trove-manage, but they are looked up on almost every request. They are kept
+in a process-wide cache with a TTL and a size bound.
+
+The cache is invalidated when the reference data is changed through Trove.
+The change bumps a version counter in the database, which the other
+processes (API workers, taskmanager, conductor) check every
+reference_cache_version_check_interval seconds.
+"""
+
+import collections
+import threading
+import time
+
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common import timeutils
+from trove.db import models as dbmodels
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+REFERENCE_VERSION_ID = 'reference'
+
+_reference_cache = None
+
+
+def persisted_models():
+    return {'cache_versions': DBCacheVersion}
+
+
+class DBCacheVersion(dbmodels.DatabaseModelBase):
+    """The version of a cache, incremented to invalidate it."""
+
+    _data_fields = ['version', 'updated']
+    _table_name = 'cache_versions'
+
+    @classmethod
+    def get_version(cls, cache_id):
+        db_version = cls.get_by(id=cache_id)
+        return db_version.version if db_version else 0
+
+    @classmethod
+    def increment(cls, cache_id):
+        updated = cls.query().filter_by(id=cache_id).update(
+            {'version': cls.version + 1, 'updated': timeutils.utcnow()},
+            synchronize_session=False)
+        if not updated:
+            cls(id=cache_id, version=1).save()
+
+
+class TTLCache(object):
+    """A thread safe LRU cache whose entries expire after a while.
+
+    :param maxsize: Maximum number of entries, the least recently used
+                    entries are evicted first.
+    :param ttl: Seconds an entry is kept, 0 disables the cache.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Cache the value, for less than the cache ttl if ttl is given."""
+        if not self.ttl:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, ttl=None):
+        """Get the value of the key, loading and caching it if missing.
+
+        The exceptions raised by the loader are not cached.
+        """
+        if not self.ttl or (ttl is not None and ttl <= 0):
+            return loader()
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self._data)}
+
+
+class ReferenceCache(TTLCache):
+    """The cache of the reference data, see the module docstring."""
+
+    def __init__(self):
+        super(ReferenceCache, self).__init__(None, None)
+        self._version = None
+        self._checked_at = None
+
+    @property
+    def maxsize(self):
+        return CONF.reference_cache_size
+
+    @property
+    def ttl(self):
+        return CONF.reference_cache_ttl
+
+    def _check_version(self):
+        now = time.monotonic()
+        if (self._checked_at is not None and now - self._checked_at <
+                CONF.reference_cache_version_check_interval):
+            return
+        self._checked_at = now
+        try:
+            version = DBCacheVersion.get_version(REFERENCE_VERSION_ID)
+        except Exception as e:
+            # Rely on the TTL if the version can't be read.
+            LOG.warning('Failed to get the reference cache version: %s', e)
+            return
+        if version != self._version:
+            if self._version is not None:
+                LOG.debug('Reference cache version changed from %s to %s, '
+                          'clearing the cache.', self._version, version)
+            self.clear()
+            self._version = version
+
+    def get(self, key, default=None):
+        self._check_version()
+        return super(ReferenceCache, self).get(key, default)
+
+
+def get_reference_cache():
+    global _reference_cache
+    if _reference_cache is None:
+        _reference_cache = ReferenceCache()
+    return _reference_cache
+
+
+def invalidate_reference_cache():
+    """Invalidate the reference cache of all the Trove processes."""
+    DBCacheVersion.increment(REFERENCE_VERSION_ID)
+    get_reference_cache().clear()
+    LOG.debug('Invalidated the reference cache.')
@@ -177,6 +177,17 @@ common_opts = [
                help='Page size for listing configurations.'),
     cfg.IntOpt('modules_page_size', default=20,
                help='Page size for listing modules.'),
+    cfg.IntOpt('reference_cache_ttl', default=60, min=0,
+               help='Time (in seconds) the datastores, datastore versions, '
+                    'capabilities, configuration parameter rules and flavors '
+                    'are cached in each Trove process, 0 disables the '
+                    'cache.'),
+    cfg.IntOpt('reference_cache_size', default=1000, min=1,
+               help='Maximum number of entries of the reference cache.'),
+    cfg.IntOpt('reference_cache_version_check_interval', default=10, min=0,
+               help='Time (in seconds) between the checks of the reference '
+                    'cache version, which is incremented when the reference '
+                    'data is changed, e.g. by trove-manage.'),
     cfg.IntOpt('agent_call_low_timeout', default=15,
                help="Maximum time (in seconds) to wait for Guest Agent "
                     "'quick' requests (such as retrieving a list of "
@@ -207,6 +218,18 @@ common_opts = [
     cfg.IntOpt('agent_heartbeat_expiry', default=90,
                help='Time (in seconds) after which a guest is considered '
                     'unreachable'),
+    cfg.IntOpt('database_probe_timeout', default=5,
+               help='Maximum time (in seconds) for the database to answer '
+                    'the status check query of the Guest Agent.'),
+    cfg.IntOpt('agent_keepalive_interval', default=60,
+               help='Maximum time (in seconds) between the heartbeats of '
+                    'the Guest Agent while the database status does not '
+                    'change, a status change is reported immediately. The '
+                    'interval starts at report_interval and doubles after '
+                    'each heartbeat, in whole report_interval ticks. It is '
+                    'kept at least report_interval below '
+                    'agent_heartbeat_expiry, raise both to reduce the '
+                    'heartbeats further.'),
     cfg.IntOpt('num_tries', default=3,
                help='Number of times to check if a volume exists.'),
     cfg.StrOpt('volume_fstype', default='ext3',
@@ -242,6 +265,11 @@ common_opts = [
                help='Message queue name the Taskmanager will listen to.'),
     cfg.StrOpt('conductor_queue', default='trove-conductor',
                help='Message queue name the Conductor will listen on.'),
+    cfg.FloatOpt('heartbeat_batch_interval', default=0,
+                 help='Seconds the Conductor buffers the heartbeats of the '
+                      'guest agents before saving them in bulk, only the '
+                      'newest heartbeat of an instance is saved. 0 saves '
+                      'every heartbeat as it is received.'),
     cfg.IntOpt('trove_conductor_workers',
                help='Number of workers for the Conductor service. The default '
                'will be the number of CPUs available.'),
@@ -281,6 +309,23 @@ common_opts = [
                 help="Permissions to grant to the 'root' user."),
     cfg.BoolOpt('root_grant_option', default=True,
                 help="Assign the 'root' user GRANT permissions."),
+    cfg.IntOpt('conditional_get_max_age', default=10, min=0,
+               help='The responses to GET requests of the instances and '
+                    'backups have an ETag derived from the database rows, '
+                    'and If-None-Match requests get a 304 response when '
+                    'the rows have not changed. The ETag changes at least '
+                    'every conditional_get_max_age seconds, so that the '
+                    'details loaded from the other services are at most '
+                    'that old. 0 disables the ETags.'),
+    cfg.IntOpt('response_cache_ttl', default=0, min=0,
+               help='Seconds the responses to the list requests of the '
+                    'instances and backups are cached for the project. The '
+                    'cached response is used as long as its ETag matches, '
+                    'i.e. until the rows are changed. 0 disables the cache, '
+                    'it requires the ETags.'),
+    cfg.IntOpt('response_cache_size', default=1000, min=1,
+               help='Maximum number of responses in the response cache of '
+                    'each API worker.'),
     cfg.IntOpt('http_get_rate', default=200,
                help="Maximum number of HTTP 'GET' requests (per minute)."),
     cfg.IntOpt('http_post_rate', default=200,
@@ -306,6 +351,15 @@ common_opts = [
                'be the number of CPUs available.'),
     cfg.IntOpt('usage_sleep_time', default=5,
                help='Time to sleep during the check for an active Guest.'),
+    cfg.FloatOpt('cluster_status_poll_interval', default=0, min=0,
+                 help='Seconds between the checks of the statuses of the '
+                      'cluster instances, while waiting for them to become '
+                      'ready, running or shut down. The statuses of all the '
+                      'instances are loaded with one query, a short interval '
+                      'notices the statuses reported by the guest agents '
+                      'early. 0 means the checks start every '
+                      'usage_sleep_time seconds and back off up to 30 '
+                      'seconds.'),
     cfg.StrOpt('region', default='LOCAL_DEV',
                help='The region this service is located.'),
     cfg.StrOpt('backup_runner',
@@ -371,6 +425,45 @@ common_opts = [
     cfg.IntOpt('backup_segment_max_size', default=2 * (1024 ** 3),
                help='Maximum size (in bytes) of each segment of the backup '
                'file.'),
+    cfg.IntOpt('backup_upload_concurrency', default=1, min=1,
+               help='Number of backup segments uploaded to the storage at '
+               'the same time. Each concurrent upload holds a whole segment '
+               'in memory inside the backup container, so the memory usage '
+               'is up to backup_upload_concurrency * '
+               'backup_segment_max_size.'),
+    cfg.StrOpt('backup_compression', default='gzip',
+               choices=['none', 'gzip', 'pigz', 'zstd', 'lz4'],
+               help='Compression codec of the backup data. pigz and zstd '
+               'compress the data using multiple threads. The codec is '
+               'saved in the backup metadata, the backups could always be '
+               'restored regardless of this option.'),
+    cfg.IntOpt('backup_compression_threads', default=0, min=0,
+               help='Number of threads used by the multi-threaded '
+               'compression codecs, 0 means one thread per CPU.'),
+    cfg.IntOpt('backup_compression_level', min=1,
+               help='Compression level of the backup data, the default '
+               'level of the codec is used if not specified.'),
+    cfg.IntOpt('backup_download_concurrency', default=1, min=1,
+               help='Number of ranged GET requests sent to the storage at '
+               'the same time when restoring a backup, 1 means downloading '
+               'the backup data in a single stream.'),
+    cfg.IntOpt('backup_download_part_size', default=64 * (1024 ** 2),
+               min=1,
+               help='Size (in bytes) of each ranged GET request when the '
+               'backup data is downloaded concurrently.'),
+    cfg.IntOpt('backup_download_window', default=8, min=1,
+               help='Maximum number of downloaded parts buffered ahead of '
+               'the restore process. The memory usage of the backup '
+               'container is up to backup_download_window * '
+               'backup_download_part_size.'),
+    cfg.StrOpt('backup_gcm_key', secret=True,
+               help='Key to encrypt the backup data with AES-256-GCM inside '
+               'the backup container, the Base64 encoding of 32 random '
+               'bytes, e.g. generated with "openssl rand -base64 32". The '
+               'backups are not encrypted if not specified. The key is '
+               'needed to restore the encrypted backups, it should not be '
+               'changed or lost. Not to be confused with '
+               'backup_aes_cbc_key.'),
     cfg.StrOpt('remote_dns_client',
                default='trove.common.clients.dns_client',
                help='Client to send DNS calls to.'),
@@ -395,6 +488,14 @@ common_opts = [
     cfg.StrOpt('remote_glance_client',
                default='trove.common.clients_admin.glance_client_trove_admin',
                help='Client to send Glance calls to.'),
+    cfg.IntOpt('client_cache_ttl', default=300, min=0,
+               help='Seconds the OpenStack service clients created with the '
+                    'token of a user are kept for the later requests with '
+                    'the same token, so that their HTTP connections are '
+                    'reused. 0 disables the cache.'),
+    cfg.IntOpt('client_cache_size', default=200, min=1,
+               help='Maximum number of the OpenStack service clients kept in '
+                    'the client cache of each Trove process.'),
     cfg.StrOpt('exists_notification_transformer',
                help='Transformer for exists notifications.'),
     cfg.IntOpt('exists_notification_interval', default=3600,
@@ -455,6 +556,21 @@ common_opts = [
                      'attached to the instance regardless of what NICs '
                      'are specified in the create API call. Currently only '
                      'one management network is allowed.'),
+    cfg.IntOpt('neutron_filter_chunk_size', default=50, min=1,
+               help='Maximum number of IDs filtered on in a single Neutron '
+                    'list request when the ports and floating IPs of many '
+                    'instances are loaded at once, e.g. when listing the '
+                    'instances.'),
+    cfg.IntOpt('nova_server_fetch_concurrency', default=10, min=1,
+               help='Maximum number of Nova servers fetched at the same time '
+                    'when the servers of a page of instances are loaded, '
+                    'e.g. when listing the instances.'),
+    cfg.IntOpt('instance_detail_load_timeout', default=20, min=0,
+               help='Maximum time (in seconds) to wait for each of the '
+                    'services (Nova, Neutron, Cinder, the guest agent) '
+                    'looked up concurrently when showing an instance. The '
+                    'instance is shown without the details of the services '
+                    'that time out. 0 means no timeout.'),
     cfg.ListOpt('management_security_groups', default=[],
                 help='List of the security group IDs that are applied on the '
                      'management port of the database instance.'),
@@ -504,8 +620,24 @@ common_opts = [
     cfg.StrOpt('inst_rpc_key_encr_key',
                default='emYjgHFqfXNB1NGehAFIUeoyw4V4XwWHEaKP',
                help='Key (OpenSSL aes_cbc) to encrypt instance keys in DB.'),
+    cfg.IntOpt('instance_key_cache_size', default=5000, min=1,
+               help='Maximum number of the RPC encryption keys of the '
+                    'instances kept in the key cache of each Trove process.'),
+    cfg.IntOpt('instance_key_cache_ttl', default=3600, min=0,
+               help='Time (in seconds) the RPC encryption key of an instance '
+                    'is kept in the key cache, 0 disables the cache.'),
     cfg.StrOpt('instance_rpc_encr_key',
                help='Key (OpenSSL aes_cbc) for instance RPC encryption.'),
+    cfg.BoolOpt('rpc_compact_payloads', default=False,
+                help='Send the RPC payloads to the guest agents and to the '
+                     'conductor in the compact format. The guest agents '
+                     'older than Xena can\'t decode them, only enable it '
+                     'once all the guest agents are upgraded. The payloads '
+                     'are only sent in the compact format when the '
+                     'upgrade_levels allow it.'),
+    cfg.IntOpt('rpc_compress_threshold', default=1024, min=0,
+               help='The compact RPC payloads larger than this number of '
+                    'bytes are compressed.'),
     cfg.StrOpt('database_service_uid', default='1001',
                help='The UID(GID) of database service user.'),
     cfg.ListOpt('reserved_network_cidrs', default=[],
@@ -1117,6 +1249,22 @@ postgresql_opts = [
                 help='The TCP port the server listens on.'),
     cfg.StrOpt('backup_strategy', default='pg_basebackup',
                help='Default strategy to perform backups.'),
+    cfg.BoolOpt('wal_stream', default=False,
+                help='Ship the WAL files to the backup storage as soon as '
+                     'they are archived, so that the instances restored '
+                     'from the backups can be recovered to a point in time. '
+                     'The WAL shipper runs in a container of the backup '
+                     'image and authenticates with a Keystone application '
+                     'credential created for the instance.'),
+    cfg.IntOpt('wal_stream_batch_size', default=16, min=1,
+               help='Maximum number of WAL files uploaded in one batch.'),
+    cfg.IntOpt('wal_stream_batch_timeout', default=60, min=0,
+               help='Upload the archived WAL files at most this number of '
+                    'seconds after the first of them is archived, even if '
+                    'the batch is not full.'),
+    cfg.IntOpt('wal_stream_download_concurrency', default=4, min=1,
+               help='Number of WAL batches downloaded at the same time when '
+                    'recovering to a point in time.'),
     cfg.StrOpt(
         'replication_strategy',
         default='PostgresqlReplicationStreaming',
@@ -13,7 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+
+from oslo_log import log as logging
 from oslo_utils.importutils import import_class
+from oslo_utils import timeutils
 
 from trove.common import cfg
 from trove.common import exception
@@ -29,6 +33,9 @@ from novaclient.client import Client
 from swiftclient.client import Connection
 
 CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+_client_cache = None
 
 
 def normalize_url(url):
@@ -73,6 +80,62 @@ def get_endpoint(service_catalog, service_type=None,
     return urls[0]
 
 
+def _hash(value):
+    if value is None:
+        return None
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def get_client_cache():
+    global _client_cache
+    if _client_cache is None:
+        from trove.common import cache
+        _client_cache = cache.TTLCache(CONF.client_cache_size,
+                                       CONF.client_cache_ttl)
+    return _client_cache
+
+
+def get_client_cache_stats():
+    """The usage of the client cache.
+
+    The hits are the requests which reused a client, and so its HTTP
+    connections, the misses are the clients created.
+    """
+    return get_client_cache().stats()
+
+
+def _get_token_ttl(context):
+    """Seconds until the token of the context expires, None if unknown."""
+    if not context.auth_token_expires_at:
+        return None
+    expires_at = timeutils.normalize_time(
+        timeutils.parse_isotime(context.auth_token_expires_at))
+    return (expires_at - timeutils.utcnow()).total_seconds()
+
+
+def _get_cached_client(service, context, region_name, create, *key):
+    """Get a client of the service created with the token of the context.
+
+    The clients are kept for client_cache_ttl seconds, but not after the
+    token expires, and shared by the requests with the same token, project
+    and region. A new token gets a new client.
+    """
+    region = region_name or CONF.service_credentials.region_name
+    key = (service, region, context.project_id, _hash(context.auth_token),
+           *key)
+
+    def _create():
+        client = create()
+        LOG.debug('Created a %(service)s client for project %(project)s in '
+                  'region %(region)s, client cache: %(stats)s',
+                  {'service': service, 'project': context.project_id,
+                   'region': region, 'stats': get_client_cache_stats()})
+        return client
+
+    return get_client_cache().get_or_load(key, _create,
+                                          _get_token_ttl(context))
+
+
 def dns_client(context):
     from trove.dns.manager import DnsManager
     return DnsManager()
@@ -88,6 +151,13 @@ def guest_client(context, id, manager=None):
 
 
 def nova_client(context, region_name=None, password=None):
+    return _get_cached_client(
+        'nova', context, region_name,
+        lambda: _create_nova_client(context, region_name, password),
+        _hash(password))
+
+
+def _create_nova_client(context, region_name, password):
     if CONF.nova_compute_url:
         url = '%(nova_url)s%(tenant)s' % {
             'nova_url': normalize_url(CONF.nova_compute_url),
@@ -128,6 +198,12 @@ def create_admin_nova_client(context):
 
 
 def cinder_client(context, region_name=None):
+    return _get_cached_client(
+        'cinder', context, region_name,
+        lambda: _create_cinder_client(context, region_name))
+
+
+def _create_cinder_client(context, region_name):
     if CONF.cinder_url:
         url = '%(cinder_url)s%(tenant)s' % {
             'cinder_url': normalize_url(CONF.cinder_url),
@@ -151,6 +227,8 @@ def cinder_client(context, region_name=None):
 
 
 def swift_client(context, region_name=None):
+    # A swift Connection is not cached, it holds a single HTTP connection
+    # which can't be used by several green threads at the same time.
     if CONF.swift_url:
         # swift_url has a different format so doesn't need to be normalized
         url = '%(swift_url)s%(tenant)s' % {'swift_url': CONF.swift_url,
@@ -171,6 +249,12 @@ def swift_client(context, region_name=None):
 
 
 def neutron_client(context, region_name=None):
+    return _get_cached_client(
+        'neutron', context, region_name,
+        lambda: _create_neutron_client(context, region_name))
+
+
+def _create_neutron_client(context, region_name):
     if CONF.neutron_url:
         # neutron endpoint url / publicURL does not include tenant segment
         url = CONF.neutron_url
@@ -188,6 +272,12 @@ def neutron_client(context, region_name=None):
 
 
 def glance_client(context, region_name=None):
+    return _get_cached_client(
+        'glance', context, region_name,
+        lambda: _create_glance_client(context, region_name))
+
+
+def _create_glance_client(context, region_name):
 
     # We should allow glance to get the endpoint from the service
     # catalog, but to do so we would need to be able to specify
@@ -28,9 +28,11 @@ from trove.common.clients import normalize_url
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 _SESSION = None
-ADMIN_NEUTRON_CLIENT = None
-ADMIN_NOVA_CLIENT = None
-ADMIN_CINDER_CLIENT = None
+# The admin clients share the keystone session and its connection pool, one
+# client is created per region.
+ADMIN_NEUTRON_CLIENTS = {}
+ADMIN_NOVA_CLIENTS = {}
+ADMIN_CINDER_CLIENTS = {}
 
 
 def get_keystone_session():
@@ -59,27 +61,27 @@ def nova_client_trove_admin(context, region_name=None, password=None):
     :return novaclient: novaclient with trove admin credentials
     :rtype: novaclient.client.Client
     """
-    global ADMIN_NOVA_CLIENT
-
-    if ADMIN_NOVA_CLIENT:
+    region_name = region_name or CONF.service_credentials.region_name
+    if region_name in ADMIN_NOVA_CLIENTS:
         LOG.debug('Re-use admin nova client')
-        return ADMIN_NOVA_CLIENT
+        return ADMIN_NOVA_CLIENTS[region_name]
 
     ks_session = get_keystone_session()
-    ADMIN_NOVA_CLIENT = NovaClient(
+    client = NovaClient(
         CONF.nova_client_version,
         session=ks_session,
         service_type=CONF.nova_compute_service_type,
-        region_name=region_name or CONF.service_credentials.region_name,
+        region_name=region_name,
         insecure=CONF.nova_api_insecure,
         endpoint_type=CONF.nova_compute_endpoint_type)
 
     if CONF.nova_compute_url and CONF.service_credentials.project_id:
-        ADMIN_NOVA_CLIENT.client.endpoint_override = "%s/%s/" % (
+        client.client.endpoint_override = "%s/%s/" % (
             normalize_url(CONF.nova_compute_url),
             CONF.service_credentials.project_id)
 
-    return ADMIN_NOVA_CLIENT
+    ADMIN_NOVA_CLIENTS[region_name] = client
+    return client
 
 
 def cinder_client_trove_admin(context, region_name=None):
@@ -89,30 +91,30 @@ def cinder_client_trove_admin(context, region_name=None):
     :type context: trove.common.context.TroveContext
     :return cinderclient: cinderclient with trove admin credentials
     """
-    global ADMIN_CINDER_CLIENT
-
-    if ADMIN_CINDER_CLIENT:
+    region_name = region_name or CONF.service_credentials.region_name
+    if region_name in ADMIN_CINDER_CLIENTS:
         LOG.debug('Re-use admin cinder client')
-        return ADMIN_CINDER_CLIENT
+        return ADMIN_CINDER_CLIENTS[region_name]
 
     version = CONF.cinder_service_type.split('v')[-1] or '3'
 
     ks_session = get_keystone_session()
-    ADMIN_CINDER_CLIENT = CinderClient.Client(
+    client = CinderClient.Client(
         version,
         session=ks_session,
         service_type=CONF.cinder_service_type,
-        region_name=region_name or CONF.service_credentials.region_name,
+        region_name=region_name,
         insecure=CONF.cinder_api_insecure,
         endpoint_type=CONF.cinder_endpoint_type,
         additional_headers={'OpenStack-API-Version': 'volumev3 latest'})
 
     if CONF.cinder_url and CONF.service_credentials.project_id:
-        ADMIN_CINDER_CLIENT.client.management_url = "%s/%s/" % (
+        client.client.management_url = "%s/%s/" % (
             normalize_url(CONF.cinder_url),
             CONF.service_credentials.project_id)
 
-    return ADMIN_CINDER_CLIENT
+    ADMIN_CINDER_CLIENTS[region_name] = client
+    return client
 
 
 def neutron_client_trove_admin(context, region_name=None):
@@ -122,24 +124,24 @@ def neutron_client_trove_admin(context, region_name=None):
     :type context: trove.common.context.TroveContext
     :return neutronclient: neutronclient with trove admin credentials
     """
-    global ADMIN_NEUTRON_CLIENT
-
-    if ADMIN_NEUTRON_CLIENT:
+    region_name = region_name or CONF.service_credentials.region_name
+    if region_name in ADMIN_NEUTRON_CLIENTS:
         LOG.debug('Re-use admin neutron client')
-        return ADMIN_NEUTRON_CLIENT
+        return ADMIN_NEUTRON_CLIENTS[region_name]
 
     ks_session = get_keystone_session()
-    ADMIN_NEUTRON_CLIENT = NeutronClient.Client(
+    client = NeutronClient.Client(
         session=ks_session,
         service_type=CONF.neutron_service_type,
-        region_name=region_name or CONF.service_credentials.region_name,
+        region_name=region_name,
         insecure=CONF.neutron_api_insecure,
         endpoint_type=CONF.neutron_endpoint_type)
 
     if CONF.neutron_url:
-        ADMIN_NEUTRON_CLIENT.management_url = CONF.neutron_url
+        client.management_url = CONF.neutron_url
 
-    return ADMIN_NEUTRON_CLIENT
+    ADMIN_NEUTRON_CLIENTS[region_name] = client
+    return client
 
 
 def swift_client_trove_admin(context, region_name=None):
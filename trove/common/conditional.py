@@ -0,0 +1,131 @@
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Conditional GET and short-lived caching of the API responses.
+
+The dashboards and scripts poll the instances and backups every few seconds.
+The ETag of a response is derived from the update times of the database
+rows, which are cheap to query, so a poll of an unchanged resource gets a 304
+response without loading the details from Nova, Neutron or the guest agent.
+
+The database rows don't track all the details, e.g. the Nova server status,
+so the ETag also changes every conditional_get_max_age seconds.
+"""
+
+import hashlib
+import time
+
+from oslo_log import log as logging
+
+from trove.common import cache
+from trove.common import cfg
+from trove.common import wsgi
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+_response_cache = None
+
+
+def make_etag(*parts):
+    """Make a weak ETag of the parts identifying the state of a resource.
+
+    :returns the ETag, None if the ETags are disabled.
+    """
+    max_age = CONF.conditional_get_max_age
+    if not max_age:
+        return None
+    period = int(time.time() // max_age)
+    digest = hashlib.sha256(repr(parts + (period,)).encode()).hexdigest()
+    return 'W/"%s"' % digest[:32]
+
+
+def _opaque_tag(etag):
+    etag = etag.strip()
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    return etag
+
+
+def is_not_modified(req, etag):
+    """Whether the If-None-Match header of the request matches the ETag."""
+    header = req.headers.get('If-None-Match')
+    if not header or not etag:
+        return False
+    if header.strip() == '*':
+        return True
+    # The weak comparison is used for GET requests.
+    return _opaque_tag(etag) in [_opaque_tag(tag)
+                                 for tag in header.split(',')]
+
+
+class ResponseCache(cache.TTLCache):
+    """The cache of the responses to the list requests of the projects."""
+
+    def __init__(self):
+        super(ResponseCache, self).__init__(None, None)
+
+    @property
+    def maxsize(self):
+        return CONF.response_cache_size
+
+    @property
+    def ttl(self):
+        return CONF.response_cache_ttl
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def conditional_result(req, get_version, load, cached=False):
+    """Respond to a GET request, unless the resource has not changed.
+
+    :param get_version: A callable returning the parts of the ETag, e.g. the
+                        update times of the rows. It is expected to check
+                        that the request is authorized.
+    :param load: A callable returning the response data.
+    :param cached: Whether the response data is kept in the response cache
+                   of the project, as long as the ETag doesn't change.
+    :returns a 304 result if the request matches the ETag, otherwise a 200
+             result.
+    """
+    if not CONF.conditional_get_max_age:
+        return wsgi.Result(load(), 200)
+
+    # The views show more details to the admins, e.g. the tenant and the
+    # server of the instances.
+    context = req.environ[wsgi.CONTEXT_KEY]
+    etag = make_etag(req.path_qs, context.is_admin, *get_version())
+
+    headers = {'ETag': etag}
+    if is_not_modified(req, etag):
+        LOG.debug('%s is not modified.', req.path)
+        return wsgi.Result(None, 304, headers=headers)
+
+    if not cached:
+        return wsgi.Result(load(), 200, headers=headers)
+
+    key = (context.project_id, context.is_admin, req.url)
+    entry = get_response_cache().get(key)
+    if entry and entry[0] == etag:
+        LOG.debug('Using the cached response of %s.', req.url)
+        data = entry[1]
+    else:
+        data = load()
+        get_response_cache().set(key, (etag, data))
+    return wsgi.Result(data, 200, headers=headers)
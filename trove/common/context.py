@@ -37,13 +37,14 @@ class TroveContext(context.RequestContext):
     """
     def __init__(self, limit=None, marker=None, service_catalog=None,
                  user_identity=None, instance_id=None, timeout=None,
-                 **kwargs):
+                 auth_token_expires_at=None, **kwargs):
         self.limit = limit
         self.marker = marker
         self.service_catalog = service_catalog
         self.user_identity = user_identity
         self.instance_id = instance_id
         self.timeout = timeout
+        self.auth_token_expires_at = auth_token_expires_at
         super(TroveContext, self).__init__(**kwargs)
 
         if not hasattr(local.store, 'context'):
@@ -53,7 +54,9 @@ class TroveContext(context.RequestContext):
         parent_dict = super(TroveContext, self).to_dict()
         parent_dict.update({'limit': self.limit,
                             'marker': self.marker,
-                            'service_catalog': self.service_catalog
+                            'service_catalog': self.service_catalog,
+                            'auth_token_expires_at':
+                                self.auth_token_expires_at
                             })
         if hasattr(self, 'notification'):
             serialized = SerializableNotification.serialize(self,
@@ -71,7 +74,8 @@ class TroveContext(context.RequestContext):
             values,
             limit=values.get('limit'),
             marker=values.get('marker'),
-            service_catalog=values.get('service_catalog'))
+            service_catalog=values.get('service_catalog'),
+            auth_token_expires_at=values.get('auth_token_expires_at'))
 
         if n_values:
             ctx.notification = SerializableNotification.deserialize(
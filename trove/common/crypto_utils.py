@@ -16,6 +16,8 @@
 
 # Encryption/decryption handling
 
+import base64
+import binascii
 import hashlib
 import os
 from oslo_utils import encodeutils
@@ -33,22 +35,48 @@ IV_BYTE_COUNT = 16
 _CRYPT_BACKEND = None
 
 
-def _get_cipher(key, iv):
+class EncryptionKey(str):
+    """A key which keeps the cipher key derived from it.
+
+    A key is usually used for many messages, e.g. the RPC encryption key of
+    an instance, so the cipher key is derived only once.
+    """
+
+    def __new__(cls, key):
+        self = super(EncryptionKey, cls).__new__(
+            cls, encodeutils.safe_decode(key))
+        self.algorithm = _derive_algorithm(self)
+        return self
+
+
+def _derive_algorithm(key):
+    # The cipher key is the MD5 hex digest of the key.
+    key = encodeutils.to_utf8(key)
+    md5_key = encodeutils.safe_encode(hashlib.md5(key).hexdigest())
+    return algorithms.AES(md5_key)
+
+
+def _get_algorithm(key):
+    if isinstance(key, EncryptionKey):
+        return key.algorithm
+    return _derive_algorithm(key)
+
+
+def _get_cipher(algorithm, iv):
     global _CRYPT_BACKEND
     if not _CRYPT_BACKEND:
         _CRYPT_BACKEND = default_backend()
 
-    return Cipher(algorithms.AES(key), modes.CBC(iv),
-                  backend=_CRYPT_BACKEND)
+    return Cipher(algorithm, modes.CBC(iv), backend=_CRYPT_BACKEND)
 
 
-def _encrypt(key, iv, data):
-    encryptor = _get_cipher(key, iv).encryptor()
+def _encrypt(algorithm, iv, data):
+    encryptor = _get_cipher(algorithm, iv).encryptor()
     return encryptor.update(data) + encryptor.finalize()
 
 
-def _decrypt(key, iv, data):
-    decryptor = _get_cipher(key, iv).decryptor()
+def _decrypt(algorithm, iv, data):
+    decryptor = _get_cipher(algorithm, iv).decryptor()
     return decryptor.update(data) + decryptor.finalize()
 
 
@@ -76,20 +104,17 @@ def unpad_after_decryption(data):
 
 def encrypt_data(data, key, iv_byte_count=IV_BYTE_COUNT):
     data = encodeutils.to_utf8(data)
-    key = encodeutils.to_utf8(key)
-    md5_key = encodeutils.safe_encode(hashlib.md5(key).hexdigest())
     iv = os.urandom(iv_byte_count)
     iv = iv[:iv_byte_count]
     data = pad_for_encryption(data, iv_byte_count)
-    encrypted = _encrypt(md5_key, bytes(iv), data)
+    encrypted = _encrypt(_get_algorithm(key), bytes(iv), data)
     return iv + encrypted
 
 
 def decrypt_data(data, key, iv_byte_count=IV_BYTE_COUNT):
-    key = encodeutils.to_utf8(key)
-    md5_key = encodeutils.safe_encode(hashlib.md5(key).hexdigest())
     iv = data[:iv_byte_count]
-    decrypted = _decrypt(md5_key, bytes(iv), bytes(data[iv_byte_count:]))
+    decrypted = _decrypt(_get_algorithm(key), bytes(iv),
+                         bytes(data[iv_byte_count:]))
     return unpad_after_decryption(decrypted)
 
 
@@ -97,3 +122,11 @@ def generate_random_key(length=32, chars=None):
     chars = chars if chars else (string.ascii_uppercase +
                                  string.ascii_lowercase + string.digits)
     return ''.join(random.choice(chars) for _ in range(length))
+
+
+def is_random_key(key, size=32):
+    """Whether the key is the Base64 encoding of size bytes."""
+    try:
+        return len(base64.b64decode(key, validate=True)) == size
+    except (binascii.Error, ValueError):
+        return False
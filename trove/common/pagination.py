@@ -13,10 +13,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import base64
 import bisect
 import collections
+import datetime
+import json
 import urllib.parse as urllib_parse
 
+from trove.common import exception
+from trove.common.i18n import _
+
 
 def url_quote(s):
     if s is None:
@@ -70,6 +76,35 @@ def paginate_dict_list(li, key, limit=None, marker=None, include_marker=False):
                          key=lambda x: x[key])
 
 
+def encode_keyset_marker(*values):
+    """Encode the sort key of the last item of a page as an opaque marker.
+
+    The values are strings or datetimes.
+    """
+    items = [value.isoformat() if isinstance(value, datetime.datetime)
+             else value for value in values]
+    data = base64.urlsafe_b64encode(json.dumps(items).encode())
+    return data.decode().rstrip('=')
+
+
+def decode_keyset_marker(marker, *types):
+    """Decode a marker made by encode_keyset_marker.
+
+    :param types: The types of the values, str or datetime.datetime.
+    :raises BadRequest: if the marker is not valid.
+    """
+    try:
+        data = base64.urlsafe_b64decode(marker + '=' * (-len(marker) % 4))
+        items = json.loads(data)
+        if len(items) != len(types):
+            raise ValueError()
+        return [datetime.datetime.fromisoformat(item)
+                if value_type is datetime.datetime else value_type(item)
+                for item, value_type in zip(items, types)]
+    except (ValueError, TypeError):
+        raise exception.BadRequest(_('Invalid marker: %s') % marker)
+
+
 class PaginatedDataView(object):
 
     def __init__(self, collection_type, collection, current_page_url,
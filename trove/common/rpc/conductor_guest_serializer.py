@@ -16,6 +16,7 @@ from oslo_serialization import jsonutils
 
 from trove.common import crypto_utils as crypto
 from trove.common.i18n import _
+from trove.common.rpc import payload
 from trove.common.rpc import serializer
 
 CONF = cfg.CONF
@@ -23,17 +24,22 @@ CONF = cfg.CONF
 
 # BUG(1650518): Cleanup in the Pike release
 class ConductorGuestSerializer(serializer.TroveSerializer):
-    def __init__(self, base, key):
-        self._key = key
+    def __init__(self, base, key, compact=False):
+        self._key = crypto.EncryptionKey(key) if key is not None else None
+        self.compact = compact
         super(ConductorGuestSerializer, self).__init__(base)
 
+    def _encode(self, value):
+        if self.compact:
+            return payload.encode(value, self._key)
+        return crypto.encode_data(
+            crypto.encrypt_data(jsonutils.dumps(value), self._key))
+
     def _serialize_entity(self, ctxt, entity):
         if self._key is None:
             return entity
 
-        value = crypto.encode_data(
-            crypto.encrypt_data(
-                jsonutils.dumps(entity), self._key))
+        value = self._encode(entity)
 
         return jsonutils.dumps({'entity': value, 'csz-instance-id':
                                 CONF.guest_id})
@@ -47,11 +53,7 @@ class ConductorGuestSerializer(serializer.TroveSerializer):
         if self._key is None:
             return ctxt
 
-        cstr = jsonutils.dumps(ctxt)
-
-        return {'context':
-                crypto.encode_data(
-                    crypto.encrypt_data(cstr, self._key)),
+        return {'context': self._encode(ctxt),
                 'csz-instance-id': CONF.guest_id}
 
     def _deserialize_context(self, ctxt):
@@ -15,6 +15,7 @@ from oslo_config import cfg
 from oslo_serialization import jsonutils
 
 from trove.common import crypto_utils as cu
+from trove.common.rpc import payload
 from trove.common.rpc import serializer
 from trove.instance.models import get_instance_encryption_key
 
@@ -26,6 +27,13 @@ class ConductorHostSerializer(serializer.TroveSerializer):
     def __init__(self, base, *_):
         super(ConductorHostSerializer, self).__init__(base)
 
+    def _decode(self, data, instance_key):
+        # The guests send the compact payloads since the conductor API 1.1.
+        if payload.is_compact(data):
+            return payload.decode(data, instance_key)
+        return jsonutils.loads(cu.decrypt_data(cu.decode_data(data),
+                                               instance_key))
+
     def _serialize_entity(self, ctxt, entity):
         try:
             if ctxt.instance_id is None:
@@ -47,11 +55,7 @@ class ConductorHostSerializer(serializer.TroveSerializer):
 
         instance_key = get_instance_encryption_key(instance_id)
 
-        estr = cu.decrypt_data(cu.decode_data(entity['entity']),
-                               instance_key)
-        entity = jsonutils.loads(estr)
-
-        return entity
+        return self._decode(entity['entity'], instance_key)
 
     def _serialize_context(self, ctxt):
         try:
@@ -73,9 +77,7 @@ class ConductorHostSerializer(serializer.TroveSerializer):
             if instance_id is not None:
                 instance_key = get_instance_encryption_key(instance_id)
 
-                cstr = cu.decrypt_data(cu.decode_data(ctxt['context']),
-                                       instance_key)
-                ctxt = jsonutils.loads(cstr)
+                ctxt = self._decode(ctxt['context'], instance_key)
         except (ValueError, TypeError):
             return ctxt
 
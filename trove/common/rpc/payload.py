@@ -0,0 +1,86 @@
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""The compact wire format of the encrypted RPC payloads.
+
+The payloads were encoded in JSON, encrypted and encoded in Base64. The
+compact format packs the payloads with msgpack instead, and compresses the
+payloads larger than rpc_compress_threshold bytes with zlib. The result is
+still encoded in Base64, because the messages are encoded in JSON by the
+oslo.messaging drivers.
+
+The compact payloads start with COMPACT_PREFIX, which is not a Base64
+character, so that both formats are accepted by the receivers. They are only
+sent to the peers supporting them, see the RPC API versions.
+"""
+
+import base64
+import zlib
+
+import msgpack
+from oslo_serialization import jsonutils
+
+from trove.common import cfg
+from trove.common import crypto_utils as cu
+
+CONF = cfg.CONF
+
+COMPACT_PREFIX = '~1'
+_RAW = b'\x00'
+_ZLIB = b'\x01'
+
+
+def _default(value):
+    # The types msgpack can't pack are converted the same way as in JSON.
+    return jsonutils.to_primitive(value, convert_instances=True)
+
+
+def is_compact(data):
+    return isinstance(data, str) and data.startswith(COMPACT_PREFIX)
+
+
+def encode(value, key):
+    """Pack, compress if large, encrypt and encode a value."""
+    data = msgpack.packb(value, default=_default, use_bin_type=True)
+    if len(data) > CONF.rpc_compress_threshold:
+        data = _ZLIB + zlib.compress(data, 1)
+    else:
+        data = _RAW + data
+    return (COMPACT_PREFIX +
+            base64.b64encode(cu.encrypt_data(data, key)).decode('ascii'))
+
+
+def _decode(data, key):
+    data = cu.decrypt_data(base64.b64decode(data[len(COMPACT_PREFIX):]), key)
+    if data[:1] == _ZLIB:
+        data = zlib.decompress(data[1:])
+    elif data[:1] == _RAW:
+        data = data[1:]
+    else:
+        raise ValueError('Unknown RPC payload encoding.')
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def decode(data, key):
+    """Decode a value encoded by encode.
+
+    :raises ValueError: if the payload can't be decoded, the serializers
+                        pass such payloads on undecoded.
+    """
+    try:
+        return _decode(data, key)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError('Failed to decode the RPC payload: %s' % e) from e
@@ -14,27 +14,45 @@
 from oslo_serialization import jsonutils
 
 from trove.common import crypto_utils as cu
+from trove.common.rpc import payload
 from trove.common.rpc import serializer
 
 
 # BUG(1650518): Cleanup in the Pike release
 class SecureSerializer(serializer.TroveSerializer):
-    def __init__(self, base, key):
-        self._key = key
+    """Encrypt the payloads with a key.
+
+    :param compact: Whether the payloads are sent in the compact format,
+                    see trove.common.rpc.payload. Both formats are received.
+    """
+
+    def __init__(self, base, key, compact=False):
+        self._key = cu.EncryptionKey(key) if key is not None else None
+        self.compact = compact
         super(SecureSerializer, self).__init__(base)
 
+    def _encode(self, value):
+        if self.compact:
+            return payload.encode(value, self._key)
+        return cu.encode_data(cu.encrypt_data(jsonutils.dumps(value),
+                                              self._key))
+
+    def _decode(self, data):
+        if payload.is_compact(data):
+            return payload.decode(data, self._key)
+        return jsonutils.loads(cu.decrypt_data(cu.decode_data(data),
+                                               self._key))
+
     def _serialize_entity(self, ctxt, entity):
         if self._key is None:
             return entity
 
-        estr = jsonutils.dumps(entity)
-        return cu.encode_data(cu.encrypt_data(estr, self._key))
+        return self._encode(entity)
 
     def _deserialize_entity(self, ctxt, entity):
         try:
             if self._key is not None:
-                estr = cu.decrypt_data(cu.decode_data(entity), self._key)
-                entity = jsonutils.loads(estr)
+                entity = self._decode(entity)
         except (ValueError, TypeError):
             return entity
 
@@ -44,15 +62,12 @@ class SecureSerializer(serializer.TroveSerializer):
         if self._key is None:
             return ctxt
 
-        cstr = jsonutils.dumps(ctxt)
-        return {'context': cu.encode_data(cu.encrypt_data(cstr, self._key))}
+        return {'context': self._encode(ctxt)}
 
     def _deserialize_context(self, ctxt):
         try:
             if self._key is not None:
-                cstr = cu.decrypt_data(cu.decode_data(ctxt['context']),
-                                       self._key)
-                ctxt = jsonutils.loads(cstr)
+                ctxt = self._decode(ctxt['context'])
         except (ValueError, TypeError):
             return ctxt
 
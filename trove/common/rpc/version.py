@@ -24,3 +24,15 @@ RPC_API_VERSION = "1.0"
 VERSION_ALIASES = {
     'icehouse': '1.0'
 }
+
+
+def version_is_compatible(version_cap, version):
+    """Whether the peers capped to version_cap support the version.
+
+    An unknown cap is not compatible, the peers may be older.
+    """
+    if not version_cap:
+        return False
+    cap_major, cap_minor = [int(part) for part in version_cap.split('.')[:2]]
+    major, minor = [int(part) for part in version.split('.')[:2]]
+    return cap_major == major and cap_minor >= minor
@@ -343,11 +343,14 @@ class MongoDbClusterTasks(task_models.ClusterTasks):
 
     def _get_running_query_router_id(self):
         """Get a query router in this cluster that is in the RUNNING state."""
-        for instance_id in [db_instance.id for db_instance in self.db_instances
-                            if db_instance.type == 'query_router']:
-            status = models.InstanceServiceStatus.find_by(
-                instance_id=instance_id).get_status()
-            if status == ServiceStatuses.RUNNING:
+        query_router_ids = [db_instance.id
+                            for db_instance in self.db_instances
+                            if db_instance.type == 'query_router']
+        statuses = models.InstanceServiceStatus.load_statuses(
+            query_router_ids)
+        for instance_id in query_router_ids:
+            if (instance_id in statuses and
+                    statuses[instance_id][0] == ServiceStatuses.RUNNING):
                 return instance_id
         LOG.exception("no query routers ready to accept requests")
         self.update_statuses_on_failure(self.id)
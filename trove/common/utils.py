@@ -184,7 +184,8 @@ class MethodInspector(object):
 
 
 def build_polling_task(retriever, condition=lambda value: value,
-                       sleep_time=1, time_out=0, initial_delay=0):
+                       sleep_time=1, time_out=0, initial_delay=0,
+                       max_interval=30):
     """Run a function in a loop with backoff on error.
 
     The condition function runs based on the retriever function result.
@@ -198,7 +199,7 @@ def build_polling_task(retriever, condition=lambda value: value,
     call = loopingcall.BackOffLoopingCall(f=poll_and_check)
     return call.start(initial_delay=initial_delay,
                       starting_interval=sleep_time,
-                      max_interval=30, timeout=time_out)
+                      max_interval=max_interval, timeout=time_out)
 
 
 def wait_for_task(polling_task):
@@ -210,7 +211,7 @@ def wait_for_task(polling_task):
 
 
 def poll_until(retriever, condition=lambda value: value,
-               sleep_time=3, time_out=0, initial_delay=0):
+               sleep_time=3, time_out=0, initial_delay=0, max_interval=30):
     """Retrieves object until it passes condition, then returns it.
 
     If time_out_limit is passed in, PollTimeOut will be raised once that
@@ -219,7 +220,8 @@ def poll_until(retriever, condition=lambda value: value,
     """
     task = build_polling_task(retriever, condition=condition,
                               sleep_time=sleep_time, time_out=time_out,
-                              initial_delay=initial_delay)
+                              initial_delay=initial_delay,
+                              max_interval=max_interval)
     return wait_for_task(task)
 
 
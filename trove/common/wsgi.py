@@ -214,9 +214,10 @@ class Request(base_wsgi.Request):
 class Result(object):
     """A result whose serialization is compatible with JSON."""
 
-    def __init__(self, data, status=200):
+    def __init__(self, data, status=200, headers=None):
         self._data = data
         self.status = status
+        self.headers = headers or {}
 
     def data(self, serialization_type):
         """Return an appropriate serialized type for the body.
@@ -229,6 +230,41 @@ class Result(object):
         return self._data
 
 
+class StreamingResult(Result):
+    """A result listing many items, whose JSON body is streamed.
+
+    The items are serialized as they are produced, e.g. a page at a time,
+    and sent in chunks, so that the whole list is never held in memory.
+
+    :param name: The key of the list in the body.
+    :param items: An iterable of the items.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, name, items, status=200, headers=None):
+        super(StreamingResult, self).__init__(None, status, headers)
+        self.name = name
+        self.items = items
+
+    def data(self, serialization_type):
+        return {self.name: list(self.items)}
+
+    def iter_json(self, serializer):
+        chunk = [b'{%s: [' % jsonutils.dump_as_bytes(self.name)]
+        size = 0
+        for index, item in enumerate(self.items):
+            data = serializer.serialize(item)
+            chunk.append(b',' + data if index else data)
+            size += len(data)
+            if size >= self.CHUNK_SIZE:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+        chunk.append(b']}')
+        yield b''.join(chunk)
+
+
 class Resource(base_wsgi.Resource):
     def __init__(self, controller, deserializer, serializer,
                  exception_map=None):
@@ -433,6 +469,12 @@ class TroveResponseSerializer(base_wsgi.ResponseSerializer):
         instead of the actual data.
 
         """
+        if (isinstance(data, StreamingResult) and
+                content_type == 'application/json'):
+            response.headers['Content-Type'] = content_type
+            response.app_iter = data.iter_json(
+                self.get_body_serializer(content_type))
+            return
         if isinstance(data, Result):
             data = data.data(content_type)
         super(TroveResponseSerializer, self).serialize_body(
@@ -448,6 +490,7 @@ class TroveResponseSerializer(base_wsgi.ResponseSerializer):
             action)
         if isinstance(data, Result):
             response.status = data.status
+            response.headers.update(data.headers)
 
 
 class Fault(webob.exc.HTTPException):
@@ -538,6 +581,9 @@ class ContextMiddleware(base_wsgi.Middleware):
                     _('Invalid service catalog json.'))
         tenant_id = request.headers.get('X-Tenant-Id', None)
         auth_token = request.headers["X-Auth-Token"]
+        # Set by keystonemiddleware when it validated the token
+        token_info = request.environ.get('keystone.token_info') or {}
+        auth_token_expires_at = token_info.get('token', {}).get('expires_at')
         user_id = request.headers.get('X-User-ID', None)
         roles = request.headers.get('X-Role', '').split(',')
         is_admin = False
@@ -553,7 +599,9 @@ class ContextMiddleware(base_wsgi.Middleware):
                                           limit=limits.get('limit'),
                                           marker=limits.get('marker'),
                                           service_catalog=service_catalog,
-                                          roles=roles)
+                                          roles=roles,
+                                          auth_token_expires_at=(
+                                              auth_token_expires_at))
         request.environ[CONTEXT_KEY] = context
 
     @classmethod
@@ -17,6 +17,7 @@ import oslo_messaging as messaging
 
 from trove.common import cfg
 from trove.common.rpc import conductor_guest_serializer as sz
+from trove.common.rpc import version as rpc_version
 from trove.common.serializable_notification import SerializableNotification
 from trove import rpc
 
@@ -29,13 +30,14 @@ class API(object):
 
     API version history:
         * 1.0 - Initial version.
+        * 1.1 - Accept the compact RPC payloads
 
     When updating this API, also update API_LATEST_VERSION
     """
 
     # API_LATEST_VERSION should bump the minor number each time
     # a method signature is added or changed
-    API_LATEST_VERSION = '1.0'
+    API_LATEST_VERSION = '1.1'
 
     # API_BASE_VERSION should only change on major version upgrade
     API_BASE_VERSION = '1.0'
@@ -47,10 +49,15 @@ class API(object):
         'liberty': '1.0',
         'mitaka': '1.0',
         'newton': '1.0',
+        'wallaby': '1.0',
+        'xena': '1.1',
 
         'latest': API_LATEST_VERSION
     }
 
+    # The compact RPC payloads are sent to the conductor since this version.
+    COMPACT_PAYLOAD_VERSION = '1.1'
+
     def __init__(self, context):
         self.context = context
         super(API, self).__init__()
@@ -66,7 +73,11 @@ class API(object):
         return rpc.get_client(target, key=CONF.instance_rpc_encr_key,
                               version_cap=version_cap,
                               serializer=serializer,
-                              secure_serializer=sz.ConductorGuestSerializer)
+                              secure_serializer=sz.ConductorGuestSerializer,
+                              compact=(CONF.rpc_compact_payloads and
+                                       rpc_version.version_is_compatible(
+                                           version_cap,
+                                           self.COMPACT_PAYLOAD_VERSION)))
 
     def heartbeat(self, instance_id, payload, sent=None):
         LOG.debug("Making async call to cast heartbeat for instance: %s",
@@ -12,6 +12,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import json
+
+import eventlet
 from oslo_log import log as logging
 import oslo_messaging as messaging
 from oslo_service import periodic_task
@@ -36,6 +40,10 @@ class Manager(periodic_task.PeriodicTasks):
 
     def __init__(self):
         super(Manager, self).__init__(CONF)
+        # The newest heartbeat of each instance, (sent, status, keepalive),
+        # waiting to be saved, see heartbeat_batch_interval.
+        self._heartbeats = {}
+        self._heartbeat_flush = None
 
     def _message_too_old(self, instance_id, method_name, sent):
         fields = {
@@ -84,6 +92,10 @@ class Manager(periodic_task.PeriodicTasks):
         LOG.debug("Instance ID: %(instance)s, Payload: %(payload)s",
                   {"instance": str(instance_id),
                    "payload": str(payload)})
+        if CONF.heartbeat_batch_interval:
+            self._buffer_heartbeat(instance_id, payload, sent)
+            return
+
         status = inst_models.InstanceServiceStatus.find_by(
             instance_id=instance_id)
 
@@ -100,8 +112,89 @@ class Manager(periodic_task.PeriodicTasks):
                 svc_status.ServiceStatus.from_description(
                     payload['service_status'])
             )
+        status.keepalive = payload.get('keepalive')
         status.save()
 
+    def _buffer_heartbeat(self, instance_id, payload, sent):
+        status = None
+        if payload.get('service_status') is not None:
+            status = svc_status.ServiceStatus.from_description(
+                payload['service_status'])
+
+        pending = self._heartbeats.get(instance_id)
+        if (pending and pending[0] is not None and sent is not None and
+                pending[0] >= sent):
+            LOG.info("[Instance %s] Rec'd message is older than last seen. "
+                     "Discarding.", instance_id)
+            return
+        self._heartbeats[instance_id] = (sent, status,
+                                         payload.get('keepalive'))
+
+        if self._heartbeat_flush is None:
+            self._heartbeat_flush = eventlet.spawn_after(
+                CONF.heartbeat_batch_interval, self.flush_heartbeats)
+
+    def flush_heartbeats(self):
+        """Save the buffered heartbeats with a few bulk statements."""
+        if self._heartbeat_flush is not None:
+            self._heartbeat_flush.cancel()
+            self._heartbeat_flush = None
+        heartbeats, self._heartbeats = self._heartbeats, {}
+        if not heartbeats:
+            return
+
+        try:
+            self._save_heartbeats(heartbeats)
+        except Exception:
+            # The next heartbeats of the instances will be saved.
+            LOG.exception("Failed to save the heartbeats of %s instances.",
+                          len(heartbeats))
+
+    def _save_heartbeats(self, heartbeats):
+        sent = {instance_id: heartbeat[0]
+                for instance_id, heartbeat in heartbeats.items()
+                if heartbeat[0] is not None}
+        seen = LastSeen.load_all(list(sent), 'heartbeat')
+        for instance_id, last_sent in seen.items():
+            if last_sent >= sent[instance_id]:
+                LOG.info("[Instance %s] Rec'd message is older than last "
+                         "seen. Discarding.", instance_id)
+                del heartbeats[instance_id]
+                del sent[instance_id]
+
+        LastSeen.update_all(
+            'heartbeat', {instance_id: sent[instance_id]
+                          for instance_id in sent if instance_id in seen})
+        for instance_id in sent:
+            if instance_id not in seen:
+                # Another conductor may receive the first heartbeats of the
+                # instance at the same time.
+                LastSeen.create_or_update(instance_id, 'heartbeat',
+                                          sent[instance_id])
+
+        # Most instances report the same status, so there are few
+        # statements. A heartbeat is only saved if it is still the last
+        # seen, another conductor may have saved a younger one meanwhile.
+        by_status = collections.defaultdict(list)
+        for instance_id, (_sent, status, keepalive) in heartbeats.items():
+            by_status[(status.code if status else None,
+                       keepalive)].append(instance_id)
+        iss = inst_models.InstanceServiceStatus
+        for (code, keepalive), instance_ids in by_status.items():
+            status = (svc_status.ServiceStatus.from_code(code)
+                      if code is not None else None)
+            timed = [instance_id for instance_id in instance_ids
+                     if instance_id in sent]
+            if timed:
+                iss.update_heartbeats(
+                    timed, status, keepalive,
+                    LastSeen.is_last('heartbeat', sent, iss.instance_id))
+            untimed = [instance_id for instance_id in instance_ids
+                       if instance_id not in sent]
+            if untimed:
+                iss.update_heartbeats(untimed, status, keepalive)
+        LOG.debug("Saved the heartbeats of %s instances.", len(heartbeats))
+
     def update_backup(self, context, instance_id, backup_id,
                       sent=None, **backup_fields):
         LOG.debug("Instance ID: %(instance)s, Backup ID: %(backup)s",
@@ -134,6 +227,9 @@ class Manager(periodic_task.PeriodicTasks):
                       "%(found)s", fields)
             return
 
+        if isinstance(backup_fields.get('stats'), dict):
+            backup_fields['stats'] = json.dumps(backup_fields['stats'])
+
         for k, v in backup_fields.items():
             if hasattr(backup, k):
                 fields = {
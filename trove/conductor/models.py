@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_db import exception as db_exception
+import sqlalchemy
+
+from trove.common import exception
 from trove.db import get_db_api
 
 
@@ -47,3 +51,55 @@ class LastSeen(object):
     def create(cls, instance_id, method_name, sent):
         seen = LastSeen(instance_id, method_name, sent)
         return seen.save()
+
+    @classmethod
+    def create_or_update(cls, instance_id, method_name, sent):
+        """Create the row of an instance, or update it if another conductor
+        created it in the meantime.
+        """
+        try:
+            cls.create(instance_id, method_name, sent)
+        except (db_exception.DBDuplicateEntry, exception.DBConstraintError):
+            cls.update_all(method_name, {instance_id: sent})
+
+    @classmethod
+    def load_all(cls, instance_ids, method_name):
+        """Load the time of the last message of several instances.
+
+        :returns the time of the last message by instance ID.
+        """
+        if not instance_ids:
+            return {}
+        query = get_db_api().find_all(cls, method_name=method_name).filter(
+            cls.instance_id.in_(instance_ids))
+        return {seen.instance_id: float(seen.sent) for seen in query}
+
+    @classmethod
+    def update_all(cls, method_name, sent):
+        """Update the time of the last message of several instances.
+
+        The rows are updated with one statement, a row is only updated if
+        the message is younger than the one already seen, in case another
+        conductor saved a younger message in the meantime.
+
+        :param sent: The time of the message by instance ID.
+        """
+        if not sent:
+            return
+        sent_time = sqlalchemy.case(sent, value=cls.instance_id)
+        get_db_api().find_all(cls, method_name=method_name).filter(
+            cls.instance_id.in_(list(sent)),
+            cls.sent < sent_time).update({'sent': sent_time},
+                                         synchronize_session=False)
+
+    @classmethod
+    def is_last(cls, method_name, sent, instance_id):
+        """A condition of a statement, true if the message is the last seen.
+
+        :param sent: The time of the message by instance ID.
+        :param instance_id: The instance ID column of the updated table.
+        """
+        return sqlalchemy.exists().where(sqlalchemy.and_(
+            cls.instance_id == instance_id,
+            cls.method_name == method_name,
+            cls.sent == sqlalchemy.case(sent, value=instance_id)))
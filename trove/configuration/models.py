@@ -17,6 +17,7 @@ import json
 
 from oslo_log import log as logging
 
+from trove.common import cache
 from trove.common import cfg
 from trove.common import exception
 from trove.common.exception import ModelNotFoundError
@@ -312,6 +313,7 @@ class DatastoreConfigurationParameters(object):
             pass
         config_param = DBDatastoreConfigurationParameters.create(
             **kwargs)
+        cache.invalidate_reference_cache()
         return config_param
 
     @staticmethod
@@ -319,11 +321,14 @@ class DatastoreConfigurationParameters(object):
         config_param = DatastoreConfigurationParameters.load_parameter_by_name(
             version_id, config_param_name)
         config_param.delete()
+        cache.invalidate_reference_cache()
 
     @classmethod
     def load_parameters(cls, datastore_version_id):
-        return DBDatastoreConfigurationParameters.find_all(
-            datastore_version_id=datastore_version_id)
+        return cache.get_reference_cache().get_or_load(
+            ('configuration_parameters', datastore_version_id),
+            lambda: DBDatastoreConfigurationParameters.find_all(
+                datastore_version_id=datastore_version_id).all())
 
     @classmethod
     def load_parameter(cls, config_id):
@@ -373,6 +378,7 @@ def create_or_update_datastore_configuration_parameter(name,
             min_size=min_size,
         )
         get_db_api().save(config)
+    cache.invalidate_reference_cache()
 
 
 def load_datastore_configuration_parameters(datastore, datastore_version,
@@ -403,6 +409,7 @@ def remove_datastore_configuration_parameters(datastore, datastore_version,
     db_params = DatastoreConfigurationParameters.load_parameters(ds_version.id)
     for db_param in db_params:
         db_param.delete()
+    cache.invalidate_reference_cache()
 
 
 def persisted_models():
@@ -18,6 +18,7 @@
 from oslo_log import log as logging
 from oslo_utils import uuidutils
 
+from trove.common import cache
 from trove.common import cfg
 from trove.common.clients import create_nova_client
 from trove.common import exception
@@ -103,6 +104,7 @@ class Capabilities(object):
                 capability_id=capability.id,
                 datastore_version_id=self.datastore_version_id,
                 enabled=enabled)
+            cache.invalidate_reference_cache()
         self._load()
 
     def _load(self):
@@ -152,9 +154,13 @@ class Capabilities(object):
 
         :returns: Capabilities
         """
-        self = cls(datastore_version_id)
-        self._load()
-        return self
+        def _load():
+            capabilities = cls(datastore_version_id)
+            capabilities._load()
+            return capabilities
+
+        return cache.get_reference_cache().get_or_load(
+            ('capabilities', datastore_version_id), _load)
 
 
 class BaseCapability(object):
@@ -190,6 +196,7 @@ class BaseCapability(object):
         """
         self.db_info.enabled = True
         self.db_info.save()
+        cache.invalidate_reference_cache()
 
     def disable(self):
         """
@@ -197,6 +204,7 @@ class BaseCapability(object):
         """
         self.db_info.enabled = False
         self.db_info.save()
+        cache.invalidate_reference_cache()
 
     def delete(self):
         """
@@ -204,6 +212,7 @@ class BaseCapability(object):
         """
 
         self.db_info.delete()
+        cache.invalidate_reference_cache()
 
 
 class CapabilityOverride(BaseCapability):
@@ -282,12 +291,14 @@ class CapabilityOverride(BaseCapability):
         :returns: CapabilityOverride
         """
 
-        return CapabilityOverride(
+        override = CapabilityOverride(
             DBCapabilityOverrides.create(
                 capability_id=capability.id,
                 datastore_version_id=datastore_version_id,
                 enabled=enabled)
         )
+        cache.invalidate_reference_cache()
+        return override
 
 
 class Capability(BaseCapability):
@@ -333,8 +344,10 @@ class Capability(BaseCapability):
 
         :returns: Capability
         """
-        return Capability(DBCapabilities.create(
+        capability = Capability(DBCapabilities.create(
             name=name, description=description, enabled=enabled))
+        cache.invalidate_reference_cache()
+        return capability
 
 
 class Datastore(object):
@@ -347,6 +360,11 @@ class Datastore(object):
 
     @classmethod
     def load(cls, id_or_name):
+        return cache.get_reference_cache().get_or_load(
+            ('datastore', id_or_name), lambda: cls._load(id_or_name))
+
+    @classmethod
+    def _load(cls, id_or_name):
         try:
             return cls(DBDatastore.find_by(id=id_or_name))
         except exception.ModelNotFoundError:
@@ -369,6 +387,7 @@ class Datastore(object):
 
     def delete(self):
         self.db_info.delete()
+        cache.invalidate_reference_cache()
 
 
 class Datastores(object):
@@ -401,6 +420,12 @@ class DatastoreVersion(object):
 
     @classmethod
     def load(cls, datastore, id_or_name, version=None):
+        return cache.get_reference_cache().get_or_load(
+            ('datastore_version', datastore.id, id_or_name, version),
+            lambda: cls._load(datastore, id_or_name, version=version))
+
+    @classmethod
+    def _load(cls, datastore, id_or_name, version=None):
         if uuidutils.is_uuid_like(id_or_name):
             return cls(DBDatastoreVersion.find_by(datastore_id=datastore.id,
                                                   id=id_or_name))
@@ -427,6 +452,11 @@ class DatastoreVersion(object):
 
     @classmethod
     def load_by_uuid(cls, uuid):
+        return cache.get_reference_cache().get_or_load(
+            ('datastore_version', uuid), lambda: cls._load_by_uuid(uuid))
+
+    @classmethod
+    def _load_by_uuid(cls, uuid):
         try:
             return cls(DBDatastoreVersion.find_by(id=uuid))
         except exception.ModelNotFoundError:
@@ -434,6 +464,7 @@ class DatastoreVersion(object):
 
     def delete(self):
         self.db_info.delete()
+        cache.invalidate_reference_cache()
 
     @property
     def id(self):
@@ -597,6 +628,7 @@ def update_datastore(name, default_version):
         datastore.default_version_id = None
 
     db_api.save(datastore)
+    cache.invalidate_reference_cache()
 
 
 def update_datastore_version(datastore, name, manager, image_id, image_tags,
@@ -624,6 +656,7 @@ def update_datastore_version(datastore, name, manager, image_id, image_tags,
     ds_version.active = active
 
     db_api.save(ds_version)
+    cache.invalidate_reference_cache()
 
 
 class DatastoreVersionMetadata(object):
@@ -13,9 +13,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
+import sqlalchemy
 import sqlalchemy.exc
 
 from trove.common import exception
+from trove.common import pagination
 from trove.db.sqlalchemy import migration
 from trove.db.sqlalchemy import session
 
@@ -46,6 +50,37 @@ def find_all_by_limit(query_func, model, conditions, limit, marker=None,
                    marker_column).all()
 
 
+def paginate_by_updated(query, model, limit, marker=None):
+    """Get a page of the query results, the most recently updated first.
+
+    The results are sorted by (updated, id) and the page starts after the
+    row of the marker, so that the rows of the previous pages are not read
+    again. The integer markers, i.e. offsets, given out by the previous
+    releases are still accepted.
+
+    :returns the page and the marker of the next page, None if it's the last
+             page.
+    """
+    query = query.order_by(model.updated.desc(), model.id.desc())
+    if marker and str(marker).isdigit():
+        query = query.offset(int(marker))
+    elif marker:
+        updated, id = pagination.decode_keyset_marker(
+            marker, datetime.datetime, str)
+        query = query.filter(sqlalchemy.or_(
+            model.updated < updated,
+            sqlalchemy.and_(model.updated == updated, model.id < id)))
+
+    # Read one more row to know if there is a next page, instead of
+    # counting the rows.
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, pagination.encode_keyset_marker(items[-1].updated,
+                                                  items[-1].id)
+
+
 def find_by(model, **kwargs):
     return _query_by(model, **kwargs).first()
 
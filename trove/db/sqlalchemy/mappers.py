@@ -80,6 +80,8 @@ def map(engine, models):
                Table('instance_modules', meta, autoload=True))
     orm.mapper(models['metadata'],
                Table('metadata', meta, autoload=True))
+    orm.mapper(models['cache_versions'],
+               Table('cache_versions', meta, autoload=True))
 
 
 def mapping_exists(model):
@@ -0,0 +1,46 @@
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_log import log as logging
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import Index
+from sqlalchemy.schema import MetaData
+
+from trove.db.sqlalchemy.migrate_repo.schema import Table
+
+logger = logging.getLogger('trove.db.sqlalchemy.migrate_repo.schema')
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    # The backups and metadata are listed by project, the most recently
+    # updated first, see paginate_by_updated.
+    backups = Table('backups', meta, autoload=True)
+    metadata = Table('metadata', meta, autoload=True)
+    indexes = [
+        Index('backups_tenant_id_deleted_updated_id', backups.c.tenant_id,
+              backups.c.deleted, backups.c.updated, backups.c.id),
+        Index('metadata_project_id_deleted_updated_id',
+              metadata.c.project_id, metadata.c.deleted, metadata.c.updated,
+              metadata.c.id),
+    ]
+
+    for index in indexes:
+        try:
+            index.create()
+        except OperationalError as e:
+            logger.info(e)
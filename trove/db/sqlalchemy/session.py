@@ -40,6 +40,7 @@ def configure_db(options, models_mapper=None):
     else:
         from trove.backup import models as backup_models
         from trove.cluster import models as cluster_models
+        from trove.common import cache
         from trove.conductor import models as conductor_models
         from trove.configuration import models as configurations_models
         from trove.datastore import models as datastores_models
@@ -65,7 +66,8 @@ def configure_db(options, models_mapper=None):
             conductor_models,
             cluster_models,
             module_models,
-            metadata_models
+            metadata_models,
+            cache
         ]
 
         models = {}
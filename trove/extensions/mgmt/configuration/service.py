@@ -18,6 +18,7 @@ from oslo_log import log as logging
 
 import trove.common.apischema as apischema
 from trove.common.auth import admin_context
+from trove.common import cache
 from trove.common import exception
 from trove.common.i18n import _
 from trove.common import wsgi
@@ -117,6 +118,7 @@ class ConfigurationsParameterController(wsgi.Controller):
         param.max_size = max_size
         param.min_size = min_size
         param.save()
+        cache.invalidate_reference_cache()
         return wsgi.Result(
             views.MgmtConfigurationParameterView(param).data(),
             200)
@@ -18,9 +18,12 @@ from oslo_log import log as logging
 from trove.common import cfg
 from trove.common import clients
 from trove.common import exception
+from trove.common.i18n import _
 from trove.common import timeutils
+from trove.datastore import models as datastore_models
 from trove.extensions.mysql import models as mysql_models
 from trove.instance import models as instance_models
+from trove.instance.tasks import InstanceTasks
 from trove import rpc
 
 LOG = logging.getLogger(__name__)
@@ -54,6 +57,85 @@ def load_mgmt_instances(context, deleted=None, client=None,
     return instances
 
 
+def _get_task_ids(task_status):
+    task_ids = [task.code for task in vars(InstanceTasks).values()
+                if getattr(task, 'action', None) == task_status.upper()]
+    if not task_ids:
+        raise exception.BadRequest(_('Invalid task status: %s') % task_status)
+    return task_ids
+
+
+def _mgmt_instances_query(context, deleted=None, include_clustered=None,
+                          project_id=None, datastore=None, host=None,
+                          task_status=None):
+    DBInstance = instance_models.DBInstance
+    query = DBInstance.query()
+    filters = []
+    if deleted is not None:
+        filters.append(DBInstance.deleted == deleted)
+    if not include_clustered:
+        filters.append(DBInstance.cluster_id.is_(None))
+    if project_id:
+        filters.append(DBInstance.tenant_id == project_id)
+    if datastore:
+        ds = datastore_models.Datastore.load(datastore)
+        DBDatastoreVersion = datastore_models.DBDatastoreVersion
+        query = query.join(
+            DBDatastoreVersion,
+            DBDatastoreVersion.id == DBInstance.datastore_version_id)
+        filters.append(DBDatastoreVersion.datastore_id == ds.id)
+    if task_status:
+        filters.append(DBInstance.task_id.in_(_get_task_ids(task_status)))
+    if host:
+        # The host of the servers is only known by Nova.
+        client = clients.create_nova_client(
+            context, CONF.service_credentials.region_name)
+        servers = client.servers.list(
+            search_opts={'all_tenants': False, 'host': host}, limit=-1)
+        filters.append(DBInstance.compute_instance_id.in_(
+            [server.id for server in servers]))
+    return query.filter(*filters)
+
+
+def load_mgmt_instances_page(context, limit, marker=None, **filters):
+    """Load a page of the instances of all the projects.
+
+    The filters are applied by the database query, and only the Nova
+    servers of the page are fetched.
+
+    :param filters: The filters on deleted, include_clustered, project_id,
+                    datastore, host and task_status.
+    :returns the instances and the marker of the next page.
+    """
+    DBInstance = instance_models.DBInstance
+    query = _mgmt_instances_query(context, **filters)
+    if marker:
+        query = query.filter(DBInstance.id > marker)
+    db_infos = query.order_by(DBInstance.id).limit(limit + 1).all()
+    next_marker = None
+    if len(db_infos) > limit:
+        db_infos = db_infos[:limit]
+        next_marker = db_infos[-1].id
+
+    servers = instance_models.load_servers(context, db_infos)
+    instances = MgmtInstances.load_status_from_existing(
+        context, db_infos, servers, all_regions=True)
+    return instances, next_marker
+
+
+def iter_mgmt_instances(context, page_size, marker=None, **filters):
+    """Load the instances of all the projects a page at a time.
+
+    :returns a generator of the pages of instances.
+    """
+    while True:
+        instances, marker = load_mgmt_instances_page(
+            context, page_size, marker, **filters)
+        yield instances
+        if not marker:
+            return
+
+
 def load_mgmt_instance(cls, context, id, include_deleted):
     try:
         instance = instance_models.load_instance(
@@ -86,9 +168,11 @@ def load_mgmt_instance(cls, context, id, include_deleted):
 
 
 class SimpleMgmtInstance(instance_models.BaseInstance):
-    def __init__(self, context, db_info, server, datastore_status):
+    def __init__(self, context, db_info, server, datastore_status,
+                 ds_version=None, ds=None):
         super(SimpleMgmtInstance, self).__init__(context, db_info, server,
-                                                 datastore_status)
+                                                 datastore_status,
+                                                 ds_version=ds_version, ds=ds)
 
     @property
     def status(self):
@@ -124,13 +208,20 @@ class DetailedMgmtInstance(SimpleMgmtInstance):
     @classmethod
     def load(cls, context, id, include_deleted=False):
         instance = load_mgmt_instance(cls, context, id, include_deleted)
-        client = clients.create_cinder_client(context)
-        try:
-            instance.volume = client.volumes.get(instance.volume_id)
-        except Exception:
-            instance.volume = None
-            # Populate the volume_used attribute from the guest agent.
-        instance_models.load_guest_info(instance, context, id)
+
+        def _load_volume():
+            client = clients.create_cinder_client(context)
+            try:
+                instance.volume = client.volumes.get(instance.volume_id)
+            except Exception:
+                instance.volume = None
+
+        # Populate the volume_used attribute from the guest agent.
+        instance_models.load_concurrently({
+            'volume': _load_volume,
+            'guest info': lambda: instance_models.load_guest_info(
+                instance, context, id),
+        }, id)
         instance.root_history = mysql_models.RootHistory.load(context=context,
                                                               instance_id=id)
         return instance
@@ -152,14 +243,16 @@ class MgmtInstance(instance_models.Instance):
 
 class MgmtInstances(instance_models.Instances):
     @staticmethod
-    def load_status_from_existing(context, db_infos, servers):
-        def load_instance(context, db, status, server=None):
-            return SimpleMgmtInstance(context, db, server, status)
+    def load_status_from_existing(context, db_infos, servers,
+                                  all_regions=False):
+        def load_instance(context, db, status, server=None, **kwargs):
+            return SimpleMgmtInstance(context, db, server, status, **kwargs)
 
         find_server = instance_models.create_server_list_matcher(servers)
 
         instances = instance_models.Instances._load_servers_status(
-            load_instance, context, db_infos, find_server)
+            load_instance, context, db_infos, find_server,
+            all_regions=all_regions)
 
         _load_servers(instances, find_server)
         return instances
@@ -20,10 +20,12 @@ from oslo_log import log as logging
 from trove.backup.models import Backup
 import trove.common.apischema as apischema
 from trove.common.auth import admin_context
+from trove.common import cfg
 from trove.common import exception
 from trove.common.i18n import _
 from trove.common import notification
 from trove.common.notification import StartNotification
+from trove.common import pagination
 from trove.common import wsgi
 from trove.extensions.mgmt.instances import models
 from trove.extensions.mgmt.instances import views
@@ -34,6 +36,7 @@ from trove.instance import models as instance_models
 from trove.instance.service import InstanceController
 
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 
@@ -60,18 +63,42 @@ class MgmtInstanceController(InstanceController):
             deleted = False
         clustered_q = req.GET.get('include_clustered', '').lower()
         include_clustered = clustered_q == 'true'
-        project_id = req.GET.get('project_id')
+        filters = {
+            'deleted': deleted,
+            'include_clustered': include_clustered,
+            'project_id': req.GET.get('project_id'),
+            'datastore': req.GET.get('datastore'),
+            'host': req.GET.get('host'),
+            'task_status': req.GET.get('task_status'),
+        }
+        limit = int(context.limit or CONF.instances_page_size)
 
         try:
-            instances = models.load_mgmt_instances(
-                context, deleted=deleted, include_clustered=include_clustered,
-                project_id=project_id)
+            instances, marker = models.load_mgmt_instances_page(
+                context, limit, context.marker, **filters)
         except nova_exceptions.ClientException as e:
             LOG.exception(e)
             return wsgi.Result(str(e), 403)
 
-        view_cls = views.MgmtInstancesView
-        return wsgi.Result(view_cls(instances, req=req).data(), 200)
+        view = views.MgmtInstancesView(instances, req=req)
+        if context.limit or context.marker:
+            paged = pagination.SimplePaginatedDataView(req.url, 'instances',
+                                                       view, marker)
+            return wsgi.Result(paged.data(), 200)
+
+        # Without pagination, all the instances are listed. They are loaded
+        # and sent a page at a time, the first page is loaded already so
+        # that the errors are reported.
+        def _iter_instances():
+            yield from instances
+            if marker:
+                for page in models.iter_mgmt_instances(
+                        context, limit, marker=marker, **filters):
+                    yield from page
+
+        return wsgi.StreamingResult(
+            'instances', (view.data_for_instance(instance)
+                          for instance in _iter_instances()))
 
     @admin_context
     def show(self, req, tenant_id, id):
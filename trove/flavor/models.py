@@ -17,10 +17,27 @@
 
 
 from novaclient import exceptions as nova_exceptions
+from trove.common import cache
+from trove.common import cfg
 from trove.common.clients import create_nova_client
 from trove.common import exception
 from trove.common.models import NovaRemoteModelBase
 
+CONF = cfg.CONF
+
+
+def get_flavor(context, client, flavor_id, region_name=None):
+    """Get a Nova flavor through the reference cache.
+
+    The flavors are cached per project and region, as the private flavors
+    are only visible to some projects.
+    """
+    region_name = region_name or CONF.service_credentials.region_name
+    project_id = context.project_id if context else None
+    return cache.get_reference_cache().get_or_load(
+        ('flavor', project_id, region_name, str(flavor_id)),
+        lambda: client.flavors.get(flavor_id))
+
 
 class Flavor(object):
 
@@ -33,7 +50,7 @@ class Flavor(object):
         if flavor_id and context:
             try:
                 client = create_nova_client(context)
-                self.flavor = client.flavors.get(flavor_id)
+                self.flavor = get_flavor(context, client, flavor_id)
             except nova_exceptions.NotFound:
                 raise exception.NotFound(uuid=flavor_id)
             except nova_exceptions.ClientException as e:
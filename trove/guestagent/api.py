@@ -25,6 +25,7 @@ from oslo_messaging.rpc.client import RemoteError
 from trove.common import cfg
 from trove.common import exception
 from trove.common.notification import NotificationCastWrapper
+from trove.common.rpc import version as rpc_version
 from trove import rpc
 
 CONF = cfg.CONF
@@ -40,13 +41,14 @@ class API(object):
                 start_db_with_conf_changes
               - Remove do_not_start_on_reboot from stop_db
               - Added online argument to resize_fs
+        * 1.2 - Accept the compact RPC payloads
 
     When updating this API, also update API_LATEST_VERSION
     """
 
     # API_LATEST_VERSION should bump the minor number each time
     # a method signature is added or changed
-    API_LATEST_VERSION = '1.1'
+    API_LATEST_VERSION = '1.2'
 
     # API_BASE_VERSION should only change on major version upgrade
     API_BASE_VERSION = '1.0'
@@ -60,10 +62,15 @@ class API(object):
         'newton': '1.0',
         'ussuri': '1.0',
         'victoria': '1.1',
+        'wallaby': '1.1',
+        'xena': '1.2',
 
         'latest': API_LATEST_VERSION
     }
 
+    # The compact RPC payloads are sent to the guests since this version.
+    COMPACT_PAYLOAD_VERSION = '1.2'
+
     def __init__(self, context, id):
         self.context = context
         self.id = id
@@ -84,9 +91,12 @@ class API(object):
         from trove.instance.models import get_instance_encryption_key
 
         instance_key = get_instance_encryption_key(self.id)
-        return rpc.get_client(target, key=instance_key,
-                              version_cap=version_cap,
-                              serializer=serializer)
+        return rpc.get_client(
+            target, key=instance_key, version_cap=version_cap,
+            serializer=serializer,
+            compact=(CONF.rpc_compact_payloads and
+                     rpc_version.version_is_compatible(
+                         version_cap, self.COMPACT_PAYLOAD_VERSION)))
 
     def _call(self, method_name, timeout_sec, version, **kwargs):
         LOG.debug("Calling %(name)s with timeout %(timeout)s",
@@ -184,7 +184,7 @@ class Manager(periodic_task.PeriodicTasks):
         LOG.debug("Starting to check database service status")
 
         status = self.get_service_status()
-        self.status.set_status(status)
+        self.status.report_status(status)
 
     def get_service_status(self):
         return self.status.get_actual_db_status()
@@ -776,6 +776,11 @@ class Manager(periodic_task.PeriodicTasks):
             self.status.set_status(service_status.ServiceStatuses.FAILED)
             raise exception.TroveError('Decryption key not configured for '
                                        'encrypted backup.')
+        if (backup_info["location"].endswith('.gcm') and
+                not CONF.backup_gcm_key):
+            self.status.set_status(service_status.ServiceStatuses.FAILED)
+            raise exception.TroveError('Encryption key not configured for '
+                                       'encrypted backup.')
 
         try:
             self.app.restore_backup(context, backup_info, restore_location)
@@ -28,7 +28,6 @@ from trove.guestagent import guest_log
 from trove.guestagent.common import operating_system
 from trove.guestagent.datastore import manager
 from trove.guestagent.utils import docker as docker_util
-from trove.guestagent.utils import mysql as mysql_util
 from trove.instance import service_status
 
 LOG = logging.getLogger(__name__)
@@ -49,17 +48,6 @@ class MySqlManager(manager.Manager):
     def configuration_manager(self):
         return self.app.configuration_manager
 
-    def get_service_status(self):
-        try:
-            with mysql_util.SqlClient(self.app.get_engine()) as client:
-                cmd = "SELECT 1;"
-                client.execute(cmd)
-
-            LOG.debug("Database service check: database query is responsive")
-            return service_status.ServiceStatuses.HEALTHY
-        except Exception:
-            return super(MySqlManager, self).get_service_status()
-
     def get_start_db_params(self, data_dir):
         return f'--datadir={data_dir}'
 
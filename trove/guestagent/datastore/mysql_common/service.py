@@ -18,6 +18,7 @@ import re
 import sqlalchemy
 import urllib
 
+import eventlet
 from oslo_log import log as logging
 from oslo_utils import encodeutils
 from sqlalchemy import exc
@@ -59,27 +60,80 @@ BACKUP_LOG = re.compile(r'.*Backup successfully, checksum: (?P<checksum>.*), '
                         r'location: (?P<location>.*)')
 
 
+def get_engine():
+    """Create the default engine with the updated admin user.
+
+    If admin user not created yet, use root instead.
+    """
+    global ENGINE
+    if ENGINE:
+        return ENGINE
+
+    try:
+        user = ADMIN_USER_NAME
+        password = service.BaseDbApp.get_auth_password()
+    except exception.UnprocessableEntity:
+        # os_admin user not created yet
+        user = 'root'
+        password = service.BaseDbApp.get_auth_password(file="root.cnf")
+
+    ENGINE = sqlalchemy.create_engine(
+        CONNECTION_STR_FORMAT % (user,
+                                 urllib.parse.quote(password.strip())),
+        pool_recycle=120, echo=CONF.sql_query_logging,
+        listeners=[mysql_util.BaseKeepAliveConnection()])
+
+    return ENGINE
+
+
 class BaseMySqlAppStatus(service.BaseDbStatus):
 
     def __init__(self, docker_client):
         super(BaseMySqlAppStatus, self).__init__(docker_client)
 
+    def _probe(self):
+        """Check the database with a query on a pooled connection.
+
+        :returns True if the query succeeded, False if it failed or timed
+                 out, None if no connection could be made.
+        """
+        timeout = CONF.database_probe_timeout
+        try:
+            with eventlet.Timeout(timeout):
+                connection = get_engine().connect()
+        except eventlet.Timeout:
+            LOG.warning('Timed out connecting to the database.')
+            return False
+        except Exception as exc:
+            LOG.debug('Failed to connect to the database, error: %s',
+                      str(exc))
+            return None
+
+        try:
+            with eventlet.Timeout(timeout):
+                connection.execute(text('SELECT 1'))
+            return True
+        except (Exception, eventlet.Timeout) as exc:
+            LOG.warning('Failed to query the database, error: %s', exc)
+            # Don't put a connection in an unknown state back in the pool.
+            connection.invalidate()
+            return False
+        finally:
+            connection.close()
+
     def get_actual_db_status(self):
         """Check database service status."""
-        status = docker_util.get_container_status(self.docker_client)
+        status = self.container_status.get()
         if status == "running":
-            root_pass = service.BaseDbApp.get_auth_password(file="root.cnf")
-            cmd = 'mysql -uroot -p%s -e "select 1;"' % root_pass
-            try:
-                docker_util.run_command(self.docker_client, cmd)
+            healthy = self._probe()
+            if healthy is None:
+                root_pass = service.BaseDbApp.get_auth_password(
+                    file="root.cnf")
+                healthy = self.exec_probe(
+                    'mysql -uroot -p%s -e "select 1;"' % root_pass)
+            if healthy:
                 return service_status.ServiceStatuses.HEALTHY
-            except Exception as exc:
-                LOG.warning('Failed to run docker command, error: %s',
-                            str(exc))
-                container_log = docker_util.get_container_logs(
-                    self.docker_client, tail='all')
-                LOG.debug('container log: \n%s', '\n'.join(container_log))
-                return service_status.ServiceStatuses.RUNNING
+            return service_status.ServiceStatuses.RUNNING
         elif status == "not running":
             return service_status.ServiceStatuses.SHUTDOWN
         elif status == "restarting":
@@ -429,29 +483,7 @@ class BaseMySqlApp(service.BaseDbApp):
     )
 
     def get_engine(self):
-        """Create the default engine with the updated admin user.
-
-        If admin user not created yet, use root instead.
-        """
-        global ENGINE
-        if ENGINE:
-            return ENGINE
-
-        try:
-            user = ADMIN_USER_NAME
-            password = self.get_auth_password()
-        except exception.UnprocessableEntity:
-            # os_admin user not created yet
-            user = 'root'
-            password = self.get_auth_password(file="root.cnf")
-
-        ENGINE = sqlalchemy.create_engine(
-            CONNECTION_STR_FORMAT % (user,
-                                     urllib.parse.quote(password.strip())),
-            pool_recycle=120, echo=CONF.sql_query_logging,
-            listeners=[mysql_util.BaseKeepAliveConnection()])
-
-        return ENGINE
+        return get_engine()
 
     def execute_sql(self, sql_statement):
         LOG.debug("Executing SQL: %s", sql_statement)
@@ -678,7 +710,9 @@ class BaseMySqlApp(service.BaseDbApp):
             f'--os-token={user_token} --os-auth-url={auth_url} '
             f'--os-tenant-id={user_tenant} '
             f'--restore-from={backup_info["location"]} '
-            f'--restore-checksum={backup_info["checksum"]}'
+            f'--restore-checksum={backup_info["checksum"]} '
+            f'{self.get_restore_download_params()} '
+            f'{self.get_encryption_params()}'
         )
         if CONF.backup_aes_cbc_key:
             command = (f"{command} "
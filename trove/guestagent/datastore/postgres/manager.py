@@ -82,6 +82,14 @@ class PostgresManager(manager.Manager):
         command = f"postgres -c config_file={service.CONFIG_FILE}"
         self.app.start_db(ds_version=ds_version, command=command)
 
+        if not snapshot and CONF.postgresql.wal_stream:
+            try:
+                self.app.start_wal_stream(context)
+            except Exception as err:
+                # The database is usable without the point-in-time recovery.
+                LOG.error('Failed to start the WAL streaming, error: %s',
+                          str(err))
+
     def apply_overrides(self, context, overrides):
         """Reload config."""
         LOG.info("Reloading database config.")
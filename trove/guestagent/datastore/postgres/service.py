@@ -13,6 +13,8 @@
 #    limitations under the License.
 from collections import OrderedDict
 
+from keystoneauth1.identity import v3
+from keystoneauth1 import session as ka_session
 from oslo_log import log as logging
 import psycopg2
 
@@ -40,27 +42,60 @@ CNF_INCLUDE_DIR = '/etc/postgresql/conf.d'
 HBA_CONFIG_FILE = '/etc/postgresql/pg_hba.conf'
 # The same with the path in archive_command config option.
 WAL_ARCHIVE_DIR = '/var/lib/postgresql/data/wal_archive'
+WAL_STREAM_CONTAINER = 'wal_stream'
+# The Keystone application credential of the WAL shipper.
+WAL_STREAM_CREDENTIAL_FILE = 'wal_stream.cnf'
 
 
 class PgSqlAppStatus(service.BaseDbStatus):
     def __init__(self, docker_client):
         super(PgSqlAppStatus, self).__init__(docker_client)
+        # The connection of the status checks, kept open between them.
+        self._connection = None
+
+    def _probe(self):
+        """Check the database with a query on a kept open connection.
+
+        The timeouts are enforced by the server, psycopg2 calls block.
+
+        :returns True if the query succeeded, False if it failed or timed
+                 out, None if no connection could be made.
+        """
+        timeout = CONF.database_probe_timeout
+        if self._connection is None or self._connection.closed:
+            try:
+                self._connection = psycopg2.connect(
+                    user=SUPER_USER_NAME, host='localhost',
+                    port=cfg.get_configuration_property('postgresql_port'),
+                    connect_timeout=timeout,
+                    options=f'-c statement_timeout={timeout * 1000}')
+                self._connection.autocommit = True
+            except Exception as exc:
+                LOG.debug('Failed to connect to the database, error: %s',
+                          str(exc))
+                self._connection = None
+                return None
+
+        try:
+            with self._connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception as exc:
+            LOG.warning('Failed to query the database, error: %s', str(exc))
+            self._connection.close()
+            self._connection = None
+            return False
 
     def get_actual_db_status(self):
         """Check database service status."""
-        status = docker_util.get_container_status(self.docker_client)
+        status = self.container_status.get()
         if status == "running":
-            cmd = "psql -U postgres -c 'select 1;'"
-            try:
-                docker_util.run_command(self.docker_client, cmd)
+            healthy = self._probe()
+            if healthy is None:
+                healthy = self.exec_probe("psql -U postgres -c 'select 1;'")
+            if healthy:
                 return service_status.ServiceStatuses.HEALTHY
-            except Exception as exc:
-                LOG.warning('Failed to run docker command, error: %s',
-                            str(exc))
-                container_log = docker_util.get_container_logs(
-                    self.docker_client, tail='all')
-                LOG.debug('container log: \n%s', '\n'.join(container_log))
-                return service_status.ServiceStatuses.RUNNING
+            return service_status.ServiceStatuses.RUNNING
         elif status == "not running":
             return service_status.ServiceStatuses.SHUTDOWN
         elif status == "paused":
@@ -265,8 +300,13 @@ class PgSqlApp(service.BaseDbApp):
             f'{os_cred} '
             f'--restore-from={backup_info["location"]} '
             f'--restore-checksum={backup_info["checksum"]} '
-            f'--pg-wal-archive-dir {WAL_ARCHIVE_DIR}'
+            f'--pg-wal-archive-dir {WAL_ARCHIVE_DIR} '
+            f'{self.get_restore_download_params()} '
+            f'{self.get_encryption_params()}'
         )
+        if backup_info.get('restore_target'):
+            command = (f"{command} "
+                       f"{self.get_restore_target_params(backup_info)}")
         if CONF.backup_aes_cbc_key:
             command = (f"{command} "
                        f"--backup-encryption-key={CONF.backup_aes_cbc_key}")
@@ -294,6 +334,94 @@ class PgSqlApp(service.BaseDbApp):
                                    CONF.database_service_uid, force=True,
                                    as_root=True)
 
+    def get_restore_target_params(self, backup_info):
+        """Backup container params to recover to a point in time.
+
+        The WAL is fetched from the WAL stream of the backup instance.
+        """
+        target = backup_info['restore_target']
+        params = (
+            f'--wal-stream-id={backup_info["instance_id"]} '
+            f'--swift-container={CONF.backup_swift_container} '
+            f'--wal-download-concurrency='
+            f'{CONF.postgresql.wal_stream_download_concurrency}')
+        if target.get('time'):
+            return f'{params} --restore-target-time={target["time"]}'
+        return f'{params} --restore-target-lsn={target["lsn"]}'
+
+    def _get_wal_stream_credential(self, context):
+        """Get the application credential of the WAL shipper.
+
+        The credential is created with the user token the first time and
+        saved next to the database passwords, so that it's kept when the
+        instance is rebuilt.
+
+        :returns the credential ID and secret.
+        """
+        cred_file = self.get_client_auth_file(WAL_STREAM_CREDENTIAL_FILE)
+        try:
+            cred = operating_system.read_file(
+                cred_file, codec=self.CFG_CODEC, as_root=True)['client']
+            return cred['user'], cred['password']
+        except exception.UnprocessableEntity:
+            pass
+
+        auth = v3.Token(CONF.service_credentials.auth_url,
+                        context.auth_token, project_id=context.project_id)
+        session = ka_session.Session(auth=auth)
+        resp = session.post(
+            f'/users/{context.user_id}/application_credentials',
+            endpoint_filter={
+                'service_type': 'identity', 'interface': 'public',
+                'region_name': CONF.service_credentials.region_name},
+            json={'application_credential': {
+                'name': f'trove-wal-stream-{CONF.guest_id}',
+                'description': f'WAL streaming of the database instance '
+                               f'{CONF.guest_id}'}})
+        cred = resp.json()['application_credential']
+        operating_system.write_file(
+            cred_file,
+            {'client': {'user': cred['id'], 'password': cred['secret']}},
+            codec=self.CFG_CODEC, as_root=True)
+        LOG.info('Created the application credential %s for the WAL '
+                 'streaming.', cred['id'])
+        return cred['id'], cred['secret']
+
+    def start_wal_stream(self, context):
+        """Ship the archived WAL files to the backup storage continuously.
+
+        The shipper container is restarted by docker like the database
+        container, it only needs to be started once.
+        """
+        cred_id, cred_secret = self._get_wal_stream_credential(context)
+        command = (
+            f'/usr/bin/python3 main.py --wal-stream '
+            f'--wal-stream-id={CONF.guest_id} '
+            f'--storage-driver={CONF.storage_strategy} '
+            f'--driver={cfg.get_configuration_property("backup_strategy")} '
+            f'--os-auth-url={CONF.service_credentials.auth_url} '
+            f'--os-tenant-id={context.project_id} '
+            f'--os-application-credential-id={cred_id} '
+            f'--os-application-credential-secret={cred_secret} '
+            f'--swift-container={CONF.backup_swift_container} '
+            f'--pg-wal-archive-dir={WAL_ARCHIVE_DIR} '
+            f'--wal-batch-size={CONF.postgresql.wal_stream_batch_size} '
+            f'--wal-batch-timeout={CONF.postgresql.wal_stream_batch_timeout} '
+            f'--compression={CONF.backup_compression} '
+            f'{self.get_encryption_params()}'
+        )
+        volumes = {
+            '/var/lib/postgresql/data': {
+                'bind': '/var/lib/postgresql/data', 'mode': 'ro'
+            }
+        }
+
+        LOG.info('Starting the WAL streaming of instance %s.', CONF.guest_id)
+        docker_util.start_container(
+            self.docker_client,
+            cfg.get_configuration_property('backup_docker_image'),
+            name=WAL_STREAM_CONTAINER, volumes=volumes, command=command)
+
     def is_replica(self):
         """Wrapper for pg_is_in_recovery() for detecting a server in
         standby mode
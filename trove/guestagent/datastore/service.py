@@ -12,7 +12,9 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import json
 import os
+import random
 import re
 import time
 
@@ -35,6 +37,7 @@ LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 BACKUP_LOG_RE = re.compile(r'.*Backup successfully, checksum: '
                            r'(?P<checksum>.*), location: (?P<location>.*)')
+BACKUP_STATS_RE = re.compile(r'.*Backup statistics: (?P<stats>\{.*\})')
 
 
 class BaseDbStatus(object):
@@ -55,6 +58,16 @@ class BaseDbStatus(object):
     def __init__(self, docker_client):
         self.status = None
         self.docker_client = docker_client
+        self.container_status = docker_util.ContainerStatusCache(
+            docker_client)
+
+        # The status last sent to the conductor and the current keepalive
+        # interval. The keepalives are sent on the report_interval ticks
+        # that are a multiple of the interval, the random initial tick
+        # spreads them across the guests.
+        self._reported_status = None
+        self._keepalive = None
+        self._tick = random.randrange(self._get_max_keepalive_ticks())
 
         self.__prepare_completed = None
 
@@ -121,6 +134,25 @@ class BaseDbStatus(object):
     def get_actual_db_status(self):
         raise NotImplementedError()
 
+    def exec_probe(self, command):
+        """Check the database with a client command run in the container.
+
+        This forks a process in the container, it's the fallback of the
+        checks using a connection of the guest agent.
+
+        :returns True if the command succeeded.
+        """
+        try:
+            docker_util.run_command(self.docker_client, command)
+            return True
+        except Exception as exc:
+            LOG.warning('Failed to run docker command, error: %s', str(exc))
+            if LOG.isEnabledFor(logging.DEBUG):
+                container_log = docker_util.get_container_logs(
+                    self.docker_client)
+                LOG.debug('container log: \n%s', '\n'.join(container_log))
+            return False
+
     @property
     def is_installed(self):
         """
@@ -144,22 +176,68 @@ class BaseDbStatus(object):
                       "(status is '%s').", status.description)
             context = trove_context.TroveContext()
 
-            heartbeat = {'service_status': status.description}
+            keepalive = self._get_keepalive(status)
+            heartbeat = {'service_status': status.description,
+                         'keepalive': keepalive}
             conductor_api.API(context).heartbeat(
                 CONF.guest_id, heartbeat,
                 sent=timeutils.utcnow_ts(microsecond=True))
             LOG.debug("Successfully cast set_status.")
             self.status = status
+            self._reported_status = status
+            self._keepalive = keepalive
         else:
             LOG.debug("Prepare has not completed yet, skipping heartbeat.")
 
+    @staticmethod
+    def _get_max_keepalive_ticks():
+        """The maximum report_interval ticks between the heartbeats.
+
+        A keepalive is sent at most one tick after it is due, the interval
+        is kept one tick below agent_heartbeat_expiry so that a live guest
+        is never considered unreachable.
+        """
+        keepalive = min(CONF.agent_keepalive_interval,
+                        CONF.agent_heartbeat_expiry - CONF.report_interval)
+        return max(keepalive // CONF.report_interval, 1)
+
+    def _get_keepalive(self, status):
+        """The maximum seconds until the next heartbeat.
+
+        The interval is reset to report_interval when the status changes,
+        otherwise it doubles up to agent_keepalive_interval, in whole
+        report_interval ticks.
+        """
+        if status != self._reported_status or not self._keepalive:
+            ticks = 1
+        else:
+            ticks = self._keepalive // CONF.report_interval * 2
+        ticks = min(ticks, self._get_max_keepalive_ticks())
+        return ticks * CONF.report_interval
+
+    def report_status(self, status):
+        """Send a heartbeat if the status changed or a keepalive is due.
+
+        The status is checked every report_interval seconds, a heartbeat is
+        sent straight away when it changes, otherwise on the ticks that are
+        a multiple of the keepalive interval, which is at most the keepalive
+        interval after the last heartbeat.
+        """
+        self._tick += 1
+        if (status == self._reported_status and self._keepalive and
+                self._tick % (self._keepalive // CONF.report_interval)):
+            LOG.debug("Status is still '%s', skipping heartbeat.",
+                      status.description)
+            return
+        self.set_status(status)
+
     def update(self):
         """Find and report status of DB on this machine.
         The database is updated and the status is also returned.
         """
         if self.is_installed:
             status = self.get_actual_db_status()
-            self.set_status(status)
+            self.report_status(status)
 
     def start_db_service(self, service_candidates, timeout,
                          enable_on_boot=True, update_db=False):
@@ -412,6 +490,36 @@ class BaseDbApp(object):
     def get_backup_strategy(self):
         return cfg.get_configuration_property('backup_strategy')
 
+    def get_restore_download_params(self):
+        """Backup container params to download the backup data."""
+        return (
+            f'--swift-download-concurrency='
+            f'{CONF.backup_download_concurrency} '
+            f'--swift-download-part-size={CONF.backup_download_part_size} '
+            f'--swift-download-window={CONF.backup_download_window}')
+
+    def get_encryption_params(self):
+        """Backup container params to encrypt or decrypt the backup data."""
+        if not CONF.backup_gcm_key:
+            return ''
+        return f'--gcm-key={CONF.backup_gcm_key}'
+
+    def get_backup_stats(self, output):
+        """Get the statistics record from the backup container output.
+
+        The backup containers built before the statistics were introduced
+        don't output it.
+        """
+        for line in reversed(output):
+            match = BACKUP_STATS_RE.match(line)
+            if match:
+                try:
+                    return json.loads(match.group('stats'))
+                except ValueError:
+                    LOG.warning(f'Cannot parse backup statistics: {line}')
+                    return None
+        return None
+
     def create_backup(self, context, backup_info, volumes_mapping={},
                       need_dbuser=True, extra_params=''):
         storage_driver = CONF.storage_strategy
@@ -444,8 +552,18 @@ class BaseDbApp(object):
         )
         swift_container = (backup_info.get('swift_container') or
                            CONF.backup_swift_container)
-        swift_params = (f'--swift-extra-metadata={swift_metadata} '
-                        f'--swift-container={swift_container}')
+        swift_params = (
+            f'--swift-extra-metadata={swift_metadata} '
+            f'--swift-container={swift_container} '
+            f'--swift-segment-size={CONF.backup_segment_max_size} '
+            f'--swift-upload-concurrency={CONF.backup_upload_concurrency}')
+
+        compression = (
+            f'--compression={CONF.backup_compression} '
+            f'--compression-threads={CONF.backup_compression_threads}')
+        if CONF.backup_compression_level:
+            compression = (f'{compression} --compression-level='
+                           f'{CONF.backup_compression_level}')
 
         command = (
             f'/usr/bin/python3 main.py --backup --backup-id={backup_id} '
@@ -453,6 +571,8 @@ class BaseDbApp(object):
             f'{os_cred} '
             f'{db_userinfo} '
             f'{swift_params} '
+            f'{compression} '
+            f'{self.get_encryption_params()} '
             f'{incremental} '
             f'{extra_params}'
         )
@@ -493,6 +613,10 @@ class BaseDbApp(object):
                     'success': True,
                     'state': BackupState.COMPLETED,
                 })
+                stats = self.get_backup_stats(output)
+                if stats:
+                    LOG.info(f'Backup {backup_id} statistics: {stats}')
+                    backup_state['stats'] = stats
             else:
                 msg = f'Cannot parse backup output: {result}'
                 LOG.error(msg)
@@ -14,6 +14,7 @@
 import re
 
 import docker
+import eventlet
 from oslo_log import log as logging
 from oslo_utils import encodeutils
 
@@ -124,6 +125,67 @@ def get_container_status(client, name="database"):
         return "unknown"
 
 
+class ContainerStatusCache(object):
+    """The status of a container, looked up again only after its events.
+
+    The Docker events of the container are watched by a green thread, any
+    event clears the cached status. The status is looked up every time
+    while the events can't be watched.
+    """
+
+    def __init__(self, client, name="database"):
+        self.client = client
+        self.name = name
+        self._status = None
+        # Incremented by the events, so that a status looked up while an
+        # event is received is not cached.
+        self._generation = 0
+        self._watching = False
+
+    def _watch(self):
+        try:
+            # The events are subscribed to before the status is looked up,
+            # so that no change is missed in between.
+            events = self.client.events(
+                decode=True,
+                filters={'type': 'container', 'container': self.name})
+        except Exception as e:
+            LOG.debug('Failed to watch the events of container %s, '
+                      'error: %s', self.name, str(e))
+            return
+        self._watching = True
+        eventlet.spawn(self._consume, events)
+
+    def _consume(self, events):
+        try:
+            for event in events:
+                LOG.debug('Container %s event: %s', self.name,
+                          event.get('Action', event.get('status')))
+                self._clear()
+        except Exception as e:
+            LOG.warning('Stopped watching the events of container %s, '
+                        'error: %s', self.name, str(e))
+        finally:
+            self._watching = False
+            self._clear()
+
+    def _clear(self):
+        self._generation += 1
+        self._status = None
+
+    def get(self):
+        if not self._watching:
+            self._watch()
+        status = self._status
+        if status is None:
+            generation = self._generation
+            status = get_container_status(self.client, self.name)
+            if (self._watching and generation == self._generation and
+                    status != "unknown"):
+                self._status = status
+        return status
+
+
 def run_command(client, command, name="database"):
     container = client.containers.get(name)
     # output is Bytes type
@@ -21,14 +21,16 @@ import json
 import os.path
 import re
 
+import eventlet
+from eventlet import greenpool
 from novaclient import exceptions as nova_exceptions
 from oslo_config.cfg import NoSuchOptError
 from oslo_log import log as logging
-from oslo_utils import encodeutils
 from oslo_utils import netutils
 from sqlalchemy import func
 
 from trove.backup.models import Backup
+from trove.common import cache
 from trove.common import cfg
 from trove.common import clients
 from trove.common import crypto_utils as cu
@@ -48,6 +50,7 @@ from trove.datastore.models import DBDatastoreVersionMetadata
 from trove.db import get_db_api
 from trove.db import models as dbmodels
 from trove.extensions.security_group.models import SecurityGroup
+from trove.flavor import models as flavor_models
 from trove.instance import service_status as srvstatus
 from trove.instance.tasks import InstanceTask
 from trove.instance.tasks import InstanceTasks
@@ -138,6 +141,22 @@ def load_simple_instance_server_status(context, db_info):
             db_info.server_status = "SHUTDOWN"
 
 
+def _get_port_addresses(port, floating_ips):
+    """Get the private and public addresses of a user port."""
+    addresses = []
+    for ip in port['fixed_ips']:
+        # TODO(lxkong): IPv6 is not supported
+        if netutils.is_valid_ipv4(ip.get('ip_address')):
+            addresses.append(
+                {'address': ip['ip_address'], 'type': 'private'})
+
+    if floating_ips:
+        addresses.append(
+            {'address': floating_ips[0]['floating_ip_address'],
+             'type': 'public'})
+    return addresses
+
+
 def load_simple_instance_addresses(context, db_info):
     """Get addresses of the instance from Neutron."""
     if 'BUILDING' == db_info.task_status.action:
@@ -154,23 +173,65 @@ def load_simple_instance_addresses(context, db_info):
                       db_info.id)
 
             user_ports.append(port['id'])
-            for ip in port['fixed_ips']:
-                # TODO(lxkong): IPv6 is not supported
-                if netutils.is_valid_ipv4(ip.get('ip_address')):
-                    addresses.append(
-                        {'address': ip['ip_address'], 'type': 'private'})
-
             fips = client.list_floatingips(port_id=port['id'])
-            if len(fips['floatingips']) == 0:
-                continue
-            fip = fips['floatingips'][0]
-            addresses.append(
-                {'address': fip['floating_ip_address'], 'type': 'public'})
+            addresses.extend(
+                _get_port_addresses(port, fips['floatingips']))
 
     db_info.ports = user_ports
     db_info.addresses = addresses
 
 
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def load_simple_instances_addresses(context, db_infos):
+    """Get addresses of many instances from Neutron.
+
+    The ports of all the instances in a region, then the floating IPs of
+    all their user ports, are listed with a few filtered calls (the IDs are
+    sent in chunks to keep the URLs short), and matched to the instances in
+    memory.
+    """
+    by_region = {}
+    for db_info in db_infos:
+        if 'BUILDING' == db_info.task_status.action:
+            db_info.addresses = []
+            continue
+        db_info.addresses = []
+        db_info.ports = []
+        by_region.setdefault(db_info.region_id, []).append(db_info)
+
+    chunk_size = CONF.neutron_filter_chunk_size
+    for region_id, region_infos in by_region.items():
+        client = clients.create_neutron_client(context, region_id)
+        by_device = {db_info.compute_instance_id: db_info
+                     for db_info in region_infos}
+
+        user_ports = []
+        for device_ids in _chunks(list(by_device), chunk_size):
+            for port in client.list_ports(device_id=device_ids)['ports']:
+                if (port['device_id'] in by_device and
+                        port['network_id'] not in CONF.management_networks):
+                    user_ports.append(port)
+
+        floating_ips = {}
+        port_ids = [port['id'] for port in user_ports]
+        for chunk in _chunks(port_ids, chunk_size):
+            for fip in client.list_floatingips(
+                    port_id=chunk)['floatingips']:
+                floating_ips.setdefault(fip['port_id'], []).append(fip)
+
+        for port in user_ports:
+            db_info = by_device[port['device_id']]
+            LOG.debug('Found user port %s for instance %s', port['id'],
+                      db_info.id)
+            db_info.ports.append(port['id'])
+            db_info.addresses.extend(
+                _get_port_addresses(port, floating_ips.get(port['id'])))
+
+
 class SimpleInstance(object):
     """A simple view of an instance.
     This gets loaded directly from the local database, so its cheaper than
@@ -204,15 +265,16 @@ class SimpleInstance(object):
         self.root_pass = root_password
         self._fault = None
         self._fault_loaded = False
-        self.ds_version = None
-        self.ds = None
+        self._metadata = None
+        self.ds_version = ds_version
+        self.ds = ds
         self.locality = locality
         self.slave_list = None
 
-        if ds_version is None and self.db_info.datastore_version_id:
+        if self.ds_version is None and self.db_info.datastore_version_id:
             self.ds_version = (datastore_models.DatastoreVersion.
                                load_by_uuid(self.db_info.datastore_version_id))
-        if ds is None and self.ds_version:
+        if self.ds is None and self.ds_version:
             self.ds = (datastore_models.Datastore.
                        load(self.ds_version.datastore_id))
 
@@ -221,12 +283,14 @@ class SimpleInstance(object):
 
     @property
     def metadata(self):
-        return metadata_models.Metadata.list(
-            project_id=self.context.project_id,
-            resource_type='instances',
-            resource_id=self.db_info.id,
-            exclude=True
-        )
+        if self._metadata is None:
+            self._metadata = metadata_models.Metadata.list(
+                project_id=self.context.project_id,
+                resource_type='instances',
+                resource_id=self.db_info.id,
+                exclude=True
+            )
+        return self._metadata
 
     @property
     def addresses(self):
@@ -637,27 +701,87 @@ def load_metadata_info(db_info):
     )
 
 
+def load_concurrently(loaders, instance_id):
+    """Run independent loaders of an instance concurrently.
+
+    Each loader runs in its own green thread and sets what it loads on the
+    instance. A loader taking more than instance_detail_load_timeout seconds
+    is cancelled and what it was loading is left unset, the errors raised by
+    the loaders are raised again.
+
+    :param loaders: Dict of the loader names and the callables.
+    """
+    timeout = CONF.instance_detail_load_timeout or None
+
+    def _load(name, loader):
+        timer = eventlet.Timeout(timeout)
+        try:
+            loader()
+        except eventlet.Timeout as t:
+            if t is not timer:
+                raise
+            LOG.warning('Timed out loading the %(name)s of instance '
+                        '%(instance)s after %(timeout)ss.',
+                        {'name': name, 'instance': instance_id,
+                         'timeout': timeout})
+        finally:
+            timer.cancel()
+
+    pool = greenpool.GreenPool(len(loaders))
+    jobs = [pool.spawn(_load, name, loader)
+            for name, loader in loaders.items()]
+    for job in jobs:
+        job.wait()
+
+
 def load_instance_with_info(cls, context, ins_id, cluster_id=None):
     db_info = get_db_info(context, ins_id, cluster_id)
     service_status = InstanceServiceStatus.find_by(instance_id=ins_id)
 
     update_service_status(db_info.task_status, service_status, ins_id)
 
-    load_simple_instance_server_status(context, db_info)
-
-    load_simple_instance_addresses(context, db_info)
-
     load_metadata_info(db_info)
 
     instance = cls(context, db_info, service_status)
 
-    load_guest_info(instance, context, ins_id)
+    def _load_server_and_guest():
+        load_simple_instance_server_status(context, db_info)
+        # Whether the guest can be contacted depends on the server status.
+        load_guest_info(instance, context, ins_id)
 
-    load_server_group_info(instance, context)
+    load_concurrently({
+        'server': _load_server_and_guest,
+        'addresses': lambda: load_simple_instance_addresses(context, db_info),
+        'server group': lambda: load_server_group_info(instance, context),
+    }, ins_id)
 
     return instance
 
 
+def get_instance_version(db_info):
+    """The update times of the rows which change with the instance state."""
+    status = InstanceServiceStatus.get_by(instance_id=db_info.id)
+    return db_info.id, db_info.updated, status.updated_at if status else None
+
+
+def get_instances_version(context):
+    """The number and the last update times of the instances of the project.
+
+    They change whenever an instance of the project or its service status is
+    created, updated or deleted.
+    """
+    instances = DBInstance.query().filter(
+        DBInstance.tenant_id == context.project_id).with_entities(
+        func.count(DBInstance.id), func.max(DBInstance.updated)).one()
+    statuses_updated = InstanceServiceStatus.query().join(
+        DBInstance, DBInstance.id == InstanceServiceStatus.instance_id
+    ).filter(
+        DBInstance.tenant_id == context.project_id,
+        DBInstance.deleted == 0
+    ).with_entities(func.max(InstanceServiceStatus.updated_at)).scalar()
+    return tuple(instances) + (statuses_updated,)
+
+
 def load_guest_info(instance, context, id):
     if instance.status not in AGENT_INVALID_STATUSES:
         guest = clients.create_guest_client(context, id)
@@ -693,7 +817,8 @@ class BaseInstance(SimpleInstance):
     -----------
     """
 
-    def __init__(self, context, db_info, server, datastore_status):
+    def __init__(self, context, db_info, server, datastore_status,
+                 ds_version=None, ds=None):
         """
         Creates a new initialized representation of an instance composed of its
         state in the database and its state from Nova
@@ -711,7 +836,8 @@ class BaseInstance(SimpleInstance):
         :type server: novaclient.v2.servers.Server
         :typdatastore_statusus: trove.instance.models.InstanceServiceStatus
         """
-        super(BaseInstance, self).__init__(context, db_info, datastore_status)
+        super(BaseInstance, self).__init__(context, db_info, datastore_status,
+                                           ds_version=ds_version, ds=ds)
         self.server = server
         self._guest = None
         self._nova_client = None
@@ -952,7 +1078,9 @@ class BaseInstance(SimpleInstance):
             pass
 
     def get_flavor(self):
-        return self.nova_client.flavors.get(self.flavor_id)
+        return flavor_models.get_flavor(self.context, self.nova_client,
+                                        self.flavor_id,
+                                        region_name=self.db_info.region_id)
 
     @property
     def volume_client(self):
@@ -1145,7 +1273,8 @@ class Instance(BuiltInstance):
                availability_zone=None, nics=None,
                configuration_id=None, slave_of_id=None, cluster_config=None,
                replica_count=None, volume_type=None, modules=None,
-               locality=None, region_name=None, access=None):
+               locality=None, region_name=None, access=None,
+               restore_target=None):
         nova_client = clients.create_nova_client(context)
         cinder_client = clients.create_cinder_client(context)
         datastore_cfg = CONF.get(datastore_version.manager)
@@ -1178,7 +1307,7 @@ class Instance(BuiltInstance):
                     datastore_version_id=datastore_version.id,
                     id=flavor_id)
         try:
-            flavor = nova_client.flavors.get(flavor_id)
+            flavor = flavor_models.get_flavor(context, nova_client, flavor_id)
         except nova_exceptions.NotFound:
             raise exception.FlavorNotFound(uuid=flavor_id)
 
@@ -1224,6 +1353,12 @@ class Instance(BuiltInstance):
                     raise exception.LocalStorageNotSpecified(flavor=flavor_id)
                 target_size = flavor.ephemeral  # ephemeral_Storage
 
+        if restore_target and datastore_version.manager != 'postgresql':
+            # Only the PostgreSQL WAL is streamed to the backup storage.
+            raise exception.DatastoreOperationNotSupported(
+                operation='restore to a point in time',
+                datastore=datastore_version.manager)
+
         if backup_id:
             Backup.verify_swift_auth_token(context)
 
@@ -1376,7 +1511,8 @@ class Instance(BuiltInstance):
                 nics, overrides, slave_of_id, cluster_config,
                 volume_type=volume_type, modules=module_list,
                 locality=locality, access=access,
-                ds_version=datastore_version.version)
+                ds_version=datastore_version.version,
+                restore_target=restore_target)
 
             return SimpleInstance(context, db_info, service_status,
                                   root_password, locality=locality)
@@ -1536,9 +1672,7 @@ class Instance(BuiltInstance):
                                        " source.") % self.id)
 
         service = InstanceServiceStatus.find_by(instance_id=self.id)
-        last_heartbeat_delta = timeutils.utcnow() - service.updated_at
-        agent_expiry_interval = timedelta(seconds=CONF.agent_heartbeat_expiry)
-        if last_heartbeat_delta < agent_expiry_interval:
+        if service.is_uptodate():
             raise exception.BadRequest(_("Replica Source %s cannot be ejected"
                                          " as it has a current heartbeat")
                                        % self.id)
@@ -1765,41 +1899,137 @@ class Instance(BuiltInstance):
         task_api.API(self.context).update_access(self.id, access)
 
 
+def load_service_statuses(db_infos):
+    """Get the service statuses of the instances with one query."""
+    ids = [db_info.id for db_info in db_infos]
+    if not ids:
+        return {}
+    statuses = InstanceServiceStatus.find_by_filter(
+        filters=[InstanceServiceStatus.instance_id.in_(ids)])
+    return {status.instance_id: status for status in statuses}
+
+
+def load_datastore_versions(db_infos):
+    """Get the datastore versions and datastores of the instances.
+
+    :returns the datastore versions by ID and the datastores by ID, loaded
+             with one query each.
+    """
+    version_ids = {db_info.datastore_version_id for db_info in db_infos
+                   if db_info.datastore_version_id}
+    if not version_ids:
+        return {}, {}
+    ds_versions = {
+        db_version.id: datastore_models.DatastoreVersion(db_version)
+        for db_version in datastore_models.DBDatastoreVersion.find_by_filter(
+            filters=[datastore_models.DBDatastoreVersion.id.in_(
+                version_ids)])}
+
+    datastore_ids = {ds_version.datastore_id
+                     for ds_version in ds_versions.values()}
+    datastores = {
+        db_datastore.id: datastore_models.Datastore(db_datastore)
+        for db_datastore in datastore_models.DBDatastore.find_by_filter(
+            filters=[datastore_models.DBDatastore.id.in_(datastore_ids)])}
+    return ds_versions, datastores
+
+
+def load_instances_metadata(context, instances):
+    """Load the metadata of the instances with one query."""
+    metadata = metadata_models.Metadata.list_by_resources(
+        project_id=context.project_id, resource_type='instances',
+        resource_ids=[instance.id for instance in instances])
+    for instance in instances:
+        instance._metadata = metadata[instance.id]
+
+
+def load_instances_slaves(instances):
+    """Load the replicas of the instances with one query."""
+    by_id = {instance.id: instance for instance in instances}
+    if not by_id:
+        return
+    for instance in instances:
+        instance.slave_list = []
+    slaves = DBInstance.find_by_filter(
+        filters=[DBInstance.slave_of_id.in_(list(by_id))], deleted=False)
+    for slave in slaves:
+        instance = by_id[slave.slave_of_id]
+        if slave.tenant_id == instance.tenant_id:
+            instance.slave_list.append(slave)
+
+
 def create_server_list_matcher(server_list):
     # Returns a method which finds a server from the given list.
+    servers = {}
+    duplicates = set()
+    for server in server_list:
+        if server.id in servers:
+            duplicates.add(server.id)
+        servers[server.id] = server
+
     def find_server(instance_id, server_id):
-        matches = [server for server in server_list if server.id == server_id]
-        if len(matches) == 1:
-            return matches[0]
-        elif len(matches) < 1:
-            # The instance was not found in the list and
-            # this can happen if the instance is deleted from
-            # nova but still in trove database
-            raise exception.ComputeInstanceNotFound(
-                instance_id=instance_id, server_id=server_id)
-        else:
+        if server_id in duplicates:
             # Should never happen, but never say never.
             LOG.error("Server %(server)s for instance %(instance)s was "
                       "found twice!", {'server': server_id,
                                        'instance': instance_id})
             raise exception.TroveError(uuid=instance_id)
+        try:
+            return servers[server_id]
+        except KeyError:
+            # The instance was not found in the list and
+            # this can happen if the instance is deleted from
+            # nova but still in trove database
+            raise exception.ComputeInstanceNotFound(
+                instance_id=instance_id, server_id=server_id)
 
     return find_server
 
 
+def load_servers(context, db_infos):
+    """Get the Nova servers of the instances by ID.
+
+    Only the servers of the given instances are fetched, instead of all the
+    servers of the project, the servers are fetched concurrently across all
+    the regions.
+    """
+    default_region = CONF.service_credentials.region_name
+    server_ids = {}
+    for db_info in db_infos:
+        if (InstanceTasks.BUILDING == db_info.task_status or
+                not db_info.compute_instance_id):
+            continue
+        region = db_info.region_id or default_region
+        server_ids.setdefault(region, []).append(db_info.compute_instance_id)
+
+    def _get_server(client, server_id):
+        try:
+            return client.servers.get(server_id)
+        except nova_exceptions.NotFound:
+            return None
+
+    pool = greenpool.GreenPool(CONF.nova_server_fetch_concurrency)
+    jobs = []
+    for region, ids in server_ids.items():
+        client = clients.create_nova_client(context, region_name=region)
+        jobs.extend(pool.spawn(_get_server, client, server_id)
+                    for server_id in ids)
+    servers = [job.wait() for job in jobs]
+    return [server for server in servers if server is not None]
+
+
 class Instances(object):
     DEFAULT_LIMIT = CONF.instances_page_size
 
     @staticmethod
     def load(context, include_clustered, instance_ids=None):
 
-        def load_simple_instance(context, db_info, status, **kwargs):
-            return SimpleInstance(context, db_info, status)
+        def load_simple_instance(context, db_info, status, server=None,
+                                 **kwargs):
+            return SimpleInstance(context, db_info, status, **kwargs)
 
         if context is None:
             raise TypeError(_("Argument context not defined."))
-        client = clients.create_nova_client(context)
-        servers = client.servers.list(limit=-1)
         query_opts = {'tenant_id': context.project_id,
                       'deleted': False}
         if not include_clustered:
@@ -1817,14 +2047,12 @@ class Instances(object):
                                                   marker=context.marker)
         next_marker = data_view.next_page_marker
 
-        find_server = create_server_list_matcher(servers)
-        for db in db_infos:
-            LOG.debug("Checking for db [id=%(db_id)s, "
-                      "compute_instance_id=%(instance_id)s].",
-                      {'db_id': db.id, 'instance_id': db.compute_instance_id})
+        # Only the servers of the page are fetched from Nova.
+        find_server = create_server_list_matcher(
+            load_servers(context, data_view.collection))
         ret = Instances._load_servers_status(load_simple_instance, context,
                                              data_view.collection,
-                                             find_server)
+                                             find_server, all_regions=True)
         return ret, next_marker
 
     @staticmethod
@@ -1845,8 +2073,22 @@ class Instances(object):
         return db_insts
 
     @staticmethod
-    def _load_servers_status(load_instance, context, db_items, find_server):
+    def _load_servers_status(load_instance, context, db_items, find_server,
+                             all_regions=False):
+        """Load the instances with the status of their servers.
+
+        :param find_server: Finds the servers of the default region, or of
+                            all the regions if all_regions is True, the
+                            servers of the other regions are fetched one by
+                            one otherwise.
+        """
         ret = []
+        # The addresses are loaded for all the instances at once, the
+        # instance objects only read them from db_info later.
+        address_dbs = []
+        db_items = list(db_items)
+        service_statuses = load_service_statuses(db_items)
+        ds_versions, datastores = load_datastore_versions(db_items)
         for db in db_items:
             server = None
             try:
@@ -1856,7 +2098,8 @@ class Instances(object):
                 else:
                     try:
                         region = CONF.service_credentials.region_name
-                        if (not db.region_id or db.region_id == region):
+                        if (all_regions or not db.region_id or
+                                db.region_id == region):
                             server = find_server(db.id, db.compute_instance_id)
                         else:
                             nova_client = clients.create_nova_client(
@@ -1864,15 +2107,14 @@ class Instances(object):
                             server = nova_client.servers.get(
                                 db.compute_instance_id)
                         db.server_status = server.status
-
-                        load_simple_instance_addresses(context, db)
+                        address_dbs.append(db)
                     except exception.ComputeInstanceNotFound:
                         db.server_status = "SHUTDOWN"  # Fake it...
                         db.addresses = []
 
-                service_status = InstanceServiceStatus.find_by(
-                    instance_id=db.id)
-                if not service_status.status:  # This should never happen.
+                service_status = service_statuses.get(db.id)
+                # This should never happen.
+                if not service_status or not service_status.status:
                     LOG.error("Server status could not be read for "
                               "instance id(%s).", db.id)
                     continue
@@ -1886,9 +2128,17 @@ class Instances(object):
                           "instance id(%s).", db.id)
                 continue
 
+            ds_version = ds_versions.get(db.datastore_version_id)
+            ds = (datastores.get(ds_version.datastore_id) if ds_version
+                  else None)
             ret.append(
-                load_instance(context, db, service_status, server=server)
+                load_instance(context, db, service_status, server=server,
+                              ds_version=ds_version, ds=ds)
             )
+
+        load_simple_instances_addresses(context, address_dbs)
+        load_instances_metadata(context, ret)
+        load_instances_slaves(ret)
         return ret
 
 
@@ -1957,41 +2207,49 @@ class DBInstance(dbmodels.DatabaseModelBase):
     task_status = property(get_task_status, set_task_status)
 
 
-class instance_encryption_key_cache(object):
-    def __init__(self, func, lru_cache_size=10):
-        self._table = {}
-        self._lru = []
-        self._lru_cache_size = lru_cache_size
-        self._func = func
-
-    def get(self, instance_id):
-        if instance_id in self._table:
-            if self._lru.index(instance_id) > 0:
-                self._lru.remove(instance_id)
-                self._lru.insert(0, instance_id)
+class instance_encryption_key_cache(cache.TTLCache):
+    """The cache of the RPC encryption keys of the instances.
 
-            return self._table[instance_id]
-        else:
-            val = self._func(instance_id)
+    The keys are decrypted once and kept with their derived cipher key, see
+    crypto_utils.EncryptionKey.
 
-            # BUG(1650518): Cleanup in the Pike release
-            if val is None:
-                return val
+    :param func: Loads the key of an instance.
+    :param lru_cache_size: Maximum number of keys, instance_key_cache_size
+                           by default.
+    :param ttl: Seconds a key is kept, instance_key_cache_ttl by default.
+    """
 
-            # We need string anyway
-            if isinstance(val, bytes):
-                val = encodeutils.safe_decode(val)
+    def __init__(self, func, lru_cache_size=None, ttl=None):
+        super(instance_encryption_key_cache, self).__init__(lru_cache_size,
+                                                            ttl)
+        self._func = func
 
-            if len(self._lru) == self._lru_cache_size:
-                tail = self._lru.pop()
-                del self._table[tail]
+    @property
+    def maxsize(self):
+        return self._maxsize or CONF.instance_key_cache_size
 
-            self._lru.insert(0, instance_id)
-            self._table[instance_id] = val
-            return self._table[instance_id]
+    @property
+    def ttl(self):
+        return CONF.instance_key_cache_ttl if self._ttl is None else self._ttl
 
     def __getitem__(self, instance_id):
-        return self.get(instance_id)
+        key = self.get(instance_id)
+        if key is not None:
+            return key
+
+        key = self._func(instance_id)
+        # BUG(1650518): Cleanup in the Pike release
+        if key is None:
+            return key
+
+        if isinstance(key, (bytes, str)):
+            key = cu.EncryptionKey(key)
+        self.set(instance_id, key)
+        LOG.debug('Loaded the encryption key of instance %(instance)s, key '
+                  'cache: %(stats)s',
+                  {'instance': instance_id,
+                   'stats': get_instance_encryption_key_cache_stats()})
+        return key
 
 
 def _get_instance_encryption_key(instance_id):
@@ -2011,6 +2269,14 @@ def get_instance_encryption_key(instance_id):
     return _instance_encryption_key[instance_id]
 
 
+def get_instance_encryption_key_cache_stats():
+    """The usage of the instance encryption key cache, with its hit rate."""
+    stats = _instance_encryption_key.stats()
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
 def module_instance_count(context, module_id, include_clustered=False):
     """Returns a summary of the instances that have applied a given
     module.  We use the SQLAlchemy query object directly here as there's
@@ -2107,7 +2373,7 @@ class DBInstanceFault(dbmodels.DatabaseModelBase):
 
 class InstanceServiceStatus(dbmodels.DatabaseModelBase):
     _data_fields = ['instance_id', 'status_id', 'status_description',
-                    'updated_at']
+                    'updated_at', 'keepalive']
     _table_name = 'service_statuses'
 
     def __init__(self, status, **kwargs):
@@ -2145,9 +2411,56 @@ class InstanceServiceStatus(dbmodels.DatabaseModelBase):
         self['updated_at'] = timeutils.utcnow()
         return get_db_api().save(self)
 
+    @classmethod
+    def update_heartbeats(cls, instance_ids, status, keepalive, *criteria):
+        """Save the heartbeats of several instances with one statement.
+
+        The instances whose status is RESTART_REQUIRED are skipped, they
+        keep the status until they are restarted.
+
+        :param status: The status reported, None only updates the time.
+        :param keepalive: The seconds until the next heartbeat.
+        :param criteria: Additional conditions of the rows to update.
+        :returns the number of rows updated.
+        """
+        values = {'updated_at': timeutils.utcnow(), 'keepalive': keepalive}
+        if status is not None:
+            values.update(status_id=status.code,
+                          status_description=status.description)
+        restart_required = srvstatus.ServiceStatuses.RESTART_REQUIRED.code
+        return cls.query().filter(
+            cls.instance_id.in_(instance_ids),
+            cls.status_id != restart_required,
+            *criteria).update(values, synchronize_session=False)
+
+    @classmethod
+    def load_statuses(cls, instance_ids):
+        """Load the service and task statuses of several instances.
+
+        The statuses are loaded with one query joining the instances.
+
+        :returns a dict of the instance IDs to the service status and the
+                 task status, the deleted instances are left out.
+        """
+        query = cls.query().join(
+            DBInstance, DBInstance.id == cls.instance_id).filter(
+            cls.instance_id.in_(instance_ids),
+            DBInstance.deleted == 0).with_entities(
+            cls.instance_id, cls.status_id, DBInstance.task_id)
+        return {instance_id: (srvstatus.ServiceStatus.from_code(status_id),
+                              InstanceTask.from_code(task_id))
+                for instance_id, status_id, task_id in query}
+
     def is_uptodate(self):
         """Check if the service status heartbeat is up to date."""
-        heartbeat_expiry = timedelta(seconds=CONF.agent_heartbeat_expiry)
+        expiry = CONF.agent_heartbeat_expiry
+        if self.keepalive:
+            # The guest agent only sends a heartbeat when the status changes
+            # or when the keepalive it announced is due. It keeps the
+            # keepalive within its agent_heartbeat_expiry, which only
+            # matters if that is longer than the one of the conductor.
+            expiry = max(expiry, self.keepalive * 1.5)
+        heartbeat_expiry = timedelta(seconds=expiry)
         last_update = (timeutils.utcnow() - self.updated_at)
         if last_update < heartbeat_expiry:
             return True
@@ -17,12 +17,14 @@ import ipaddress
 
 from oslo_log import log as logging
 from oslo_utils import strutils
+from oslo_utils import timeutils
 
 from trove.backup.models import Backup as backup_model
 from trove.backup import views as backup_views
 import trove.common.apischema as apischema
 from trove.common import cfg
 from trove.common import clients
+from trove.common import conditional
 from trove.common import exception
 from trove.common import glance as common_glance
 from trove.common.i18n import _
@@ -201,8 +203,10 @@ class InstanceController(wsgi.Controller):
         LOG.debug("req : '%s'\n\n", req)
         context = req.environ[wsgi.CONTEXT_KEY]
         policy.authorize_on_tenant(context, 'instance:index')
-        instances = self._get_instances(req, instance_view=views.InstanceView)
-        return wsgi.Result(instances, 200)
+        return conditional.conditional_result(
+            req, lambda: models.get_instances_version(context),
+            lambda: self._get_instances(req, instance_view=views.InstanceView),
+            cached=True)
 
     def detail(self, req, tenant_id):
         """Return all instances with details."""
@@ -211,9 +215,11 @@ class InstanceController(wsgi.Controller):
         LOG.debug("req : '%s'\n\n", req)
         context = req.environ[wsgi.CONTEXT_KEY]
         policy.authorize_on_tenant(context, 'instance:detail')
-        instances = self._get_instances(req,
-                                        instance_view=views.InstanceDetailView)
-        return wsgi.Result(instances, 200)
+        return conditional.conditional_result(
+            req, lambda: models.get_instances_version(context),
+            lambda: self._get_instances(
+                req, instance_view=views.InstanceDetailView),
+            cached=True)
 
     def _get_instances(self, req, instance_view):
         context = req.environ[wsgi.CONTEXT_KEY]
@@ -251,12 +257,19 @@ class InstanceController(wsgi.Controller):
         LOG.debug("req : '%s'\n\n", req)
 
         context = req.environ[wsgi.CONTEXT_KEY]
-        instance = models.load_instance_with_info(models.DetailInstance,
-                                                  context, id)
-        self.authorize_instance_action(context, 'show', instance)
-        return wsgi.Result(
-            views.InstanceDetailView(instance, req=req).data(), 200
-        )
+
+        def _get_version():
+            db_info = models.get_db_info(context, id)
+            self.authorize_instance_action(context, 'show', db_info)
+            return models.get_instance_version(db_info)
+
+        def _load():
+            instance = models.load_instance_with_info(models.DetailInstance,
+                                                      context, id)
+            self.authorize_instance_action(context, 'show', instance)
+            return views.InstanceDetailView(instance, req=req).data()
+
+        return conditional.conditional_result(req, _get_version, _load)
 
     def delete(self, req, tenant_id, id):
         """Delete a single instance."""
@@ -455,9 +468,12 @@ class InstanceController(wsgi.Controller):
             policy.authorize_on_tenant(
                 context, 'instance:extension:database:create')
 
+        restore_target = None
         if 'restorePoint' in body['instance']:
-            backupRef = body['instance']['restorePoint']['backupRef']
+            restore_point = body['instance']['restorePoint']
+            backupRef = restore_point['backupRef']
             backup_id = utils.get_id_from_href(backupRef)
+            restore_target = self._parse_restore_target(restore_point)
         else:
             backup_id = None
 
@@ -491,11 +507,30 @@ class InstanceController(wsgi.Controller):
                                           modules=modules,
                                           locality=locality,
                                           region_name=region_name,
-                                          access=access)
+                                          access=access,
+                                          restore_target=restore_target)
 
         view = views.InstanceDetailView(instance, req=req)
         return wsgi.Result(view.data(), 200)
 
+    def _parse_restore_target(self, restore_point):
+        """Get the point in time to recover the restored backup to."""
+        restore_time = restore_point.get('restoreTime')
+        restore_lsn = restore_point.get('restoreLsn')
+        if restore_time and restore_lsn:
+            raise exception.BadRequest(message=_(
+                "Only one of restoreTime and restoreLsn can be specified."))
+        if restore_lsn:
+            return {'lsn': restore_lsn}
+        if restore_time:
+            try:
+                restore_time = timeutils.parse_isotime(restore_time)
+            except ValueError as e:
+                raise exception.BadRequest(message=str(e))
+            return {'time': timeutils.normalize_time(
+                restore_time).isoformat() + 'Z'}
+        return None
+
     def _configuration_parse(self, context, body):
         if 'configuration' in body['instance']:
             configuration_ref = body['instance']['configuration']
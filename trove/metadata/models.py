@@ -17,10 +17,10 @@
 from oslo_log import log as logging
 import json
 
-from sqlalchemy import desc
 
 from trove.common import cfg
 from trove.common import exception
+from trove.db import get_db_api
 from trove.db.models import DatabaseModelBase
 
 CONF = cfg.CONF
@@ -74,6 +74,32 @@ class Metadata(object):
 
         return cls._paginate(context, query)
 
+    @classmethod
+    def list_by_resources(cls, project_id, resource_type, resource_ids):
+        """
+        List The Metadata Of Several Resources With One Query.
+        :param cls:
+        :param project_id: tenant_id
+        :param resource_type: TYPE of resource
+        :param resource_ids: IDs of the resources
+
+        :return: the metadata items of each resource, by resource ID
+        """
+
+        result = {resource_id: {} for resource_id in resource_ids}
+        if not result:
+            return result
+
+        query = DBMetadata.query().filter(
+            DBMetadata.deleted == 0,
+            DBMetadata.project_id == project_id,
+            DBMetadata.resource_type == resource_type,
+            DBMetadata.resource_id.in_(list(result)))
+        for metadata in query.all():
+            result[metadata.resource_id][metadata.key] = json.loads(
+                metadata.value)
+        return result
+
     @classmethod
     def get(cls, project_id, resource_type, resource_id, key):
         """
@@ -103,24 +129,12 @@ class Metadata(object):
 
     @classmethod
     def _paginate(cls, context, query):
+        """Paginate the results of the base query.
+        The most recently updated metadatas are listed first.
         """
-        Paginate the results of the base query.
-        We use limit/offset as the results need to be ordered by date
-        and not the primary key.
-        """
-        marker = int(context.marker or 0)
         limit = int(context.limit or CONF.metadatas_page_size)
-        # order by 'updated DESC' to show the most recent metadatas first
-        query = query.order_by(desc(DBMetadata.updated))
-        # Apply limit/offset
-        query = query.limit(limit)
-        query = query.offset(marker)
-        # check if we need to send a marker for the next page
-        if query.count() < limit:
-            marker = None
-        else:
-            marker += limit
-        return query.all(), marker
+        return get_db_api().paginate_by_updated(query, DBMetadata, limit,
+                                                context.marker)
 
     @classmethod
     def create(cls, project_id, resource_type, resource_id, data):
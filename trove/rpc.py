@@ -96,13 +96,18 @@ def get_transport_url(url_str=None):
 
 
 def get_client(target, key, version_cap=None, serializer=None,
-               secure_serializer=ssz.SecureSerializer):
+               secure_serializer=ssz.SecureSerializer, compact=False):
+    """Get an RPC client.
+
+    :param compact: Whether the payloads are sent in the compact format,
+                    only if the servers support it.
+    """
     assert TRANSPORT is not None
     # BUG(1650518): Cleanup in the Pike release
     # uncomment this (following) line in the pike release
     # assert key is not None
     serializer = secure_serializer(
-        sz.TroveRequestContextSerializer(serializer), key)
+        sz.TroveRequestContextSerializer(serializer), key, compact=compact)
     return messaging.RPCClient(TRANSPORT,
                                target,
                                version_cap=version_cap,
@@ -208,10 +208,14 @@ class API(object):
                         nics=None, overrides=None, slave_of_id=None,
                         cluster_config=None, volume_type=None,
                         modules=None, locality=None, access=None,
-                        ds_version=None):
+                        ds_version=None, restore_target=None):
 
         LOG.debug("Making async call to create instance %s ", instance_id)
         version = self.API_BASE_VERSION
+        kwargs = {}
+        if restore_target:
+            # Only sent when needed, the older task managers don't know it.
+            kwargs['restore_target'] = restore_target
         self._cast("create_instance", version=version,
                    instance_id=instance_id, name=name,
                    flavor=self._transform_obj(flavor),
@@ -230,7 +234,7 @@ class API(object):
                    cluster_config=cluster_config,
                    volume_type=volume_type,
                    modules=modules, locality=locality, access=access,
-                   ds_version=ds_version)
+                   ds_version=ds_version, **kwargs)
 
     def create_cluster(self, cluster_id):
         LOG.debug("Making async call to create cluster %s ", cluster_id)
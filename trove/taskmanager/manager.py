@@ -391,7 +391,7 @@ class Manager(periodic_task.PeriodicTasks):
                          packages, volume_size, backup_id, availability_zone,
                          root_password, nics, overrides, slave_of_id,
                          cluster_config, volume_type, modules, locality,
-                         access=None, ds_version=None):
+                         access=None, ds_version=None, restore_target=None):
         if slave_of_id:
             self._create_replication_slave(context, instance_id, name,
                                            flavor, image_id, databases, users,
@@ -421,7 +421,8 @@ class Manager(periodic_task.PeriodicTasks):
                 availability_zone, root_password,
                 nics, overrides, cluster_config,
                 None, volume_type, modules,
-                scheduler_hints, access=access, ds_version=ds_version
+                scheduler_hints, access=access, ds_version=ds_version,
+                restore_target=restore_target
             )
 
             timeout = (CONF.restore_usage_timeout if backup_id
@@ -433,7 +434,7 @@ class Manager(periodic_task.PeriodicTasks):
                         packages, volume_size, backup_id, availability_zone,
                         root_password, nics, overrides, slave_of_id,
                         cluster_config, volume_type, modules, locality,
-                        access=None, ds_version=None):
+                        access=None, ds_version=None, restore_target=None):
         with EndNotification(
             context,
             instance_id=(
@@ -449,7 +450,8 @@ class Manager(periodic_task.PeriodicTasks):
                                   root_password, nics, overrides, slave_of_id,
                                   cluster_config, volume_type, modules,
                                   locality, access=access,
-                                  ds_version=ds_version)
+                                  ds_version=ds_version,
+                                  restore_target=restore_target)
 
     def upgrade(self, context, instance_id, datastore_version_id):
         instance_tasks = models.BuiltInstanceTasks.load(context, instance_id)
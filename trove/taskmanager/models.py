@@ -93,7 +93,7 @@ class NotifyMixin(object):
         publisher_id = CONF.host
         # Grab the instance size from the kwargs or from the nova client
         instance_size = kwargs.pop('instance_size', None)
-        flavor = self.nova_client.flavors.get(self.flavor_id)
+        flavor = self.get_flavor()
         server = kwargs.pop('server', None)
         if server is None:
             server = self.nova_client.servers.get(self.server_id)
@@ -232,26 +232,25 @@ class ClusterTasks(Cluster):
         self, instance_ids, cluster_id, shard_id, expected_status,
         fast_fail_statuses=None):
 
-        def _is_fast_fail_status(status):
-            return ((fast_fail_statuses is not None) and
-                    ((status == fast_fail_statuses) or
-                     (status in fast_fail_statuses)))
-
-        def _all_have_status(ids):
-            for instance_id in ids:
-                status = InstanceServiceStatus.find_by(
-                    instance_id=instance_id).get_status()
-                task_status = DBInstance.find_by(
-                    id=instance_id).get_task_status()
-                if (_is_fast_fail_status(status) or
-                    (task_status == InstanceTasks.BUILDING_ERROR_SERVER)):
+        def _has_failed(instance_id, statuses):
+            if instance_id not in statuses:
+                # The instance has been deleted.
+                return True
+            status, task_status = statuses[instance_id]
+            return ((fast_fail_statuses is not None and
+                     status in fast_fail_statuses) or
+                    task_status == InstanceTasks.BUILDING_ERROR_SERVER)
+
+        def _all_have_status(statuses):
+            for instance_id in instance_ids:
+                if _has_failed(instance_id, statuses):
                     # if one has failed, no need to continue polling
                     LOG.debug("Instance %(id)s has acquired a fast-fail "
-                              "status %(status)s and"
-                              " task_status %(task_status)s.",
-                              {'id': instance_id, 'status': status,
-                               'task_status': task_status})
+                              "status: %(status)s.",
+                              {'id': instance_id,
+                               'status': statuses.get(instance_id)})
                     return True
+                status = statuses[instance_id][0]
                 if status != expected_status:
                     # if one is not in the expected state, continue polling
                     LOG.debug("Instance %(id)s was %(status)s.",
@@ -260,34 +259,25 @@ class ClusterTasks(Cluster):
 
             return True
 
-        def _instance_ids_with_failures(ids):
-            LOG.debug("Checking for service failures on instances: %s", ids)
-            failed_instance_ids = []
-            for instance_id in ids:
-                status = InstanceServiceStatus.find_by(
-                    instance_id=instance_id).get_status()
-                task_status = DBInstance.find_by(
-                    id=instance_id).get_task_status()
-                if (_is_fast_fail_status(status) or
-                    (task_status == InstanceTasks.BUILDING_ERROR_SERVER)):
-                    failed_instance_ids.append(instance_id)
-            return failed_instance_ids
-
         LOG.debug("Polling until all instances acquire %(expected)s "
                   "status: %(ids)s",
                   {'expected': expected_status, 'ids': instance_ids})
+        poll_interval = CONF.cluster_status_poll_interval
         try:
-            utils.poll_until(lambda: instance_ids,
-                             lambda ids: _all_have_status(ids),
-                             sleep_time=CONF.usage_sleep_time,
-                             time_out=CONF.usage_timeout)
+            statuses = utils.poll_until(
+                lambda: InstanceServiceStatus.load_statuses(instance_ids),
+                _all_have_status,
+                sleep_time=poll_interval or CONF.usage_sleep_time,
+                max_interval=poll_interval or 30,
+                time_out=CONF.usage_timeout)
         except PollTimeOut:
             LOG.exception("Timed out while waiting for all instances "
                           "to become %s.", expected_status)
             self.update_statuses_on_failure(cluster_id, shard_id)
             return False
 
-        failed_ids = _instance_ids_with_failures(instance_ids)
+        failed_ids = [instance_id for instance_id in instance_ids
+                      if _has_failed(instance_id, statuses)]
         if failed_ids:
             LOG.error("Some instances failed: %s", failed_ids)
             self.update_statuses_on_failure(cluster_id, shard_id)
@@ -562,7 +552,7 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
                         backup_id, availability_zone, root_password, nics,
                         overrides, cluster_config, snapshot, volume_type,
                         modules, scheduler_hints, access=None,
-                        ds_version=None):
+                        ds_version=None, restore_target=None):
         """Create trove instance.
 
         It is the caller's responsibility to ensure that
@@ -598,6 +588,9 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
                            'type': backup.backup_type,
                            'checksum': backup.checksum,
                            }
+            if restore_target:
+                # The point in time to recover the backup to.
+                backup_info['restore_target'] = restore_target
         self._guest_prepare(flavor['ram'], volume_info,
                             packages, databases, users, backup_info,
                             config.config_contents, root_password,
@@ -1197,7 +1190,7 @@ class BuiltInstanceTasks(BuiltInstance, NotifyMixin, ConfigurationMixin):
         LOG.info("Attaching replica %s to master %s", self.id, master.id)
         try:
             replica_info = master.guest.get_replica_context()
-            flavor = self.nova_client.flavors.get(self.flavor_id)
+            flavor = self.get_flavor()
             slave_config = self._render_replica_config(flavor).config_contents
             self.guest.attach_replica(replica_info, slave_config,
                                       restart=restart)
@@ -1226,7 +1219,7 @@ class BuiltInstanceTasks(BuiltInstance, NotifyMixin, ConfigurationMixin):
     def enable_as_master(self):
         LOG.info("Enable %s as master", self.id)
 
-        flavor = self.nova_client.flavors.get(self.flavor_id)
+        flavor = self.get_flavor()
         replica_source_config = self._render_replica_source_config(flavor)
         self.update_db(slave_of_id=None)
         self.slave_list = None
@@ -0,0 +1,36 @@
+# Copyright 2021 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import shutil
+import tempfile
+
+from backup import main
+from trove.common import cfg
+from trove.tests.unittests import trove_testtools
+
+CONF = cfg.CONF
+# The backup container modules read its options when imported.
+CONF.register_opts(main.cli_opts)
+
+
+class ContainerTestCase(trove_testtools.TestCase):
+    """Base class of the tests of the backup container code."""
+
+    def set_override(self, name, value):
+        CONF.set_override(name, value)
+        self.addCleanup(CONF.clear_override, name)
+
+    def mkdtemp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        return path
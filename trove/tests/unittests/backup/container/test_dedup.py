@@ -0,0 +1,115 @@
+# Copyright 2021 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import io
+import os
+from unittest.mock import patch
+
+from trove.tests.unittests.backup.container import base
+
+from backup.storage import dedup
+
+
+class FakeStream(io.BytesIO):
+    """A backup stream as provided by the backup drivers."""
+
+    def __init__(self, data, manifest):
+        super(FakeStream, self).__init__(data)
+        self.manifest = manifest
+
+    def get_metadata(self):
+        return {'lsn': '42'}
+
+
+class TestDedupStorage(base.ContainerTestCase):
+
+    def setUp(self):
+        super(TestDedupStorage, self).setUp()
+        self.root = self.mkdtemp()
+        self.set_override('local_storage_dir', self.root)
+        self.set_override('dedup_backend', 'local')
+        self.set_override('dedup_chunk_size', 1024)
+        self.set_override('dedup_concurrency', 2)
+        self.storage = dedup.DedupStorage()
+        self.data = os.urandom(64 * 1024)
+
+    def _save(self, data, name):
+        checksum, location = self.storage.save(FakeStream(data, name))
+        return checksum, location
+
+    def _load(self, location, checksum):
+        return b''.join(self.storage.load(location, checksum))
+
+    def _chunk_files(self):
+        chunks_dir = os.path.join(self.root, 'database_backups',
+                                  dedup.CHUNK_PREFIX)
+        return {name for _, _, names in os.walk(chunks_dir)
+                for name in names}
+
+    def test_round_trip(self):
+        checksum, location = self._save(self.data, 'backup1')
+
+        self.assertEqual(os.path.join(self.root, 'database_backups',
+                                      'backup1'), location)
+        self.assertEqual(self.data, self._load(location, checksum))
+        metadata = self.storage.load_metadata(location, checksum)
+        self.assertEqual('42', metadata['lsn'])
+        self.assertEqual(len(self.data),
+                         self.storage.get_backup_size(location))
+
+    def test_round_trip_empty(self):
+        checksum, location = self._save(b'', 'backup1')
+
+        self.assertEqual(b'', self._load(location, checksum))
+
+    def test_dedup(self):
+        self._save(self.data, 'backup1')
+        chunks = self._chunk_files()
+        first_upload = self.storage.stats['bytes_uploaded']
+
+        # Data inserted in the middle only changes the chunks around it.
+        middle = len(self.data) // 2
+        data = self.data[:middle] + os.urandom(100) + self.data[middle:]
+        checksum, location = self._save(data, 'backup2')
+
+        self.assertEqual(data, self._load(location, checksum))
+        new_chunks = self._chunk_files() - chunks
+        self.assertLessEqual(len(new_chunks), 3)
+        self.assertLess(self.storage.stats['bytes_uploaded'],
+                        first_upload / 4)
+
+    def test_chunk_etag_mismatch(self):
+        with patch.object(self.storage.backend, 'put_object',
+                          return_value='etag'):
+            self.assertRaisesRegex(Exception, 'Failed to upload chunk',
+                                   self._save, self.data, 'backup1')
+
+    def test_index_checksum_mismatch(self):
+        _checksum, location = self._save(self.data, 'backup1')
+
+        self.assertRaisesRegex(Exception, 'Checksum validation failure',
+                               self._load, location, 'checksum')
+
+    def test_corrupted_chunk(self):
+        checksum, location = self._save(self.data, 'backup1')
+        name = sorted(self._chunk_files())[0]
+        path = os.path.join(self.root, 'database_backups',
+                            dedup.CHUNK_PREFIX, name[:2], name)
+        with open(path, 'r+b') as f:
+            f.seek(10)
+            byte = f.read(1)
+            f.seek(10)
+            f.write(bytes([byte[0] ^ 0x01]))
+
+        self.assertRaisesRegex(Exception, 'Checksum validation failure',
+                               self._load, location, checksum)
@@ -0,0 +1,122 @@
+# Copyright 2021 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import base64
+import io
+import os
+
+from trove.tests.unittests.backup.container import base
+
+from backup.utils import encryption
+
+FRAME_SIZE = 16
+
+
+def _key():
+    return base64.b64encode(os.urandom(encryption.KEY_SIZE)).decode()
+
+
+def _encrypt(data, key):
+    encryptor = encryption.Encryptor(io.BytesIO(data), key, threads=2,
+                                     frame_size=FRAME_SIZE)
+    chunks = []
+    while True:
+        chunk = encryptor.read(7)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    encryptor.close()
+    return b''.join(chunks)
+
+
+def _decrypt(stream, key):
+    # Chunks which don't match the frames.
+    chunks = [stream[i:i + 10] for i in range(0, len(stream), 10)]
+    return b''.join(encryption.decrypt(chunks, key, threads=2))
+
+
+def _split(stream):
+    """Split the encrypted stream into its header and frames."""
+    size = len(encryption.MAGIC) + encryption.SALT_SIZE
+    header, frames = stream[:size], []
+    while size < len(stream):
+        length, _flags = encryption._FRAME_HEADER.unpack_from(stream, size)
+        end = size + encryption._FRAME_HEADER.size + length
+        frames.append(stream[size:end])
+        size = end
+    return header, frames
+
+
+class TestEncryption(base.ContainerTestCase):
+
+    def setUp(self):
+        super(TestEncryption, self).setUp()
+        self.key = _key()
+        self.data = os.urandom(FRAME_SIZE * 4 + 5)
+        self.stream = _encrypt(self.data, self.key)
+
+    def test_round_trip(self):
+        self.assertEqual(5, len(_split(self.stream)[1]))
+        self.assertEqual(self.data, _decrypt(self.stream, self.key))
+
+    def test_round_trip_whole_frames(self):
+        data = os.urandom(FRAME_SIZE * 3)
+        stream = _encrypt(data, self.key)
+
+        # The last frame is empty.
+        self.assertEqual(4, len(_split(stream)[1]))
+        self.assertEqual(data, _decrypt(stream, self.key))
+
+    def test_round_trip_empty(self):
+        stream = _encrypt(b'', self.key)
+
+        self.assertEqual(1, len(_split(stream)[1]))
+        self.assertEqual(b'', _decrypt(stream, self.key))
+
+    def test_invalid_key(self):
+        self.assertRaises(ValueError, encryption.Encryptor,
+                          io.BytesIO(b''), 'password')
+
+    def test_wrong_key(self):
+        self.assertRaises(encryption.DecryptionError,
+                          _decrypt, self.stream, _key())
+
+    def test_flipped_byte(self):
+        stream = bytearray(self.stream)
+        stream[-20] ^= 0x01
+
+        self.assertRaises(encryption.DecryptionError,
+                          _decrypt, bytes(stream), self.key)
+
+    def test_swapped_frames(self):
+        header, frames = _split(self.stream)
+        frames[1], frames[2] = frames[2], frames[1]
+
+        self.assertRaises(encryption.DecryptionError,
+                          _decrypt, header + b''.join(frames), self.key)
+
+    def test_frame_of_other_stream(self):
+        header, frames = _split(self.stream)
+        _other_header, other_frames = _split(_encrypt(self.data, self.key))
+        frames[0] = other_frames[0]
+
+        self.assertRaises(encryption.DecryptionError,
+                          _decrypt, header + b''.join(frames), self.key)
+
+    def test_truncated(self):
+        header, frames = _split(self.stream)
+
+        for count in range(len(frames)):
+            self.assertRaisesRegex(
+                encryption.DecryptionError, 'truncated',
+                _decrypt, header + b''.join(frames[:count]), self.key)
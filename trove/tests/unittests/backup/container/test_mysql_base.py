@@ -0,0 +1,67 @@
+# Copyright 2021 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import os
+from unittest.mock import patch
+
+from trove.tests.unittests.backup.container import base
+
+from backup.drivers import mysql_base
+from backup.storage import local
+from backup.storage import swift
+
+
+class TestRestoreChain(base.ContainerTestCase):
+
+    def setUp(self):
+        super(TestRestoreChain, self).setUp()
+        self.root = self.mkdtemp()
+        self.set_override('local_storage_dir', self.root)
+        self.storage = local.LocalStorage()
+        self.storage.client.put_container('database_backups')
+
+    def _put_backup(self, name, data, parent=None):
+        headers = {}
+        if parent:
+            headers = {swift._set_attr('parent_location'): parent[0],
+                       swift._set_attr('parent_checksum'): parent[1]}
+        checksum = self.storage.client.put_object(
+            'database_backups', name, data, headers=headers)
+        return os.path.join(self.root, 'database_backups', name), checksum
+
+    def test_get_restore_chain(self):
+        full = self._put_backup('full', b'f' * 100)
+        inc1 = self._put_backup('inc1', b'1' * 10, parent=full)
+        inc2 = self._put_backup('inc2', b'2' * 20, parent=inc1)
+        runner = mysql_base.MySQLBaseRunner(storage=self.storage)
+
+        with patch.object(self.storage.client, 'head_object',
+                          wraps=self.storage.client.head_object) as mock_head:
+            chain = runner.get_restore_chain(*inc2)
+
+        self.assertEqual([full[0], inc1[0], inc2[0]],
+                         [backup['location'] for backup in chain])
+        self.assertEqual([100, 10, 20],
+                         [backup['size'] for backup in chain])
+        self.assertEqual(inc1[0], chain[2]['metadata']['parent_location'])
+        # One request per backup of the chain.
+        self.assertEqual(3, mock_head.call_count)
+
+    def test_get_restore_chain_checksum_mismatch(self):
+        full = self._put_backup('full', b'f' * 100)
+        inc1 = self._put_backup('inc1', b'1' * 10,
+                                parent=(full[0], 'checksum'))
+        runner = mysql_base.MySQLBaseRunner(storage=self.storage)
+
+        self.assertRaisesRegex(Exception, 'Checksum validation failure',
+                               runner.get_restore_chain, *inc1)
@@ -0,0 +1,130 @@
+# Copyright 2021 Catalyst Cloud
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import os
+
+from trove.tests.unittests.backup.container import base
+
+from backup.drivers import postgres
+from backup.drivers import postgres_wal
+from backup.storage import local
+
+
+def _wal_file(segment, timeline=1):
+    return '%08X%08X%08X' % (timeline, 0, segment)
+
+
+def _batch(first, last, end_time):
+    return {'first': _wal_file(first), 'last': _wal_file(last),
+            'end_time': end_time}
+
+
+class TestWalIndex(base.ContainerTestCase):
+
+    def setUp(self):
+        super(TestWalIndex, self).setUp()
+        self.index = postgres_wal.WalIndex(None, 'container', 'stream')
+        for batch in [_batch(1, 4, 100), _batch(9, 12, 300),
+                      _batch(5, 8, 200)]:
+            self.index.add(batch)
+
+    def _firsts(self, batches):
+        return [int(batch['first'][16:], 16) for batch in batches]
+
+    def test_sorted(self):
+        self.assertEqual([1, 5, 9], self._firsts(self.index.batches))
+        self.assertEqual(_wal_file(12), self.index.last)
+
+    def test_select_from_start(self):
+        self.assertEqual([5, 9], self._firsts(
+            self.index.select(start_wal_file=_wal_file(6))))
+
+    def test_select_target_lsn(self):
+        # 0/6000010 is in the 6th segment of 16MB
+        self.assertEqual([1, 5], self._firsts(
+            self.index.select(target_lsn='0/6000010')))
+
+    def test_select_target_time(self):
+        self.assertEqual([5], self._firsts(self.index.select(
+            start_wal_file=_wal_file(6), target_time=150)))
+        self.assertEqual([1, 5, 9], self._firsts(
+            self.index.select(target_time=400)))
+
+
+class TestWalStream(base.ContainerTestCase):
+
+    def setUp(self):
+        super(TestWalStream, self).setUp()
+        self.set_override('local_storage_dir', self.mkdtemp())
+        self.storage = local.LocalStorage()
+        self.archive_dir = self.mkdtemp()
+        self.archiver = postgres_wal.WalArchiver(
+            self.storage, 'database_backups', 'stream-id', self.archive_dir,
+            batch_size=2, batch_timeout=60)
+
+    def _archive(self, name, content):
+        with open(os.path.join(self.archive_dir, name), 'w') as f:
+            f.write(content)
+
+    def test_ship(self):
+        for segment in range(1, 4):
+            self._archive(_wal_file(segment), 'wal %s' % segment)
+        self._archive('00000002.history', 'timeline history')
+
+        self.archiver.add(self.archiver.scan())
+        self.archiver.ship_pending()
+        # The last file waits for the batch to be full or the timeout.
+        self.assertEqual({_wal_file(3)}, self.archiver.pending)
+        self.archiver.ship_pending(force=True)
+        self.assertEqual(set(), self.archiver.pending)
+
+        index = postgres_wal.WalIndex(self.storage, 'database_backups',
+                                      'stream-id')
+        index.load()
+        self.assertEqual([(_wal_file(1), _wal_file(2)),
+                          (_wal_file(3), _wal_file(3))],
+                         [(batch['first'], batch['last'])
+                          for batch in index.batches])
+        self.assertEqual({'00000002.history': 'timeline history'},
+                         index.history)
+        self.assertEqual([], self.archiver.scan())
+
+        restore_dir = self.mkdtemp()
+        for batch in index.batches:
+            postgres_wal.restore_batch(self.storage, batch, restore_dir)
+        for segment in range(1, 4):
+            with open(os.path.join(restore_dir, _wal_file(segment))) as f:
+                self.assertEqual('wal %s' % segment, f.read())
+
+    def test_restore_target(self):
+        for segment in range(1, 6):
+            self._archive(_wal_file(segment), 'wal %s' % segment)
+        self.archiver.add(self.archiver.scan())
+        self.archiver.ship_pending(force=True)
+
+        datadir = self.mkdtemp()
+        wal_archive_dir = self.mkdtemp()
+        runner = postgres.PgBasebackup(
+            storage=self.storage, location='backup-location',
+            metadata={'start_wal_file': _wal_file(3)},
+            wal_archive_dir=wal_archive_dir, db_datadir=datadir,
+            wal_stream_id='stream-id', restore_target_lsn='0/4000010')
+        runner.post_restore()
+
+        # Only the batches from the start of the backup to the target
+        self.assertEqual(
+            [_wal_file(3), _wal_file(4)], sorted(os.listdir(wal_archive_dir)))
+        with open(os.path.join(datadir, 'postgresql.auto.conf')) as f:
+            self.assertEqual("recovery_target_action = 'promote'\n"
+                             "recovery_target_lsn = '0/4000010'\n",
+                             f.read())
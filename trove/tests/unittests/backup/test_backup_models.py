@@ -13,6 +13,7 @@
 
 
 import datetime
+import json
 from unittest.mock import DEFAULT
 from unittest.mock import MagicMock
 from unittest.mock import patch
@@ -20,6 +21,7 @@ from swiftclient.client import ClientException
 
 from trove.backup import models
 from trove.backup import state
+from trove.backup import views
 from trove.common import context
 from trove.common import exception
 from trove.common import timeutils
@@ -293,6 +295,19 @@ class BackupORMTest(trove_testtools.TestCase):
         self.assertIsNone(marker)
         self.assertEqual(1, len(backups))
 
+    def test_get_version(self):
+        version = models.Backup.get_version(self.context)
+        self.assertEqual((1, self.backup.updated), version)
+
+        self.backup.state = BACKUP_STATE_COMPLETED
+        self.backup.save()
+
+        self.assertEqual((1, self.backup.updated),
+                         models.Backup.get_version(self.context))
+        self.assertNotEqual(version, models.Backup.get_version(self.context))
+        self.assertEqual((0, None), models.Backup.get_version(
+            self.context, project_id='other'))
+
     def test_list_for_instance(self):
         models.DBBackup.create(tenant_id=self.context.project_id,
                                name=BACKUP_NAME_2,
@@ -390,6 +405,20 @@ class BackupORMTest(trove_testtools.TestCase):
         self.backup.delete()
         self.assertFalse(models.Backup.running(self.instance_id))
 
+    def test_statistics_not_reported(self):
+        self.assertIsNone(self.backup.statistics)
+        self.assertNotIn('stats', views.BackupView(self.backup).data()[
+            'backup'])
+
+    def test_statistics(self):
+        stats = {'bytes_read': 1024, 'compression_ratio': 2.0}
+        self.backup.stats = json.dumps(stats)
+        self.backup.save()
+        db_record = models.DBBackup.find_by(id=self.backup.id)
+        self.assertEqual(stats, db_record.statistics)
+        self.assertEqual(stats, views.BackupView(db_record).data()[
+            'backup']['stats'])
+
     def test_filename(self):
         self.assertEqual(BACKUP_FILENAME, self.backup.filename)
 
@@ -470,39 +499,53 @@ class PaginationTests(trove_testtools.TestCase):
         query = models.DBBackup.query()
         query.filter_by(instance_id=self.instance_id).delete()
 
-    def test_pagination_list(self):
-        # page one
-        backups, marker = models.Backup.list(self.context)
-        self.assertEqual(20, marker)
-        self.assertEqual(20, len(backups))
-        # page two
-        self.context.marker = 20
-        backups, marker = models.Backup.list(self.context)
-        self.assertEqual(40, marker)
-        self.assertEqual(20, len(backups))
-        # page three
-        self.context.marker = 40
-        backups, marker = models.Backup.list(self.context)
+    def _list_all(self, list_func):
+        ids = []
+        marker = None
+        for page_size in [20, 20, 10]:
+            self.context.marker = marker
+            backups, marker = list_func()
+            self.assertEqual(page_size, len(backups))
+            ids.extend(backup.id for backup in backups)
         self.assertIsNone(marker)
-        self.assertEqual(10, len(backups))
+        return ids
+
+    def test_pagination_list(self):
+        ids = self._list_all(lambda: models.Backup.list(self.context))
+
+        self.assertEqual(50, len(set(ids)))
 
     def test_pagination_list_for_instance(self):
-        # page one
-        backups, marker = models.Backup.list_for_instance(self.context,
-                                                          self.instance_id)
-        self.assertEqual(20, marker)
-        self.assertEqual(20, len(backups))
-        # page two
-        self.context.marker = 20
-        backups, marker = models.Backup.list(self.context)
-        self.assertEqual(40, marker)
-        self.assertEqual(20, len(backups))
-        # page three
-        self.context.marker = 40
-        backups, marker = models.Backup.list_for_instance(self.context,
-                                                          self.instance_id)
-        self.assertIsNone(marker)
-        self.assertEqual(10, len(backups))
+        ids = self._list_all(lambda: models.Backup.list_for_instance(
+            self.context, self.instance_id))
+
+        self.assertEqual(50, len(set(ids)))
+
+    def test_pagination_same_updated(self):
+        query = models.DBBackup.query().filter_by(
+            instance_id=self.instance_id)
+        query.update({'updated': timeutils.utcnow()})
+
+        ids = self._list_all(lambda: models.Backup.list(self.context))
+
+        self.assertEqual(50, len(set(ids)))
+
+    def test_pagination_offset_marker(self):
+        backups, _ = models.Backup.list(self.context)
+
+        self.context.marker = '10'
+        page, marker = models.Backup.list(self.context)
+
+        self.assertEqual([backup.id for backup in backups[10:]],
+                         [backup.id for backup in page[:10]])
+        self.assertEqual(20, len(page))
+        self.assertIsNotNone(marker)
+
+    def test_pagination_invalid_marker(self):
+        self.context.marker = 'invalid'
+
+        self.assertRaises(exception.BadRequest, models.Backup.list,
+                          self.context)
 
 
 class OrderingTests(trove_testtools.TestCase):
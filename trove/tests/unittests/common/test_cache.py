@@ -0,0 +1,134 @@
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest.mock import Mock
+from unittest.mock import patch
+import uuid
+
+from trove.common import cache
+from trove.common import exception
+from trove.datastore import models as datastore_models
+from trove.tests.unittests import trove_testtools
+from trove.tests.unittests.util import util
+
+
+class TestTTLCache(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestTTLCache, self).setUp()
+        self.cache = cache.TTLCache(maxsize=2, ttl=10)
+
+    def test_get_or_load(self):
+        loader = Mock(return_value='value')
+
+        self.assertEqual('value', self.cache.get_or_load('key', loader))
+        self.assertEqual('value', self.cache.get_or_load('key', loader))
+
+        loader.assert_called_once_with()
+        self.assertEqual({'hits': 1, 'misses': 1, 'evictions': 0,
+                          'size': 1}, self.cache.stats())
+
+    def test_get_or_load_error(self):
+        loader = Mock(side_effect=[exception.NotFound(), 'value'])
+
+        self.assertRaises(exception.NotFound,
+                          self.cache.get_or_load, 'key', loader)
+        self.assertEqual('value', self.cache.get_or_load('key', loader))
+
+    @patch.object(cache.time, 'monotonic')
+    def test_expiry(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        self.cache.set('key', 'value')
+        mock_monotonic.return_value = 109
+        self.assertEqual('value', self.cache.get('key'))
+        mock_monotonic.return_value = 111
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    @patch.object(cache.time, 'monotonic')
+    def test_expiry_ttl(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        self.cache.set('key1', 1, ttl=5)
+        self.cache.set('key2', 2, ttl=60)
+        mock_monotonic.return_value = 106
+
+        self.assertIsNone(self.cache.get('key1'))
+        self.assertEqual(2, self.cache.get('key2'))
+        mock_monotonic.return_value = 111
+        self.assertIsNone(self.cache.get('key2'))
+
+    def test_eviction(self):
+        self.cache.set('key1', 1)
+        self.cache.set('key2', 2)
+        self.cache.get('key1')
+        self.cache.set('key3', 3)
+
+        self.assertEqual(1, self.cache.get('key1'))
+        self.assertIsNone(self.cache.get('key2'))
+        self.assertEqual(3, self.cache.get('key3'))
+        self.assertEqual(1, self.cache.stats()['evictions'])
+
+    def test_disabled(self):
+        self.cache = cache.TTLCache(maxsize=2, ttl=0)
+        loader = Mock(return_value='value')
+
+        self.cache.get_or_load('key', loader)
+        self.cache.get_or_load('key', loader)
+
+        self.assertEqual(2, loader.call_count)
+
+
+class TestReferenceCache(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestReferenceCache, self).setUp()
+        util.init_db()
+        self.datastore = datastore_models.DBDatastore.create(
+            id=str(uuid.uuid4()), name='name' + str(uuid.uuid4()),
+            default_version_id=str(uuid.uuid4()))
+        self.addCleanup(self.datastore.delete)
+        self.cache = cache.ReferenceCache()
+        patcher = patch.object(cache, 'get_reference_cache',
+                               return_value=self.cache)
+        self.addCleanup(patcher.stop)
+        patcher.start()
+
+    def test_datastore_load_cached(self):
+        with patch.object(datastore_models.DBDatastore, 'find_by',
+                          wraps=datastore_models.DBDatastore.find_by) as find:
+            datastore_models.Datastore.load(self.datastore.id)
+            datastore = datastore_models.Datastore.load(self.datastore.id)
+
+        self.assertEqual(self.datastore.name, datastore.name)
+        self.assertEqual(1, find.call_count)
+        self.assertEqual(1, self.cache.stats()['hits'])
+
+    def test_invalidate(self):
+        datastore_models.Datastore.load(self.datastore.id)
+
+        cache.invalidate_reference_cache()
+
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_version_changed(self):
+        self.patch_conf_property('reference_cache_version_check_interval', 0)
+        datastore_models.Datastore.load(self.datastore.id)
+        self.assertEqual(1, self.cache.stats()['size'])
+
+        # Another process invalidates the cache.
+        cache.DBCacheVersion.increment(cache.REFERENCE_VERSION_ID)
+        datastore_models.Datastore.load(self.datastore.id)
+
+        self.assertEqual(2, self.cache.stats()['misses'])
@@ -0,0 +1,86 @@
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+from unittest.mock import patch
+
+from oslo_utils import timeutils
+
+from trove.common import cache
+from trove.common import clients
+from trove.common import clients_admin
+from trove.tests.unittests import trove_testtools
+
+
+class TestClientCache(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestClientCache, self).setUp()
+        self.patch_conf_property('neutron_url', 'http://neutron')
+        self.context = trove_testtools.TroveTestContext(self)
+        self.context.auth_token = 'token'
+
+    def test_client_reused(self):
+        client = clients.neutron_client(self.context)
+
+        self.assertIs(client, clients.neutron_client(self.context))
+        self.assertIsNot(client, clients.neutron_client(self.context,
+                                                        'RegionTwo'))
+        self.assertEqual({'hits': 1, 'misses': 2, 'evictions': 0,
+                          'size': 2}, clients.get_client_cache_stats())
+
+    def test_new_token(self):
+        client = clients.neutron_client(self.context)
+        self.context.auth_token = 'new token'
+
+        self.assertIsNot(client, clients.neutron_client(self.context))
+
+    @patch.object(cache.time, 'monotonic')
+    def test_token_expiry(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        expires_at = timeutils.utcnow() + datetime.timedelta(seconds=60)
+        self.context.auth_token_expires_at = expires_at.isoformat() + 'Z'
+        client = clients.neutron_client(self.context)
+
+        mock_monotonic.return_value = 155
+        self.assertIs(client, clients.neutron_client(self.context))
+        mock_monotonic.return_value = 165
+        self.assertIsNot(client, clients.neutron_client(self.context))
+
+    def test_token_expired(self):
+        expires_at = timeutils.utcnow() - datetime.timedelta(seconds=1)
+        self.context.auth_token_expires_at = expires_at.isoformat() + 'Z'
+
+        self.assertIsNot(clients.neutron_client(self.context),
+                         clients.neutron_client(self.context))
+
+    def test_cache_disabled(self):
+        self.patch_conf_property('client_cache_ttl', 0)
+
+        self.assertIsNot(clients.neutron_client(self.context),
+                         clients.neutron_client(self.context))
+
+
+class TestAdminClients(trove_testtools.TestCase):
+
+    @patch.object(clients_admin, 'ADMIN_NEUTRON_CLIENTS', {})
+    @patch.object(clients_admin, 'get_keystone_session')
+    def test_client_per_region(self, mock_session):
+        client = clients_admin.neutron_client_trove_admin(None)
+
+        self.assertIs(client, clients_admin.neutron_client_trove_admin(None))
+        self.assertIsNot(
+            client, clients_admin.neutron_client_trove_admin(None,
+                                                             'RegionTwo'))
@@ -0,0 +1,122 @@
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from trove.common import conditional
+from trove.common import wsgi
+from trove.tests.unittests import trove_testtools
+
+
+class TestConditionalResult(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestConditionalResult, self).setUp()
+        self.context = trove_testtools.TroveTestContext(self)
+        self.get_version = Mock(return_value=(1, 'updated'))
+        self.load = Mock(return_value={'instances': []})
+        patcher = patch.object(conditional, '_response_cache', None)
+        self.addCleanup(patcher.stop)
+        patcher.start()
+
+    def _request(self, etag=None, context=None):
+        req = wsgi.Request.blank('/v1.0/tenant/instances')
+        if etag:
+            req.headers['If-None-Match'] = etag
+        req.environ[wsgi.CONTEXT_KEY] = context or self.context
+        return req
+
+    def test_not_modified(self):
+        result = conditional.conditional_result(
+            self._request(), self.get_version, self.load)
+        etag = result.headers['ETag']
+
+        self.assertEqual(200, result.status)
+        self.assertEqual({'instances': []}, result.data('application/json'))
+
+        result = conditional.conditional_result(
+            self._request('"other", %s' % etag), self.get_version, self.load)
+
+        self.assertEqual(304, result.status)
+        self.assertIsNone(result.data('application/json'))
+        self.assertEqual(1, self.load.call_count)
+
+    def test_modified(self):
+        etag = conditional.conditional_result(
+            self._request(), self.get_version,
+            self.load).headers['ETag']
+        self.get_version.return_value = (1, 'new updated')
+
+        result = conditional.conditional_result(
+            self._request(etag), self.get_version, self.load)
+
+        self.assertEqual(200, result.status)
+        self.assertNotEqual(etag, result.headers['ETag'])
+
+    @patch.object(conditional.time, 'time')
+    def test_etag_max_age(self, mock_time):
+        mock_time.return_value = 100
+        etag = conditional.make_etag('part')
+        mock_time.return_value = 109
+        self.assertEqual(etag, conditional.make_etag('part'))
+        mock_time.return_value = 110
+        self.assertNotEqual(etag, conditional.make_etag('part'))
+
+    def test_disabled(self):
+        self.patch_conf_property('conditional_get_max_age', 0)
+
+        result = conditional.conditional_result(
+            self._request('*'), self.get_version, self.load)
+
+        self.assertEqual(200, result.status)
+        self.assertEqual({}, result.headers)
+        self.get_version.assert_not_called()
+
+    def test_cached(self):
+        self.patch_conf_property('response_cache_ttl', 5)
+
+        for _ in range(2):
+            result = conditional.conditional_result(
+                self._request(), self.get_version, self.load, cached=True)
+            self.assertEqual({'instances': []},
+                             result.data('application/json'))
+        self.assertEqual(1, self.load.call_count)
+
+        # The rows changed.
+        self.get_version.return_value = (2, 'new updated')
+        conditional.conditional_result(
+            self._request(), self.get_version, self.load, cached=True)
+        self.assertEqual(2, self.load.call_count)
+
+    def test_admin_not_shared(self):
+        self.patch_conf_property('response_cache_ttl', 5)
+        admin_context = trove_testtools.TroveTestContext(
+            self, project_id=self.context.project_id, is_admin=True)
+        self.load.side_effect = lambda: {'call': self.load.call_count}
+
+        result = conditional.conditional_result(
+            self._request(context=admin_context), self.get_version,
+            self.load, cached=True)
+        etag = result.headers['ETag']
+
+        # A non-admin gets neither the 304 nor the cached admin view.
+        result = conditional.conditional_result(
+            self._request(etag), self.get_version, self.load, cached=True)
+
+        self.assertEqual(200, result.status)
+        self.assertNotEqual(etag, result.headers['ETag'])
+        self.assertEqual({'call': 2}, result.data('application/json'))
+        self.assertEqual(2, self.load.call_count)
@@ -19,6 +19,7 @@ from unittest import mock
 from trove.common import cfg
 from trove.common.rpc import conductor_guest_serializer as gsz
 from trove.common.rpc import conductor_host_serializer as hsz
+from trove.common.rpc import payload
 
 from trove.tests.unittests import trove_testtools
 
@@ -108,3 +109,20 @@ class TestConductorSerializer(trove_testtools.TestCase):
         self.assertEqual(context.get('instance_id'), self.uuid)
         context.pop('instance_id')
         self.assertDictEqual(context, self.context)
+
+    @mock.patch('trove.common.rpc.conductor_host_serializer.'
+                'get_instance_encryption_key',
+                return_value='mo79Y86Bp3bzQDWR31ihhVGfLBmeac')
+    def test_conductor_compact(self, _):
+        guestsz = gsz.ConductorGuestSerializer(None, self.key, compact=True)
+        hostsz = hsz.ConductorHostSerializer(None, None)
+
+        encrypted_entity = guestsz.serialize_entity(self.context, self.data)
+        encrypted_context = guestsz.serialize_context(self.context)
+
+        self.assertTrue(payload.is_compact(encrypted_context['context']))
+        self.assertEqual(self.data, hostsz.deserialize_entity(
+            self.context, encrypted_entity))
+        context = hostsz.deserialize_context(encrypted_context)
+        context.pop('instance_id')
+        self.assertDictEqual(self.context, context)
@@ -14,6 +14,7 @@
 #    under the License.
 #
 
+import base64
 import os
 from unittest import mock
 
@@ -108,3 +109,22 @@ class TestEncryptUtils(trove_testtools.TestCase):
             decrypted = crypto_utils.decrypt_data(decoded, key)
             final_decoded = crypto_utils.decode_data(decrypted)
             self.assertEqual(expected, final_decoded)
+
+    def test_encryption_key(self):
+        key = crypto_utils.EncryptionKey(b'my_secure_key')
+        self.assertEqual('my_secure_key', key)
+
+        data = crypto_utils.encrypt_data(b'Hello World!', key)
+
+        self.assertEqual(b'Hello World!',
+                         crypto_utils.decrypt_data(data, 'my_secure_key'))
+        with mock.patch.object(crypto_utils, '_derive_algorithm') as derive:
+            crypto_utils.decrypt_data(data, key)
+        derive.assert_not_called()
+
+    def test_is_random_key(self):
+        self.assertTrue(crypto_utils.is_random_key(
+            base64.b64encode(os.urandom(32)).decode()))
+        self.assertFalse(crypto_utils.is_random_key(
+            base64.b64encode(os.urandom(16)).decode()))
+        self.assertFalse(crypto_utils.is_random_key('my secure passphrase'))
@@ -16,8 +16,10 @@
 #    under the License.
 #
 
+import datetime
 from unittest.mock import Mock
 
+from trove.common import exception
 from trove.common import pagination
 from trove.tests.unittests import trove_testtools
 
@@ -124,3 +126,18 @@ class TestPaginatedDataView(trove_testtools.TestCase):
                                                include_marker=True)
         self.assertEqual(l[0], li[0])
         self.assertEqual(m, 'db1')
+
+    def test_keyset_marker(self):
+        updated = datetime.datetime(2021, 1, 2, 3, 4, 5, 6)
+        marker = pagination.encode_keyset_marker(updated, 'id')
+
+        self.assertEqual(pagination.url_quote(marker), marker)
+        self.assertEqual(
+            [updated, 'id'],
+            pagination.decode_keyset_marker(marker, datetime.datetime, str))
+
+    def test_invalid_keyset_marker(self):
+        for marker in ['invalid', pagination.encode_keyset_marker('id')]:
+            self.assertRaises(exception.BadRequest,
+                              pagination.decode_keyset_marker, marker,
+                              datetime.datetime, str)
@@ -14,7 +14,17 @@
 #    under the License.
 #
 
+from unittest.mock import patch
+
+from oslo_serialization import jsonutils
+
+from trove.common import crypto_utils as cu
+from trove.common.rpc import payload
 from trove.common.rpc import secure_serializer as ssz
+from trove.common.rpc import version as rpc_version
+from trove.guestagent import api as guest_api
+from trove.instance import models as inst_models
+from trove import rpc
 from trove.tests.unittests import trove_testtools
 
 
@@ -62,3 +72,111 @@ class TestSecureSerializer(trove_testtools.TestCase):
         self.assertNotEqual(sctxt, self.context)
         self.assertEqual(sz.deserialize_context(sctxt),
                          self.context)
+
+    def test_sz_compact_entity(self):
+        sz = ssz.SecureSerializer(base=None, key=self.key, compact=True)
+        en = sz.serialize_entity(self.context, self.context)
+        self.assertTrue(payload.is_compact(en))
+        self.assertEqual(self.context,
+                         sz.deserialize_entity(self.context, en))
+
+    def test_sz_compact_context(self):
+        sz = ssz.SecureSerializer(base=None, key=self.key, compact=True)
+        sctxt = sz.serialize_context(self.context)
+        self.assertTrue(payload.is_compact(sctxt['context']))
+        self.assertEqual(self.context, sz.deserialize_context(sctxt))
+
+    def test_sz_mixed_formats(self):
+        compact_sz = ssz.SecureSerializer(base=None, key=self.key,
+                                          compact=True)
+        legacy_sz = ssz.SecureSerializer(base=None, key=self.key)
+
+        en = compact_sz.serialize_entity(self.context, self.data)
+        self.assertEqual(self.data,
+                         legacy_sz.deserialize_entity(self.context, en))
+        en = legacy_sz.serialize_entity(self.context, self.data)
+        self.assertEqual(self.data,
+                         compact_sz.deserialize_entity(self.context, en))
+
+    def test_sz_compact_compressed(self):
+        self.patch_conf_property('rpc_compress_threshold', 100)
+        sz = ssz.SecureSerializer(base=None, key=self.key, compact=True)
+        entity = {'log': self.data * 100}
+
+        en = sz.serialize_entity(self.context, entity)
+
+        self.assertLess(len(en), len(self.data) * 10)
+        self.assertEqual(entity, sz.deserialize_entity(self.context, en))
+
+    def test_sz_compact_decode_error(self):
+        sz = ssz.SecureSerializer(base=None, key=self.key, compact=True)
+        key = cu.EncryptionKey(self.key)
+        # Corrupted compressed data and a map with a list as key.
+        for data in [payload._ZLIB + b'corrupted',
+                     payload._RAW + b'\x81\x90\x00']:
+            en = (payload.COMPACT_PREFIX +
+                  cu.encode_data(cu.encrypt_data(data, key)))
+
+            self.assertRaises(ValueError, payload.decode, en, key)
+            self.assertEqual(en, sz.deserialize_entity(self.context, en))
+            self.assertEqual({'context': en},
+                             sz.deserialize_context({'context': en}))
+
+    def test_version_is_compatible(self):
+        self.assertFalse(rpc_version.version_is_compatible(None, '1.2'))
+        self.assertTrue(rpc_version.version_is_compatible('1.2', '1.2'))
+        self.assertTrue(rpc_version.version_is_compatible('1.3', '1.2'))
+        self.assertFalse(rpc_version.version_is_compatible('1.1', '1.2'))
+        self.assertFalse(rpc_version.version_is_compatible('2.0', '1.2'))
+
+
+class TestCompactPayloadNegotiation(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestCompactPayloadNegotiation, self).setUp()
+        self.key = 'xuUyAKn5mDANoM5sRxQsb6HGiugWVD'
+        self.entity = {'name': 'db1', 'size': 3}
+
+    def _legacy_deserialize_entity(self, entity):
+        # The decoding of the guest agents older than the compact payloads.
+        try:
+            return jsonutils.loads(cu.decrypt_data(cu.decode_data(entity),
+                                                   self.key))
+        except (ValueError, TypeError):
+            return entity
+
+    def _get_guest_client_compact(self):
+        with patch.object(inst_models, 'get_instance_encryption_key',
+                          return_value=self.key), \
+                patch.object(rpc, 'get_client') as get_client:
+            guest_api.API(None, 'instance-id')
+        return get_client.call_args[1]['compact']
+
+    def test_legacy_receiver_compact_payload(self):
+        sz = ssz.SecureSerializer(base=None, key=self.key, compact=True)
+
+        en = sz.serialize_entity(None, self.entity)
+
+        # The legacy receivers pass the payload on undecoded.
+        self.assertEqual(en, self._legacy_deserialize_entity(en))
+
+    def test_guest_client_legacy_by_default(self):
+        self.assertFalse(self._get_guest_client_compact())
+
+    def test_guest_client_legacy_payload(self):
+        compact = self._get_guest_client_compact()
+        sz = ssz.SecureSerializer(base=None, key=self.key, compact=compact)
+
+        en = sz.serialize_entity(None, self.entity)
+
+        self.assertEqual(self.entity, self._legacy_deserialize_entity(en))
+
+    def test_guest_client_compact(self):
+        self.patch_conf_property('rpc_compact_payloads', True)
+        self.assertTrue(self._get_guest_client_compact())
+
+    def test_guest_client_compact_capped(self):
+        self.patch_conf_property('rpc_compact_payloads', True)
+        self.patch_conf_property('guestagent', 'wallaby',
+                                 section='upgrade_levels')
+        self.assertFalse(self._get_guest_client_compact())
@@ -45,6 +45,20 @@ class TestWsgi(trove_testtools.TestCase):
         self.assertThat(ctx.user, Equals(user_id))
         self.assertThat(ctx.auth_token, Equals(token))
         self.assertEqual(0, len(ctx.service_catalog))
+        self.assertIsNone(ctx.auth_token_expires_at)
+
+    def test_process_request_token_expiry(self):
+        middleware = wsgi.ContextMiddleware("test_trove")
+        req = webob.BaseRequest({})
+        req.headers = {'X-Auth-Token': 'MI23fdf2defg123'}
+        req.environ = {'keystone.token_info': {
+            'token': {'expires_at': '2021-06-01T12:00:00.000000Z'}}}
+
+        middleware.process_request(req)
+
+        ctx = req.environ[wsgi.CONTEXT_KEY]
+        self.assertEqual('2021-06-01T12:00:00.000000Z',
+                         ctx.auth_token_expires_at)
 
 
 class TestController(trove_testtools.TestCase):
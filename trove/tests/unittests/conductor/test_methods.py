@@ -13,6 +13,7 @@
 #    under the License.
 
 from unittest.mock import patch
+from oslo_db import exception as db_exception
 from oslo_utils import timeutils
 
 from trove.backup import models as bkup_models
@@ -20,6 +21,7 @@ from trove.backup import state
 from trove.common import exception as t_exception
 from trove.common import utils
 from trove.conductor import manager as conductor_manager
+from trove.conductor.models import LastSeen
 from trove.instance import models as t_models
 from trove.instance.service_status import ServiceStatuses
 from trove.tests.unittests import trove_testtools
@@ -108,6 +110,18 @@ class ConductorMethodTests(trove_testtools.TestCase):
         iss = self._get_iss(iss_id)
         self.assertEqual(ServiceStatuses.BUILDING, iss.status)
 
+    @patch('trove.conductor.manager.LOG')
+    def test_heartbeat_keepalive_saved(self, mock_logging):
+        iss_id = self._create_iss()
+        payload = {'service_status': ServiceStatuses.HEALTHY.description,
+                   'keepalive': 120}
+        self.cond_mgr.heartbeat(None, self.instance_id, payload)
+        self.assertEqual(120, self._get_iss(iss_id).keepalive)
+
+        # The heartbeats of the older guest agents have no keepalive.
+        self.cond_mgr.heartbeat(None, self.instance_id, {})
+        self.assertIsNone(self._get_iss(iss_id).keepalive)
+
     # --- Tests for update_backup ---
 
     def test_backup_not_found(self):
@@ -143,6 +157,16 @@ class ConductorMethodTests(trove_testtools.TestCase):
         bkup = self._get_backup(bkup_id)
         self.assertEqual(new_name, bkup.name)
 
+    @patch('trove.conductor.manager.LOG')
+    def test_backup_stats_saved(self, mock_logging):
+        bkup_id = self._create_backup('stats')
+        stats = {'bytes_read': 1024, 'bytes_uploaded': 512,
+                 'compression_ratio': 2.0}
+        self.cond_mgr.update_backup(None, self.instance_id, bkup_id,
+                                    stats=stats)
+        bkup = self._get_backup(bkup_id)
+        self.assertEqual(stats, bkup.statistics)
+
     # --- Tests for discarding old messages ---
     @patch('trove.conductor.manager.LOG')
     def test_heartbeat_newer_timestamp_accepted(self, mock_logging):
@@ -197,3 +221,175 @@ class ConductorMethodTests(trove_testtools.TestCase):
                                     sent=past, name=new_name)
         bkup = self._get_backup(bkup_id)
         self.assertEqual(old_name, bkup.name)
+
+
+class ConductorHeartbeatBatchTests(trove_testtools.TestCase):
+    def setUp(self):
+        super(ConductorHeartbeatBatchTests, self).setUp()
+        util.init_db()
+        self.patch_conf_property('heartbeat_batch_interval', 60)
+        self.cond_mgr = conductor_manager.Manager()
+        self.addCleanup(self.cond_mgr.flush_heartbeats)
+
+    def _create_iss(self, status=ServiceStatuses.NEW):
+        instance_id = utils.generate_uuid()
+        iss = t_models.InstanceServiceStatus(
+            id=utils.generate_uuid(),
+            instance_id=instance_id,
+            status=status)
+        iss.save()
+        return instance_id
+
+    def _get_status(self, instance_id):
+        return t_models.InstanceServiceStatus.find_by(
+            instance_id=instance_id).status
+
+    def _payload(self, status):
+        return {'service_status': status.description}
+
+    @patch('trove.conductor.manager.LOG')
+    def test_heartbeats_buffered(self, mock_logging):
+        instance_id = self._create_iss()
+        now = timeutils.utcnow_ts(microsecond=True)
+
+        self.cond_mgr.heartbeat(None, instance_id,
+                                self._payload(ServiceStatuses.BUILDING),
+                                sent=now)
+        self.assertEqual(ServiceStatuses.NEW, self._get_status(instance_id))
+
+        self.cond_mgr.flush_heartbeats()
+        self.assertEqual(ServiceStatuses.BUILDING,
+                         self._get_status(instance_id))
+
+    @patch('trove.conductor.manager.LOG')
+    def test_heartbeats_newest_saved(self, mock_logging):
+        instance_ids = [self._create_iss() for _ in range(3)]
+        now = timeutils.utcnow_ts(microsecond=True)
+
+        for instance_id in instance_ids:
+            self.cond_mgr.heartbeat(None, instance_id,
+                                    self._payload(ServiceStatuses.HEALTHY),
+                                    sent=now + 1)
+            self.cond_mgr.heartbeat(None, instance_id,
+                                    self._payload(ServiceStatuses.BUILDING),
+                                    sent=now)
+        with patch.object(t_models.InstanceServiceStatus,
+                          'update_heartbeats',
+                          wraps=t_models.InstanceServiceStatus.
+                          update_heartbeats) as update:
+            self.cond_mgr.flush_heartbeats()
+
+        self.assertEqual(1, update.call_count)
+        for instance_id in instance_ids:
+            self.assertEqual(ServiceStatuses.HEALTHY,
+                             self._get_status(instance_id))
+
+    @patch('trove.conductor.manager.LOG')
+    def test_heartbeats_last_seen_created_concurrently(self, mock_logging):
+        instance_ids = [self._create_iss() for _ in range(2)]
+        now = timeutils.utcnow_ts(microsecond=True)
+        # Another conductor saves the first heartbeat of the first instance
+        # after the last seen rows are loaded.
+        LastSeen.create(instance_ids[0], 'heartbeat', now - 10)
+        create = LastSeen.create
+
+        def _create(instance_id, method_name, sent):
+            if instance_id == instance_ids[0]:
+                raise db_exception.DBDuplicateEntry()
+            return create(instance_id, method_name, sent)
+
+        for instance_id in instance_ids:
+            self.cond_mgr.heartbeat(None, instance_id,
+                                    self._payload(ServiceStatuses.HEALTHY),
+                                    sent=now)
+        with patch.object(LastSeen, 'load_all', return_value={}), \
+                patch.object(LastSeen, 'create', side_effect=_create):
+            self.cond_mgr.flush_heartbeats()
+
+        for instance_id in instance_ids:
+            self.assertEqual(ServiceStatuses.HEALTHY,
+                             self._get_status(instance_id))
+            self.assertEqual(now, float(LastSeen.load(instance_id,
+                                                      'heartbeat').sent))
+
+    @patch('trove.conductor.manager.LOG')
+    def test_heartbeats_older_than_last_seen_discarded(self, mock_logging):
+        instance_id = self._create_iss()
+        now = timeutils.utcnow_ts(microsecond=True)
+        self.cond_mgr.heartbeat(None, instance_id,
+                                self._payload(ServiceStatuses.BUILDING),
+                                sent=now)
+        self.cond_mgr.flush_heartbeats()
+
+        self.cond_mgr.heartbeat(None, instance_id,
+                                self._payload(ServiceStatuses.HEALTHY),
+                                sent=now - 60)
+        self.cond_mgr.flush_heartbeats()
+        self.assertEqual(ServiceStatuses.BUILDING,
+                         self._get_status(instance_id))
+
+        self.cond_mgr.heartbeat(None, instance_id,
+                                self._payload(ServiceStatuses.HEALTHY),
+                                sent=now + 60)
+        self.cond_mgr.flush_heartbeats()
+        self.assertEqual(ServiceStatuses.HEALTHY,
+                         self._get_status(instance_id))
+
+    @patch('trove.conductor.manager.LOG')
+    def test_heartbeats_younger_saved_by_another_conductor(self,
+                                                           mock_logging):
+        instance_id = self._create_iss()
+        now = timeutils.utcnow_ts(microsecond=True)
+        self.cond_mgr.heartbeat(None, instance_id,
+                                self._payload(ServiceStatuses.BUILDING),
+                                sent=now)
+        self.cond_mgr.flush_heartbeats()
+
+        self.cond_mgr.heartbeat(None, instance_id,
+                                self._payload(ServiceStatuses.HEALTHY),
+                                sent=now + 1)
+        # Another conductor saves a younger heartbeat after the last seen
+        # times are loaded.
+        load_all = LastSeen.load_all
+
+        def _load_all(*args):
+            seen = load_all(*args)
+            LastSeen.update_all('heartbeat', {instance_id: now + 2})
+            return seen
+
+        with patch.object(LastSeen, 'load_all', side_effect=_load_all):
+            self.cond_mgr.flush_heartbeats()
+
+        self.assertEqual(ServiceStatuses.BUILDING,
+                         self._get_status(instance_id))
+
+    @patch('trove.conductor.manager.LOG')
+    def test_heartbeats_keepalive_saved(self, mock_logging):
+        instance_ids = [self._create_iss() for _ in range(2)]
+        for instance_id, keepalive in zip(instance_ids, [30, 60]):
+            payload = self._payload(ServiceStatuses.HEALTHY)
+            payload['keepalive'] = keepalive
+            self.cond_mgr.heartbeat(None, instance_id, payload)
+        self.cond_mgr.flush_heartbeats()
+
+        self.assertEqual(
+            [30, 60],
+            [t_models.InstanceServiceStatus.find_by(
+                instance_id=instance_id).keepalive
+             for instance_id in instance_ids])
+
+    @patch('trove.conductor.manager.LOG')
+    def test_heartbeats_restart_required_kept(self, mock_logging):
+        instance_id = self._create_iss(ServiceStatuses.RESTART_REQUIRED)
+
+        self.cond_mgr.heartbeat(None, instance_id,
+                                self._payload(ServiceStatuses.HEALTHY))
+        self.cond_mgr.flush_heartbeats()
+
+        self.assertEqual(ServiceStatuses.RESTART_REQUIRED,
+                         self._get_status(instance_id))
+
+    def test_heartbeat_bogus_status(self):
+        self.assertRaises(ValueError, self.cond_mgr.heartbeat, None,
+                          utils.generate_uuid(),
+                          {'service_status': 'potato salad'})
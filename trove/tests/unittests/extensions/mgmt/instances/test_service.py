@@ -13,6 +13,11 @@
 #    limitations under the License.
 from unittest import mock
 
+from oslo_serialization import jsonutils
+
+from trove.common.base_wsgi import JSONDictSerializer
+from trove.common import exception
+from trove.common import wsgi
 from trove.datastore import models as ds_models
 from trove.extensions.mgmt.instances import service as ins_service
 from trove.instance import models as ins_models
@@ -59,30 +64,70 @@ class TestMgmtInstanceController(trove_testtools.TestCase):
 
         super(TestMgmtInstanceController, cls).tearDownClass()
 
+    def _request(self, query=''):
+        req = wsgi.Request.blank('/v1.0/%s/mgmt/instances%s' % (
+            self.project_id, query))
+        req.environ[wsgi.CONTEXT_KEY] = trove_testtools.TroveTestContext(
+            self, is_admin=True, limit=req.GET.get('limit'),
+            marker=req.GET.get('marker'))
+        return req
+
     @mock.patch('trove.common.clients.create_nova_client')
     def test_index_project_id(self, mock_create_client):
-        req = mock.MagicMock()
-        req.GET = {
-            'project_id': self.project_id
-        }
+        result = self.controller.index(
+            self._request('?project_id=%s' % self.project_id), mock.ANY)
 
-        mock_nova_client = mock.MagicMock()
-        mock_nova_client.servers.list.return_value = [
-            mock.MagicMock(id=self.server_id)]
-        mock_create_client.return_value = mock_nova_client
+        self.assertEqual(200, result.status)
+        data = result.data(None)
+        self.assertEqual([self.instance.id],
+                         [instance['id'] for instance in data['instances']])
 
-        result = self.controller.index(req, mock.ANY)
+        result = self.controller.index(
+            self._request('?project_id=%s' % self.random_uuid()), mock.ANY)
 
         self.assertEqual(200, result.status)
         data = result.data(None)
-        self.assertEqual(1, len(data['instances']))
+        self.assertEqual(0, len(data['instances']))
+        # Only the servers of the listed instances are fetched.
+        mock_create_client.return_value.servers.list.assert_not_called()
 
-        req.GET = {
-            'project_id': self.random_uuid()
-        }
+    @mock.patch('trove.common.clients.create_nova_client')
+    def test_index_stream(self, mock_create_client):
+        result = self.controller.index(
+            self._request('?project_id=%s' % self.project_id), mock.ANY)
 
-        result = self.controller.index(req, mock.ANY)
+        body = b''.join(result.iter_json(JSONDictSerializer()))
+        self.assertEqual([self.instance.id],
+                         [instance['id'] for instance in
+                          jsonutils.loads(body)['instances']])
+
+    @mock.patch('trove.common.clients.create_nova_client')
+    def test_index_paginated(self, mock_create_client):
+        result = self.controller.index(
+            self._request('?limit=1&project_id=%s' % self.project_id),
+            mock.ANY)
 
-        self.assertEqual(200, result.status)
         data = result.data(None)
-        self.assertEqual(0, len(data['instances']))
+        self.assertEqual(1, len(data['instances']))
+        self.assertNotIn('links', data)
+
+    @mock.patch('trove.common.clients.create_nova_client')
+    def test_index_filters(self, mock_create_client):
+        mock_create_client.return_value.servers.list.return_value = [
+            mock.MagicMock(id=self.server_id)]
+        query = '?project_id=%s&datastore=%s&task_status=building&host=h1'
+
+        result = self.controller.index(
+            self._request(query % (self.project_id, self.ds_name)), mock.ANY)
+
+        self.assertEqual(1, len(result.data(None)['instances']))
+        mock_create_client.return_value.servers.list.assert_called_once_with(
+            search_opts={'all_tenants': False, 'host': 'h1'}, limit=-1)
+
+        result = self.controller.index(
+            self._request('?task_status=deleting'), mock.ANY)
+
+        self.assertEqual(0, len(result.data(None)['instances']))
+        self.assertRaises(
+            exception.BadRequest, self.controller.index,
+            self._request('?task_status=invalid'), mock.ANY)
@@ -0,0 +1,90 @@
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from trove.guestagent.utils import docker as docker_util
+from trove.tests.unittests import trove_testtools
+
+
+class TestContainerStatusCache(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestContainerStatusCache, self).setUp()
+        self.client = MagicMock()
+        self.client.containers.get.return_value.status = 'running'
+        self.cache = docker_util.ContainerStatusCache(self.client)
+        patcher = patch.object(docker_util.eventlet, 'spawn')
+        self.addCleanup(patcher.stop)
+        self.mock_spawn = patcher.start()
+
+    def test_status_cached(self):
+        self.assertEqual('running', self.cache.get())
+        self.assertEqual('running', self.cache.get())
+
+        self.client.events.assert_called_once_with(
+            decode=True,
+            filters={'type': 'container', 'container': 'database'})
+        self.mock_spawn.assert_called_once_with(
+            self.cache._consume, self.client.events.return_value)
+        self.client.containers.get.assert_called_once_with('database')
+
+    def test_event_clears_status(self):
+        self.cache.get()
+        self.cache._consume(iter([{'Action': 'die'}]))
+        self.client.containers.get.return_value.status = 'exited'
+
+        self.assertEqual('exited', self.cache.get())
+        self.assertEqual(2, self.client.containers.get.call_count)
+
+    def test_event_during_lookup(self):
+        container = self.client.containers.get.return_value
+
+        def _get(name):
+            # An event is received while the status is looked up
+            self.cache._clear()
+            return container
+        self.client.containers.get.side_effect = _get
+
+        self.assertEqual('running', self.cache.get())
+        self.assertEqual('running', self.cache.get())
+        self.assertEqual(2, self.client.containers.get.call_count)
+
+    def test_watch_stopped(self):
+        self.cache.get()
+        self.cache._consume(MagicMock(
+            __iter__=MagicMock(side_effect=Exception('Connection lost'))))
+
+        self.assertFalse(self.cache._watching)
+        self.assertIsNone(self.cache._status)
+        self.assertEqual('running', self.cache.get())
+        self.assertEqual(2, self.client.events.call_count)
+        self.assertEqual(2, self.client.containers.get.call_count)
+
+    def test_watch_failed(self):
+        self.client.events.side_effect = Exception('Docker unavailable')
+
+        self.assertEqual('running', self.cache.get())
+        self.assertEqual('running', self.cache.get())
+        self.mock_spawn.assert_not_called()
+        self.assertEqual(2, self.client.containers.get.call_count)
+
+    def test_unknown_status_not_cached(self):
+        self.client.containers.get.side_effect = Exception('Timed out')
+
+        self.assertEqual('unknown', self.cache.get())
+        self.assertEqual('unknown', self.cache.get())
+        self.assertEqual(2, self.client.containers.get.call_count)
@@ -0,0 +1,269 @@
+# Copyright 2021 Catalyst Cloud
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from trove.common import exception
+from trove.guestagent.datastore.mysql_common import service as mysql_service
+from trove.guestagent.datastore.postgres import service as pg_service
+from trove.guestagent.datastore import service
+from trove.instance import service_status
+from trove.tests.unittests import trove_testtools
+
+
+class TestBaseDbStatusHeartbeat(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestBaseDbStatusHeartbeat, self).setUp()
+        self.patch_conf_property('report_interval', 30)
+        self.patch_conf_property('agent_keepalive_interval', 300)
+        self.patch_conf_property('agent_heartbeat_expiry', 90)
+        patcher = patch.object(service.conductor_api, 'API')
+        self.addCleanup(patcher.stop)
+        self.mock_heartbeat = patcher.start().return_value.heartbeat
+
+    def _report_ticks(self, count, initial_tick=0, status=None):
+        """The status checks out of count a heartbeat was sent on."""
+        with patch.object(service.random, 'randrange',
+                          return_value=initial_tick):
+            db_status = service.BaseDbStatus(MagicMock())
+        db_status._BaseDbStatus__prepare_completed = True
+        status = status or service_status.ServiceStatuses.HEALTHY
+        ticks = []
+        for tick in range(count):
+            self.mock_heartbeat.reset_mock()
+            db_status.report_status(status)
+            if self.mock_heartbeat.called:
+                ticks.append(tick)
+        return db_status, ticks
+
+    def _keepalive(self):
+        return self.mock_heartbeat.call_args[0][1]['keepalive']
+
+    def test_keepalive_within_expiry(self):
+        # The keepalive is sent at most one tick after it is due, so the
+        # interval stops at 2 ticks with the 90s expiry.
+        _db_status, ticks = self._report_ticks(10)
+
+        self.assertEqual([0, 1, 3, 5, 7, 9], ticks)
+        self.assertEqual(60, self._keepalive())
+
+    def test_keepalive_ticks(self):
+        self.patch_conf_property('agent_heartbeat_expiry', 330)
+
+        _db_status, ticks = self._report_ticks(40)
+
+        # The interval doubles up to 10 ticks, on the multiples of the
+        # interval.
+        self.assertEqual([0, 1, 3, 7, 15, 19, 29, 39], ticks)
+        self.assertEqual(300, self._keepalive())
+
+    def test_initial_tick(self):
+        self.patch_conf_property('agent_heartbeat_expiry', 330)
+
+        with patch.object(service.random, 'randrange',
+                          return_value=0) as mock_randrange:
+            service.BaseDbStatus(MagicMock())
+        mock_randrange.assert_called_once_with(10)
+
+        # The guests started together send their keepalives on other ticks.
+        _db_status, ticks = self._report_ticks(40, initial_tick=5)
+        self.assertEqual([0, 1, 2, 6, 10, 14, 24, 34], ticks)
+
+    def test_status_change(self):
+        db_status, _ticks = self._report_ticks(10)
+        self.mock_heartbeat.reset_mock()
+
+        db_status.report_status(service_status.ServiceStatuses.SHUTDOWN)
+
+        self.mock_heartbeat.assert_called_once()
+        self.assertEqual(30, self._keepalive())
+
+
+class TestMySqlAppStatus(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestMySqlAppStatus, self).setUp()
+        self.status = mysql_service.BaseMySqlAppStatus(MagicMock())
+        self.status.container_status = MagicMock()
+        self.status.container_status.get.return_value = 'running'
+        patcher = patch.object(mysql_service, 'get_engine')
+        self.addCleanup(patcher.stop)
+        self.mock_engine = patcher.start().return_value
+        self.connection = self.mock_engine.connect.return_value
+
+    def test_probe(self):
+        self.assertTrue(self.status._probe())
+        self.connection.execute.assert_called_once()
+        self.connection.close.assert_called_once_with()
+
+    def test_probe_connect_error(self):
+        self.mock_engine.connect.side_effect = Exception('No socket')
+
+        self.assertIsNone(self.status._probe())
+
+    def test_probe_query_error(self):
+        self.connection.execute.side_effect = Exception('Lost connection')
+
+        self.assertFalse(self.status._probe())
+        self.connection.invalidate.assert_called_once_with()
+        self.connection.close.assert_called_once_with()
+
+    @patch.object(service.BaseDbApp, 'get_auth_password',
+                  return_value='password')
+    @patch.object(mysql_service.BaseMySqlAppStatus, 'exec_probe',
+                  return_value=True)
+    @patch.object(mysql_service.BaseMySqlAppStatus, '_probe',
+                  return_value=None)
+    def test_status_probe_fallback(self, mock_probe, mock_exec, *args):
+        self.assertEqual(service_status.ServiceStatuses.HEALTHY,
+                         self.status.get_actual_db_status())
+        mock_exec.assert_called_once_with(
+            'mysql -uroot -ppassword -e "select 1;"')
+
+    @patch.object(mysql_service.BaseMySqlAppStatus, 'exec_probe')
+    @patch.object(mysql_service.BaseMySqlAppStatus, '_probe',
+                  return_value=False)
+    def test_status_probe_failed(self, mock_probe, mock_exec):
+        self.assertEqual(service_status.ServiceStatuses.RUNNING,
+                         self.status.get_actual_db_status())
+        mock_exec.assert_not_called()
+
+    @patch.object(mysql_service.BaseMySqlAppStatus, '_probe')
+    def test_status_shutdown(self, mock_probe):
+        self.status.container_status.get.return_value = 'exited'
+
+        self.assertEqual(service_status.ServiceStatuses.SHUTDOWN,
+                         self.status.get_actual_db_status())
+        mock_probe.assert_not_called()
+
+
+class TestPgSqlAppStatus(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestPgSqlAppStatus, self).setUp()
+        self.patch_datastore_manager('postgresql')
+        self.status = pg_service.PgSqlAppStatus(MagicMock())
+        self.status.container_status = MagicMock()
+        self.status.container_status.get.return_value = 'running'
+        patcher = patch.object(pg_service.psycopg2, 'connect')
+        self.addCleanup(patcher.stop)
+        self.mock_connect = patcher.start()
+        self.connection = self.mock_connect.return_value
+        self.connection.closed = False
+        self.cursor = self.connection.cursor.return_value.__enter__()
+
+    def test_probe_connection_kept(self):
+        self.assertTrue(self.status._probe())
+        self.assertTrue(self.status._probe())
+
+        self.mock_connect.assert_called_once()
+        self.assertEqual(2, self.cursor.execute.call_count)
+
+    def test_probe_connect_error(self):
+        self.mock_connect.side_effect = Exception('Connection refused')
+
+        self.assertIsNone(self.status._probe())
+        self.assertIsNone(self.status._connection)
+
+    def test_probe_query_error(self):
+        self.cursor.execute.side_effect = [Exception('Statement timeout'),
+                                           None]
+
+        self.assertFalse(self.status._probe())
+        self.connection.close.assert_called_once_with()
+        self.assertIsNone(self.status._connection)
+        self.assertTrue(self.status._probe())
+        self.assertEqual(2, self.mock_connect.call_count)
+
+    @patch.object(pg_service.PgSqlAppStatus, 'exec_probe',
+                  return_value=False)
+    @patch.object(pg_service.PgSqlAppStatus, '_probe', return_value=None)
+    def test_status_probe_fallback(self, mock_probe, mock_exec):
+        self.assertEqual(service_status.ServiceStatuses.RUNNING,
+                         self.status.get_actual_db_status())
+        mock_exec.assert_called_once_with("psql -U postgres -c 'select 1;'")
+
+    @patch.object(pg_service.PgSqlAppStatus, 'exec_probe')
+    @patch.object(pg_service.PgSqlAppStatus, '_probe', return_value=False)
+    def test_status_probe_failed(self, mock_probe, mock_exec):
+        self.assertEqual(service_status.ServiceStatuses.RUNNING,
+                         self.status.get_actual_db_status())
+        mock_exec.assert_not_called()
+
+
+class TestPgSqlAppWalStream(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestPgSqlAppWalStream, self).setUp()
+        self.patch_datastore_manager('postgresql')
+        self.patch_conf_property('guest_id', 'instance-id')
+        self.app = pg_service.PgSqlApp(MagicMock(), MagicMock())
+        self.context = trove_testtools.TroveTestContext(
+            self, auth_token='token', project_id='project-id',
+            user_id='user-id')
+        patcher = patch.object(pg_service.PgSqlApp, 'get_client_auth_file',
+                               return_value='/conf.d/wal_stream.cnf')
+        self.addCleanup(patcher.stop)
+        patcher.start()
+
+    def test_restore_target_params(self):
+        backup_info = {'instance_id': 'backup-instance-id',
+                       'restore_target': {'time': '2021-06-01T12:00:00Z'}}
+
+        params = self.app.get_restore_target_params(backup_info)
+
+        self.assertIn('--wal-stream-id=backup-instance-id', params)
+        self.assertIn('--restore-target-time=2021-06-01T12:00:00Z', params)
+        self.assertNotIn('--restore-target-lsn', params)
+
+    @patch.object(pg_service.docker_util, 'start_container')
+    @patch.object(pg_service.operating_system, 'write_file')
+    @patch.object(pg_service.operating_system, 'read_file',
+                  side_effect=exception.UnprocessableEntity())
+    @patch.object(pg_service.ka_session, 'Session')
+    def test_start_wal_stream(self, mock_session, mock_read, mock_write,
+                              mock_start):
+        mock_session.return_value.post.return_value.json.return_value = {
+            'application_credential': {'id': 'cred-id',
+                                       'secret': 'cred-secret'}}
+
+        self.app.start_wal_stream(self.context)
+
+        mock_session.return_value.post.assert_called_once()
+        self.assertEqual('/users/user-id/application_credentials',
+                         mock_session.return_value.post.call_args[0][0])
+        mock_write.assert_called_once_with(
+            '/conf.d/wal_stream.cnf',
+            {'client': {'user': 'cred-id', 'password': 'cred-secret'}},
+            codec=self.app.CFG_CODEC, as_root=True)
+        self.assertEqual(pg_service.WAL_STREAM_CONTAINER,
+                         mock_start.call_args[1]['name'])
+        command = mock_start.call_args[1]['command']
+        self.assertIn('--wal-stream --wal-stream-id=instance-id', command)
+        self.assertIn('--os-application-credential-id=cred-id', command)
+        self.assertIn('--os-application-credential-secret=cred-secret',
+                      command)
+
+    @patch.object(pg_service.docker_util, 'start_container')
+    @patch.object(pg_service.operating_system, 'read_file',
+                  return_value={'client': {'user': 'cred-id',
+                                           'password': 'cred-secret'}})
+    @patch.object(pg_service.ka_session, 'Session')
+    def test_start_wal_stream_saved_credential(self, mock_session, *args):
+        self.app.start_wal_stream(self.context)
+
+        mock_session.assert_not_called()
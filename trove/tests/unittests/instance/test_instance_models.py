@@ -11,15 +11,22 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+from datetime import timedelta
+from unittest.mock import call
 from unittest.mock import Mock
 from unittest.mock import patch
 import uuid
 
+import eventlet
+from novaclient import exceptions as nova_exceptions
+
 from trove.backup import models as backup_models
 from trove.common import cfg
 from trove.common import clients
+from trove.common import crypto_utils
 from trove.common import exception
 from trove.common import neutron
+from trove.common import timeutils
 from trove.datastore import models as datastore_models
 from trove.instance import models
 from trove.instance.models import DBInstance
@@ -30,6 +37,7 @@ from trove.instance.models import InstanceServiceStatus
 from trove.instance.models import SimpleInstance
 from trove.instance.service_status import ServiceStatuses
 from trove.instance.tasks import InstanceTasks
+from trove.metadata import models as metadata_models
 from trove.taskmanager import api as task_api
 from trove.tests.fakes import nova
 from trove.tests.unittests import trove_testtools
@@ -108,6 +116,306 @@ class SimpleInstanceTest(trove_testtools.TestCase):
             self.assertEqual(fault_date, fault.updated)
 
 
+class LoadInstancesAddressesTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(LoadInstancesAddressesTest, self).setUp()
+        self.context = trove_testtools.TroveTestContext(self)
+        self.db_infos = [
+            DBInstance(InstanceTasks.NONE, id='ins-%s' % index,
+                       compute_instance_id='server-%s' % index,
+                       region_id='RegionOne')
+            for index in range(3)]
+        self.neutron_client = Mock()
+        self.neutron_client.list_ports.return_value = {'ports': [
+            {'id': 'port-0', 'device_id': 'server-0', 'network_id': 'user',
+             'fixed_ips': [{'ip_address': '10.0.0.10'}]},
+            {'id': 'port-1', 'device_id': 'server-1', 'network_id': 'user',
+             'fixed_ips': [{'ip_address': '10.0.0.11'}]},
+            {'id': 'port-mgmt', 'device_id': 'server-1',
+             'network_id': 'mgmt',
+             'fixed_ips': [{'ip_address': '192.168.0.11'}]},
+        ]}
+        self.neutron_client.list_floatingips.return_value = {
+            'floatingips': [{'port_id': 'port-1',
+                             'floating_ip_address': '172.24.4.11'}]}
+        self.patch_conf_property('management_networks', ['mgmt'])
+
+    def test_load_addresses_in_bulk(self):
+        with patch.object(clients, 'create_neutron_client',
+                          return_value=self.neutron_client):
+            models.load_simple_instances_addresses(self.context,
+                                                   self.db_infos)
+
+        self.neutron_client.list_ports.assert_called_once_with(
+            device_id=['server-0', 'server-1', 'server-2'])
+        self.neutron_client.list_floatingips.assert_called_once_with(
+            port_id=['port-0', 'port-1'])
+        self.assertEqual([{'address': '10.0.0.10', 'type': 'private'}],
+                         self.db_infos[0].addresses)
+        self.assertEqual(['port-1'], self.db_infos[1].ports)
+        self.assertEqual([{'address': '10.0.0.11', 'type': 'private'},
+                          {'address': '172.24.4.11', 'type': 'public'}],
+                         self.db_infos[1].addresses)
+        self.assertEqual([], self.db_infos[2].addresses)
+
+    def test_load_addresses_in_chunks(self):
+        self.patch_conf_property('neutron_filter_chunk_size', 2)
+        ports = self.neutron_client.list_ports.return_value['ports']
+        self.neutron_client.list_ports.side_effect = [
+            {'ports': ports}, {'ports': []}]
+        with patch.object(clients, 'create_neutron_client',
+                          return_value=self.neutron_client):
+            models.load_simple_instances_addresses(self.context,
+                                                   self.db_infos)
+
+        self.neutron_client.list_ports.assert_has_calls([
+            call(device_id=['server-0', 'server-1']),
+            call(device_id=['server-2'])])
+        self.assertEqual(1, self.neutron_client.list_floatingips.call_count)
+        self.assertEqual([{'address': '10.0.0.10', 'type': 'private'}],
+                         self.db_infos[0].addresses)
+
+    def test_load_addresses_building(self):
+        self.db_infos[0].set_task_status(InstanceTasks.BUILDING)
+        with patch.object(clients, 'create_neutron_client',
+                          return_value=self.neutron_client):
+            models.load_simple_instances_addresses(self.context,
+                                                   self.db_infos[:1])
+
+        self.assertEqual([], self.db_infos[0].addresses)
+        self.neutron_client.list_ports.assert_not_called()
+
+
+class InstancesLoadTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(InstancesLoadTest, self).setUp()
+        util.init_db()
+        self.context = trove_testtools.TroveTestContext(
+            self, project_id=str(uuid.uuid4()))
+        self.region = CONF.service_credentials.region_name
+        self.datastore = datastore_models.DBDatastore.create(
+            id=str(uuid.uuid4()), name='name' + str(uuid.uuid4()),
+            default_version_id=str(uuid.uuid4()))
+        self.addCleanup(self.datastore.delete)
+        self.datastore_version = datastore_models.DBDatastoreVersion.create(
+            id=self.datastore.default_version_id,
+            name='name' + str(uuid.uuid4()), image_id=str(uuid.uuid4()),
+            packages=str(uuid.uuid4()), datastore_id=self.datastore.id,
+            manager='mysql', active=1)
+        self.addCleanup(self.datastore_version.delete)
+        self.db_infos = []
+        for index, region in enumerate([None, 'RegionTwo', None]):
+            db_info = DBInstance.create(
+                name='instance-%s' % index, flavor_id=1,
+                tenant_id=self.context.project_id,
+                datastore_version_id=self.datastore_version.id,
+                compute_instance_id='server-%s' % index,
+                task_status=InstanceTasks.NONE, region_id=region)
+            status = InstanceServiceStatus.create(
+                instance_id=db_info.id, status=ServiceStatuses.RUNNING)
+            self.db_infos.append(db_info)
+            self.addCleanup(db_info.delete)
+            self.addCleanup(status.delete)
+        self.nova_clients = {}
+        self.create_nova_client = self._patch_nova_client()
+
+    def _patch_nova_client(self):
+        def create_nova_client(context, region_name=None):
+            client = self.nova_clients.setdefault(region_name, Mock())
+            client.servers.get.side_effect = (
+                lambda server_id: Mock(id=server_id, status='ACTIVE'))
+            return client
+
+        patcher = patch.object(clients, 'create_nova_client',
+                               side_effect=create_nova_client)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_server_list_matcher(self):
+        servers = [Mock(id='server-0'), Mock(id='server-1'),
+                   Mock(id='server-1')]
+        find_server = models.create_server_list_matcher(servers)
+
+        self.assertEqual(servers[0], find_server('ins-0', 'server-0'))
+        self.assertRaises(exception.ComputeInstanceNotFound,
+                          find_server, 'ins-2', 'server-2')
+        self.assertRaises(exception.TroveError,
+                          find_server, 'ins-1', 'server-1')
+
+    def test_load_servers(self):
+        self.db_infos[2].set_task_status(InstanceTasks.BUILDING)
+
+        servers = models.load_servers(self.context, self.db_infos)
+
+        self.assertEqual(['server-0', 'server-1'],
+                         [server.id for server in servers])
+        self.nova_clients[self.region].servers.get.assert_called_once_with(
+            'server-0')
+        self.nova_clients['RegionTwo'].servers.get.assert_called_once_with(
+            'server-1')
+
+    def test_load_servers_not_found(self):
+        self.patch_conf_property('nova_server_fetch_concurrency', 1)
+        client = Mock()
+        client.servers.get.side_effect = [
+            Mock(id='server-0'), nova_exceptions.NotFound(404),
+            Mock(id='server-2')]
+        self.create_nova_client.side_effect = None
+        self.create_nova_client.return_value = client
+
+        servers = models.load_servers(self.context, self.db_infos)
+
+        self.assertEqual(['server-0', 'server-2'],
+                         [server.id for server in servers])
+
+    @patch.object(models, 'load_simple_instances_addresses')
+    def test_instances_load(self, mock_load_addresses):
+        self.context.limit = 2
+
+        instances, next_marker = models.Instances.load(self.context, False)
+
+        self.assertEqual(2, len(instances))
+        self.assertIsNotNone(next_marker)
+        for client in self.nova_clients.values():
+            client.servers.list.assert_not_called()
+        fetched = [args[0] for client in self.nova_clients.values()
+                   for args, _ in client.servers.get.call_args_list]
+        self.assertEqual(
+            sorted(instance.db_info.compute_instance_id
+                   for instance in instances),
+            sorted(fetched))
+        self.assertEqual(['ACTIVE', 'ACTIVE'],
+                         [instance.db_info.server_status
+                          for instance in instances])
+
+    @patch.object(models, 'load_simple_instances_addresses')
+    def test_instances_load_related_in_bulk(self, mock_load_addresses):
+        metadata_models.Metadata.create(
+            self.context.project_id, 'instances', self.db_infos[0].id,
+            {'owner': 'trove'})
+        self.addCleanup(metadata_models.Metadata.delete,
+                        self.context.project_id, 'instances',
+                        self.db_infos[0].id)
+        self.db_infos[1].slave_of_id = self.db_infos[0].id
+        self.db_infos[1].save()
+
+        with patch.object(InstanceServiceStatus, 'find_by') as find_status, \
+                patch.object(datastore_models.DatastoreVersion,
+                             'load_by_uuid') as load_version, \
+                patch.object(metadata_models.Metadata, 'list') as list_meta:
+            instances, _ = models.Instances.load(self.context, False)
+            by_id = {instance.id: instance for instance in instances}
+            instance = by_id[self.db_infos[0].id]
+
+            self.assertEqual({'owner': 'trove'}, instance.metadata)
+            self.assertEqual([self.db_infos[1].id],
+                             [slave.id for slave in instance.slaves])
+            self.assertEqual(self.datastore.name, instance.datastore.name)
+            self.assertEqual(self.datastore_version.name,
+                             instance.datastore_version.name)
+            self.assertEqual(ServiceStatuses.RUNNING,
+                             instance.datastore_status.status)
+            self.assertEqual({}, by_id[self.db_infos[2].id].metadata)
+
+        find_status.assert_not_called()
+        load_version.assert_not_called()
+        list_meta.assert_not_called()
+
+    def test_get_instances_version(self):
+        version = models.get_instances_version(self.context)
+        self.assertEqual(3, version[0])
+
+        status = InstanceServiceStatus.find_by(
+            instance_id=self.db_infos[0].id)
+        status.set_status(ServiceStatuses.SHUTDOWN)
+        status.save()
+
+        new_version = models.get_instances_version(self.context)
+        self.assertNotEqual(version, new_version)
+        self.assertEqual(status.updated_at, new_version[2])
+
+
+class LoadConcurrentlyTest(trove_testtools.TestCase):
+
+    def test_load_concurrently(self):
+        event = eventlet.event.Event()
+        loaded = []
+
+        def _wait():
+            loaded.append(event.wait())
+
+        models.load_concurrently(
+            {'first': _wait, 'second': lambda: event.send('value')}, 'id')
+
+        self.assertEqual(['value'], loaded)
+
+    def test_load_concurrently_timeout(self):
+        self.patch_conf_property('instance_detail_load_timeout', 1)
+        loaded = []
+
+        models.load_concurrently(
+            {'slow': lambda: loaded.append(eventlet.sleep(5)),
+             'fast': lambda: loaded.append('fast')}, 'id')
+
+        self.assertEqual(['fast'], loaded)
+
+    def test_load_concurrently_error(self):
+        self.assertRaises(
+            exception.TroveError, models.load_concurrently,
+            {'error': Mock(side_effect=exception.TroveError()),
+             'other': Mock()}, 'id')
+
+
+class InstanceServiceStatusTest(trove_testtools.TestCase):
+
+    def _status(self, seconds_ago, keepalive=None):
+        return InstanceServiceStatus(
+            ServiceStatuses.HEALTHY, instance_id=str(uuid.uuid4()),
+            keepalive=keepalive,
+            updated_at=timeutils.utcnow() - timedelta(seconds=seconds_ago))
+
+    def test_is_uptodate(self):
+        self.patch_conf_property('agent_heartbeat_expiry', 90)
+
+        self.assertTrue(self._status(60).is_uptodate())
+        self.assertFalse(self._status(120).is_uptodate())
+
+    def test_is_uptodate_keepalive(self):
+        self.patch_conf_property('agent_heartbeat_expiry', 90)
+
+        self.assertTrue(self._status(120, keepalive=300).is_uptodate())
+        self.assertFalse(self._status(500, keepalive=300).is_uptodate())
+        # The expiry is not shorter than agent_heartbeat_expiry.
+        self.assertTrue(self._status(60, keepalive=10).is_uptodate())
+        # Nor longer with the default keepalive.
+        self.assertFalse(self._status(91, keepalive=60).is_uptodate())
+
+    def test_load_statuses(self):
+        util.init_db()
+        instance_ids = []
+        for task_status in [InstanceTasks.BUILDING,
+                            InstanceTasks.BUILDING_ERROR_SERVER]:
+            db_info = DBInstance.create(
+                name='instance', flavor_id=1, tenant_id='tenant',
+                task_status=task_status)
+            status = InstanceServiceStatus.create(
+                instance_id=db_info.id, status=ServiceStatuses.NEW)
+            self.addCleanup(db_info.delete)
+            self.addCleanup(status.delete)
+            instance_ids.append(db_info.id)
+
+        statuses = InstanceServiceStatus.load_statuses(
+            instance_ids + [str(uuid.uuid4())])
+
+        self.assertEqual(
+            {instance_ids[0]: (ServiceStatuses.NEW, InstanceTasks.BUILDING),
+             instance_ids[1]: (ServiceStatuses.NEW,
+                               InstanceTasks.BUILDING_ERROR_SERVER)},
+            statuses)
+
+
 class CreateInstanceTest(trove_testtools.TestCase):
 
     @patch.object(task_api.API, 'get_client', Mock(return_value=Mock()))
@@ -428,3 +736,44 @@ class TestInstanceKeyCaching(trove_testtools.TestCase):
         self.assertEqual(keyfn.call_count, 1)
         self.assertIsNone(keycache[30])
         self.assertEqual(keyfn.call_count, 2)
+
+    def test_lru_eviction(self):
+        keyfn = Mock(side_effect=lambda instance_id: 'key' + instance_id)
+        keycache = instance_encryption_key_cache(keyfn, 2)
+        keycache['1']
+        keycache['2']
+        keycache['1']
+        keycache['3']
+
+        self.assertEqual('key1', keycache['1'])
+        self.assertEqual(3, keyfn.call_count)
+        self.assertEqual('key2', keycache['2'])
+        self.assertEqual(4, keyfn.call_count)
+
+    def test_key_expiry(self):
+        self.patch_conf_property('instance_key_cache_ttl', 0)
+        keyfn = Mock(return_value='key')
+        keycache = instance_encryption_key_cache(keyfn)
+
+        keycache['1']
+        keycache['1']
+
+        self.assertEqual(2, keyfn.call_count)
+
+    def test_derived_key_cached(self):
+        keycache = instance_encryption_key_cache(Mock(return_value=b'key'))
+
+        key = keycache['1']
+
+        self.assertIsInstance(key, crypto_utils.EncryptionKey)
+        self.assertEqual('key', key)
+        self.assertIs(key, keycache['1'])
+
+    @patch.object(models, '_instance_encryption_key')
+    def test_cache_stats(self, mock_cache):
+        mock_cache.stats.return_value = {'hits': 3, 'misses': 1,
+                                         'evictions': 0, 'size': 1}
+
+        stats = models.get_instance_encryption_key_cache_stats()
+
+        self.assertEqual(0.75, stats['hit_rate'])
@@ -107,7 +107,8 @@ class TestInstanceController(trove_testtools.TestCase):
             mock.ANY, mock.ANY,
             None, None, None, [], None, None,
             replica_count=None, volume_type=None, modules=None, locality=None,
-            region_name=CONF.service_credentials.region_name, access=None
+            region_name=CONF.service_credentials.region_name, access=None,
+            restore_target=None
         )
         args = mock_model_create.call_args[0]
         actual_ds_version = args[7]
@@ -116,6 +117,56 @@ class TestInstanceController(trove_testtools.TestCase):
         self.assertEqual(self.ds_version_imagetags.version,
                          actual_ds_version.version)
 
+    def _create_body(self, restore_point):
+        return {
+            'instance': {
+                'name': self.random_name(name='instance',
+                                         prefix='TestInstanceController'),
+                'flavorRef': self.random_uuid(),
+                'datastore': {
+                    'type': self.ds_name,
+                    'version': self.ds_version_imageid.name
+                },
+                'restorePoint': restore_point
+            }
+        }
+
+    @mock.patch.object(clients, 'create_glance_client')
+    @mock.patch('trove.instance.models.Instance.create')
+    def test_create_restore_time(self, mock_model_create,
+                                 mock_create_client):
+        backup_id = self.random_uuid()
+        body = self._create_body({'backupRef': backup_id,
+                                  'restoreTime': '2021-06-01T14:00:00+02:00'})
+
+        self.controller.create(mock.MagicMock(), body, mock.ANY)
+
+        args, kwargs = mock_model_create.call_args
+        self.assertEqual(backup_id, args[9])
+        self.assertEqual({'time': '2021-06-01T12:00:00Z'},
+                         kwargs['restore_target'])
+
+    @mock.patch.object(clients, 'create_glance_client')
+    @mock.patch('trove.instance.models.Instance.create')
+    def test_create_restore_lsn(self, mock_model_create,
+                                mock_create_client):
+        body = self._create_body({'backupRef': self.random_uuid(),
+                                  'restoreLsn': '16/B374D848'})
+
+        self.controller.create(mock.MagicMock(), body, mock.ANY)
+
+        self.assertEqual({'lsn': '16/B374D848'},
+                         mock_model_create.call_args[1]['restore_target'])
+
+    @mock.patch.object(clients, 'create_glance_client')
+    def test_create_restore_time_and_lsn(self, mock_create_client):
+        body = self._create_body({'backupRef': self.random_uuid(),
+                                  'restoreTime': '2021-06-01T12:00:00Z',
+                                  'restoreLsn': '16/B374D848'})
+
+        self.assertRaises(exception.BadRequest, self.controller.create,
+                          mock.MagicMock(), body, mock.ANY)
+
     def test_create_multiple_versions(self):
         body = {
             'instance': {
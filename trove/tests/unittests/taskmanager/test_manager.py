@@ -259,7 +259,7 @@ class TestManager(trove_testtools.TestCase):
             mock_override,
             None, None, None, None,
             {'group': 'sg-id'},
-            access=None, ds_version=None)
+            access=None, ds_version=None, restore_target=None)
         mock_tasks.wait_for_instance.assert_called_with(3600, mock_flavor)
 
     def test_create_cluster(self):
@@ -401,6 +401,47 @@ class FreshInstanceTasksTest(BaseFreshInstanceTasksTest):
             {'group': 'sg-id'}
         )
 
+    @patch.object(BaseInstance, 'update_db')
+    @patch.object(taskmanager_models.FreshInstanceTasks, '_create_dns_entry')
+    @patch.object(taskmanager_models.FreshInstanceTasks, 'get_injected_files')
+    @patch.object(taskmanager_models.FreshInstanceTasks, '_create_server')
+    @patch.object(taskmanager_models.FreshInstanceTasks, '_create_secgroup')
+    @patch.object(taskmanager_models.FreshInstanceTasks, '_build_volume_info')
+    @patch.object(taskmanager_models.FreshInstanceTasks, '_guest_prepare')
+    @patch.object(template, 'SingleInstanceConfigTemplate')
+    @patch.object(backup_models.Backup, 'get_by_id')
+    @patch('trove.taskmanager.models.FreshInstanceTasks._create_port')
+    def test_create_instance_restore_target(self,
+                                            mock_create_port,
+                                            mock_get_backup,
+                                            mock_single_instance_template,
+                                            mock_guest_prepare,
+                                            *args):
+        mock_get_backup.return_value = MagicMock(
+            instance_id='backup-instance-id', location='backup-location',
+            backup_type='pg_basebackup', checksum='backup-checksum')
+        mock_flavor = {'id': 8, 'ram': 768, 'name': 'bigger_flavor'}
+
+        self.freshinstancetasks.create_instance(
+            mock_flavor, 'pg-image-id', None,
+            None, 'postgresql', 'postgresql-server',
+            2, 'backup-id', None,
+            None, [{'net-id': 'fake-net-id'}], None,
+            None, None, 'volume_type',
+            None, {'group': 'sg-id'},
+            restore_target={'lsn': '16/B374D848'}
+        )
+
+        backup_info = mock_guest_prepare.call_args[0][5]
+        self.assertEqual({
+            'id': 'backup-id',
+            'instance_id': 'backup-instance-id',
+            'location': 'backup-location',
+            'type': 'pg_basebackup',
+            'checksum': 'backup-checksum',
+            'restore_target': {'lsn': '16/B374D848'},
+        }, backup_info)
+
     @patch.object(BaseInstance, 'update_db')
     @patch.object(taskmanager_models.FreshInstanceTasks, '_create_dns_entry')
     @patch.object(taskmanager_models.FreshInstanceTasks, 'get_injected_files')
@@ -19,7 +19,9 @@ import testtools
 from unittest import mock
 import uuid
 
+from trove.common import cache
 from trove.common import cfg
+from trove.common import clients
 from trove.common.context import TroveContext
 from trove.common.notification import DBaaSAPINotification
 from trove.common import policy
@@ -68,6 +70,8 @@ class TestCase(testtools.TestCase):
         super(TestCase, self).setUp()
 
         self.addCleanup(cfg.CONF.reset)
+        cache.get_reference_cache().clear()
+        clients._client_cache = None
 
         root_logger.DefaultRootHandler.set_info(self.id())
 